@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+worktree 内の検証成果物インデックスモジュール
+
+os.scandir で worktree を1回だけ走査し、カバレッジ・TRX・ビルドログを種類別・
+更新時刻順に索引化する。ビルド出力等は除外し、再走査は変更されたディレクトリ
+のみを読み直す。
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+# 走査しないディレクトリ名
+DEFAULT_PRUNE_DIRS = frozenset({
+    "bin", "obj", ".git", ".vs", ".idea", "node_modules", "packages", ".nuget",
+})
+
+
+def _classify(name: str) -> Optional[str]:
+    """ファイル名から成果物の種類を判定"""
+    lower = name.lower()
+    if lower == "coverage.cobertura.xml":
+        return "coverage"
+    if lower.endswith(".trx"):
+        return "trx"
+    if lower.endswith(".binlog") or (lower.endswith(".log") and ("msbuild" in lower or "build" in lower)):
+        return "build_log"
+    return None
+
+
+@dataclass(frozen=True)
+class ArtifactEntry:
+    """索引化された成果物ファイル"""
+    path: str
+    kind: str
+    mtime_ns: int
+    size: int
+
+
+class _DirState:
+    __slots__ = ("mtime_ns", "subdirs", "artifacts")
+
+    def __init__(self, mtime_ns: int, subdirs: List[str], artifacts: List[ArtifactEntry]):
+        self.mtime_ns = mtime_ns
+        self.subdirs = subdirs
+        self.artifacts = artifacts
+
+
+class ArtifactIndex:
+    """worktree 単位の成果物インデックス（差分更新対応）"""
+
+    def __init__(self, root: Path, prune_dirs: Iterable[str] = DEFAULT_PRUNE_DIRS,
+                 classify: Callable[[str], Optional[str]] = _classify):
+        self.root = str(Path(root).resolve())
+        self.prune_dirs = frozenset(prune_dirs)
+        self.classify = classify
+        self._dirs: Dict[str, _DirState] = {}
+        self._lock = threading.Lock()
+
+    def refresh(self) -> int:
+        """
+        インデックスを更新（mtimeが変わったディレクトリのみ再列挙）
+
+        Returns:
+            再列挙したディレクトリ数
+        """
+        with self._lock:
+            rescanned = 0
+            visited = set()
+            stack = [self.root]
+            while stack:
+                path = stack.pop()
+                try:
+                    mtime_ns = os.stat(path).st_mtime_ns
+                except OSError:
+                    continue
+                visited.add(path)
+
+                state = self._dirs.get(path)
+                if state is None or state.mtime_ns != mtime_ns:
+                    state = self._scan_dir(path, mtime_ns)
+                    self._dirs[path] = state
+                    rescanned += 1
+                stack.extend(state.subdirs)
+
+            # 削除されたディレクトリを除去
+            for stale in set(self._dirs) - visited:
+                del self._dirs[stale]
+            return rescanned
+
+    def _scan_dir(self, path: str, mtime_ns: int) -> _DirState:
+        subdirs: List[str] = []
+        artifacts: List[ArtifactEntry] = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.prune_dirs:
+                            subdirs.append(entry.path)
+                        continue
+                    kind = self.classify(entry.name)
+                    if kind and entry.is_file(follow_symlinks=False):
+                        st = entry.stat()
+                        artifacts.append(ArtifactEntry(entry.path, kind, st.st_mtime_ns, st.st_size))
+        except OSError:
+            pass
+        return _DirState(mtime_ns, subdirs, artifacts)
+
+    def find(self, kind: str, under: Optional[Path] = None) -> List[ArtifactEntry]:
+        """指定種類の成果物を新しい順に返す（under 指定時はその配下のみ）"""
+        prefix = None
+        if under is not None:
+            prefix = str(Path(under).resolve())
+            prefix_sep = prefix + os.sep
+        with self._lock:
+            matches = [
+                artifact
+                for dir_path, state in self._dirs.items()
+                if prefix is None or dir_path == prefix or dir_path.startswith(prefix_sep)
+                for artifact in state.artifacts
+                if artifact.kind == kind
+            ]
+        matches.sort(key=lambda a: a.mtime_ns, reverse=True)
+        return matches
+
+    def newest(self, kind: str, under: Optional[Path] = None) -> Optional[ArtifactEntry]:
+        matches = self.find(kind, under)
+        return matches[0] if matches else None
+
+    def summary(self) -> Dict[str, Tuple[int, int]]:
+        """種類別の (件数, 最新mtime_ns)"""
+        result: Dict[str, Tuple[int, int]] = {}
+        with self._lock:
+            for state in self._dirs.values():
+                for artifact in state.artifacts:
+                    count, newest = result.get(artifact.kind, (0, 0))
+                    result[artifact.kind] = (count + 1, max(newest, artifact.mtime_ns))
+        return result
@@ -7,24 +7,126 @@
 
 import os
 import json
-import subprocess
+import shutil
 import glob
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional
 from pathlib import Path
+try:
+    from .ValidationCache import ValidationResultCache, validation_cache_dir
+    from .ProcessRunner import StreamingRunner, BuildOutputParser, TestOutputParser
+    from .TrxParser import parse_trx_files
+    from .CoverageAnalyzer import CoverageAnalyzer, get_changed_lines
+    from .ArtifactIndex import ArtifactIndex
+    from .FileMatcher import match_required_files
+    from .TaskCatalog import get_task_catalog
+    from .TestImpact import (TestImpactAnalyzer, TestImpactMap, TestSelection, class_filter,
+                             class_exclusion_filter, learn_test_impact)
+    from .TestSharding import TestDurationHistory, plan_shards
+    from .ValidationPipeline import Stage, StageGraph
+    from .DotnetToolchain import get_toolchain, needs_restore
+    from .ResourceAccounting import ResourceBudget, ResourceUsage
+    from .QualityGates import save_latest_result
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from ValidationCache import ValidationResultCache, validation_cache_dir
+    from ProcessRunner import StreamingRunner, BuildOutputParser, TestOutputParser
+    from TrxParser import parse_trx_files
+    from CoverageAnalyzer import CoverageAnalyzer, get_changed_lines
+    from ArtifactIndex import ArtifactIndex
+    from FileMatcher import match_required_files
+    from TaskCatalog import get_task_catalog
+    from TestImpact import (TestImpactAnalyzer, TestImpactMap, TestSelection, class_filter,
+                            class_exclusion_filter, learn_test_impact)
+    from TestSharding import TestDurationHistory, plan_shards
+    from ValidationPipeline import Stage, StageGraph
+    from DotnetToolchain import get_toolchain, needs_restore
+    from ResourceAccounting import ResourceBudget, ResourceUsage
+    from QualityGates import save_latest_result
 
 
 class ArtifactValidator:
     """成果物検証クラス"""
     
-    def __init__(self, project_root: str = "."):
+    def __init__(self, project_root: str = ".", use_cache: bool = True,
+                 subprocess_env: Optional[Dict[str, str]] = None,
+                 progress_callback: Optional[Callable[[Dict], None]] = None,
+                 abort_on_first_build_error: bool = False,
+                 max_test_failures: Optional[int] = None,
+                 max_log_lines: int = 2000,
+                 use_test_impact: bool = True,
+                 test_shards: Optional[int] = None,
+                 dotnet_command: Optional[str] = None,
+                 resource_budgets: Optional[Dict[str, ResourceBudget]] = None):
         self.project_root = Path(project_root).resolve()
+        # dotnet 子プロセスの環境変数（None なら現在の環境を継承）
+        self.subprocess_env = subprocess_env
+        # ビルド・テスト・カバレッジで共有するビルド構成
+        self.build_configuration = "Release"
+        # 常駐ビルドサーバー・共有パッケージキャッシュ（プロセス内で共有、GMA_DOTNET で偽dotnetに差替可）
+        self.toolchain = get_toolchain(self.project_root, dotnet_command)
+        # 出力のストリーミング処理（早期中断・保持ログ行数の上限・進捗通知）
+        self.runner = StreamingRunner(max_log_lines=max_log_lines, progress_callback=progress_callback)
+        self.abort_on_first_build_error = abort_on_first_build_error
+        self.max_test_failures = max_test_failures
+        # サブプロセスごとの資源予算（"restore" / "build" / "test"、1回の実行あたり）
+        self.resource_budgets = (
+            resource_budgets if resource_budgets is not None
+            else self._load_resource_budgets(self.project_root / ".claude" / "validation_budgets.json")
+        )
+        # 差分カバレッジの比較対象ブランチ
+        self.base_branch = "main"
+        self.coverage_analyzer = CoverageAnalyzer()
+        # worktreeごとの成果物インデックス（再検証時は差分更新）
+        self._artifact_indexes: Dict[str, ArtifactIndex] = {}
         self.docs_path = self.project_root / "docs" / "pm" / "tasks"
+        self.task_catalog = get_task_catalog(self.docs_path)
+        self.result_cache = (
+            ValidationResultCache(validation_cache_dir(self.project_root))
+            if use_cache else None
+        )
+        # 変更の影響を受けるテストのみ実行（定期的・統合前は全件実行）
+        self.test_impact = (
+            TestImpactAnalyzer(
+                TestImpactMap(validation_cache_dir(self.project_root) / "test_impact.json"),
+                base_branch=self.base_branch
+            )
+            if use_test_impact else None
+        )
+        # テストクラスを所要時間で均等化したシャードに分けて並列実行（既定は分割しない）
+        self.test_shards = test_shards if test_shards is not None else 1
+        self.duration_history = TestDurationHistory(validation_cache_dir(self.project_root) / "test_durations.json")
+    
+    def validate_task_completion(self, task_id: str, full_test_run: bool = False) -> Tuple[bool, str, Dict]:
+        """
+        タスク完了時の包括的検証（結果は品質ゲート評価用に最新結果として保存）
+        
+        Returns:
+            (is_valid, error_message, validation_details)
+        """
+        is_valid, message, details = self._validate_task_completion(task_id, full_test_run)
+        self.save_latest_result(task_id, details)
+        return is_valid, message, details
+    
+    def save_latest_result(self, task_id: str, details: Dict) -> None:
+        """タスクの最新検証結果を保存（QualityGateEngine の入力）"""
+        save_latest_result(self.project_root, task_id, details)
     
-    def validate_task_completion(self, task_id: str) -> Tuple[bool, str, Dict]:
+    def _validate_task_completion(self, task_id: str, full_test_run: bool = False) -> Tuple[bool, str, Dict]:
         """
         タスク完了時の包括的検証
         
+        検証はステージDAG（_build_validation_graph）として実行し、仕様読み込み・
+        必須ファイル確認・静的チェックはビルドと並行に行う。結果の判定順序は
+        仕様 → worktree → 必須ファイル → ビルド → テスト → カバレッジ。
+        
+        Args:
+            full_test_run: 影響分析を行わず全テストを実行（統合前など）
+        
         Returns:
             (is_valid, error_message, validation_details)
         """
@@ -32,61 +134,92 @@ class ArtifactValidator:
             "task_id": task_id,
             "worktree_exists": False,
             "required_files_exist": False,
+            "required_files_matches": {},
             "build_success": False,
+            "build_warnings": None,
             "test_results": {},
+            "coverage": {},
+            "test_selection": {},
+            "static_checks": {},
+            "toolchain": {},
+            "resource_usage": {},
+            "stages": {},
+            "stage_timings": {},
+            "cache_hit": False,
             "validation_timestamp": "",
             "errors": []
         }
         
         try:
+            graph = self._build_validation_graph(task_id, full_test_run)
+            results = graph.run()
+            details["stages"] = {name: result.summary() for name, result in results.items()}
+            details["stage_timings"] = {name: round(result.duration, 3) for name, result in results.items()
+                                        if result.status != "skipped"}
+            details["cache_hit"] = all(results[name].cached for name in ("build", "test", "coverage"))
+            if results["static_checks"].ok:
+                details["static_checks"] = results["static_checks"].value
+            if results["test_selection"].ok:
+                details["test_selection"] = results["test_selection"].value
+            
             # 1. タスク仕様読み込み
-            task_spec = self._load_task_specification(task_id)
-            if not task_spec:
+            spec = results["spec"]
+            if not spec.ok:
                 details["errors"].append(f"Task specification not found: {task_id}")
-                return False, f"Task specification not found for {task_id}", details
+                return False, spec.message, details
             
             # 2. Worktree存在確認
-            worktree_path = self.project_root / "worktrees" / task_id
-            if not worktree_path.exists():
-                details["errors"].append(f"Worktree does not exist: {worktree_path}")
-                return False, f"Worktree does not exist: {worktree_path}", details
+            worktree = results["worktree"]
+            if not worktree.ok:
+                details["errors"].append(worktree.message)
+                return False, worktree.message, details
             
             details["worktree_exists"] = True
             
-            # 3. 必須ファイル存在確認
-            required_files = task_spec.get("required_files", [])
-            missing_files = []
-            
-            for required_file in required_files:
-                file_path = worktree_path / required_file
-                if not file_path.exists():
-                    missing_files.append(required_file)
-            
-            if missing_files:
-                details["errors"].append(f"Missing required files: {missing_files}")
-                return False, f"Missing required files: {', '.join(missing_files)}", details
+            # 3. 必須ファイル存在確認（globパターンは1回の走査でまとめて照合）
+            required_files = results["required_files"]
+            details["required_files_matches"] = required_files.value or {}
+            if not required_files.ok:
+                details["errors"].append(required_files.message)
+                return False, required_files.message, details
             
             details["required_files_exist"] = True
             
             # 4. ビルド確認
-            build_success, build_message = self._validate_build(worktree_path)
+            build = results["build"]
+            build_success, build_message = build.value[:2] if build.value else (False, build.message)
             details["build_success"] = build_success
+            details["toolchain"] = dict(build.value[2] if build.value and len(build.value) > 2 else {},
+                                        timing_summary=self.toolchain.timing_summary())
+            details["resource_usage"] = dict(details["toolchain"].pop("resource_usage", {}))
+            details["build_warnings"] = details["toolchain"].pop("build_warnings", None)
+            self._total_resource_usage(details["resource_usage"])
             
             if not build_success:
                 details["errors"].append(f"Build failed: {build_message}")
                 return False, f"Build failed: {build_message}", details
             
             # 5. テスト実行・確認
-            test_results = self._validate_tests(worktree_path)
+            test = results["test"]
+            test_results = test.value or {"failed_count": 1, "details": [test.message]}
             details["test_results"] = test_results
+            if test_results.get("resource_usage"):
+                details["resource_usage"]["test"] = test_results["resource_usage"]
+            self._total_resource_usage(details["resource_usage"])
             
             if test_results["failed_count"] > 0:
                 details["errors"].append(f"Tests failed: {test_results['failed_count']} failures")
                 return False, f"Tests failed: {test_results['failed_count']} failures", details
             
             # 6. カバレッジ確認（オプション）
-            coverage_check = self._validate_coverage(worktree_path, task_spec.get("min_coverage", 80))
-            if coverage_check["coverage_percent"] < task_spec.get("min_coverage", 80):
+            min_coverage = spec.value.get("min_coverage", 80)
+            coverage_check = dict(results["coverage"].value or {"coverage_percent": 0.0,
+                                                                 "details": results["coverage"].message})
+            coverage_check["meets_threshold"] = coverage_check["coverage_percent"] >= min_coverage
+            # 一部テストのみの実行では全体カバレッジは参考値（差分カバレッジは有効）
+            coverage_check["partial"] = details["test_selection"].get("mode", "full") != "full"
+            details["coverage"] = coverage_check
+            if coverage_check["coverage_percent"] < min_coverage and not coverage_check["partial"]:
                 details["errors"].append(f"Coverage below threshold: {coverage_check['coverage_percent']}%")
                 # カバレッジ不足は警告のみ（必須ではない）
             
@@ -98,62 +231,387 @@ class ArtifactValidator:
             details["errors"].append(error_msg)
             return False, error_msg, details
     
-    def _load_task_specification(self, task_id: str) -> Optional[Dict]:
-        """タスク仕様ファイルを読み込み"""
-        task_file = self.docs_path / f"{task_id}.md"
+    def _build_validation_graph(self, task_id: str, full_test_run: bool = False) -> StageGraph:
+        """
+        検証ステージDAGを構築
         
-        if not task_file.exists():
-            return None
+        ビルド以降のステージは入力（worktreeハッシュ・ビルド構成・テスト選択・
+        カバレッジ閾値）から導出したキーで個別にキャッシュされる。
+        """
+        worktree_path = self.project_root / "worktrees" / task_id
+        
+        def spec_stage(inputs):
+            task_spec = self._load_task_specification(task_id)
+            if not task_spec:
+                return False, None, f"Task specification not found for {task_id}"
+            return True, task_spec, ""
+        
+        def worktree_stage(inputs):
+            if not worktree_path.exists():
+                return False, None, f"Worktree does not exist: {worktree_path}"
+            tree_key = None
+            if self.result_cache:
+                try:
+                    tree_key = self.result_cache.make_key(task_id, worktree_path,
+                                                          dotnet_command=self.toolchain.dotnet_command)
+                except OSError as e:
+                    print(f"Warning: worktree hashing failed: {e}")
+            return True, {"path": str(worktree_path), "tree_key": tree_key}, ""
+        
+        def required_files_stage(inputs):
+            file_matches = match_required_files(worktree_path, inputs["spec"].value.get("required_files", []))
+            missing_files = [pattern for pattern, matched in file_matches.items() if not matched]
+            if missing_files:
+                return False, file_matches, f"Missing required files: {', '.join(missing_files)}"
+            return True, file_matches, ""
+        
+        def static_checks_stage(inputs):
+            return True, self._run_static_checks(worktree_path), ""
+        
+        def test_selection_stage(inputs):
+            return True, self._select_tests(task_id, worktree_path, full_test_run).to_dict(), ""
+        
+        def build_stage(inputs):
+            build_success, build_message, toolchain_info = self._validate_build(worktree_path)
+            return build_success, [build_success, build_message, toolchain_info], build_message
+        
+        def test_stage(inputs):
+            selection = TestSelection(**inputs["test_selection"].value)
+            results_dir = worktree_path / "TestResults" / datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            test_results = self._run_tests(worktree_path, results_dir, selection.filter, selection.test_classes)
+            if self.test_impact:
+                self.test_impact.record_run(task_id, selection)
+            failed = test_results["failed_count"]
+            return failed == 0, test_results, f"Tests failed: {failed} failures" if failed else ""
+        
+        def coverage_stage(inputs):
+            results_dir = inputs["test"].value.get("results_directory")
+            min_coverage = inputs["spec"].value.get("min_coverage", 80)
+            return True, self._validate_coverage(worktree_path, min_coverage,
+                                                 Path(results_dir) if results_dir else None), ""
+        
+        def build_key(results):
+            tree_key = results["worktree"].value["tree_key"]
+            return f"{tree_key}|{self.build_configuration}" if tree_key else None
+        
+        def build_outputs_present(inputs, value):
+            # 後続のテストは --no-build のため、出力のないビルド結果は再利用しない
+            return not value[0] or self._build_outputs_present(worktree_path)
         
+        def build_cacheable(ok, value, message):
+            # タイムアウト等の環境要因による失敗はキャッシュしない
+            return ok or not (message in ("Build timeout (5 minutes)", "dotnet command not found")
+                              or message.startswith(("Restore timeout", "Restore failed",
+                                                     "Restore aborted", "Build aborted")))
+        
+        stages = [
+            Stage("spec", spec_stage),
+            Stage("worktree", worktree_stage),
+            Stage("required_files", required_files_stage, ["spec", "worktree"]),
+            Stage("static_checks", static_checks_stage, ["worktree"]),
+            Stage("test_selection", test_selection_stage, ["worktree"]),
+            Stage("build", build_stage, ["worktree"], cache_key=build_key, cacheable=build_cacheable,
+                  cache_valid=build_outputs_present),
+            Stage("test", test_stage, ["build", "test_selection"],
+                  cache_key=lambda r: f"{r['build'].key}|{r['test_selection'].value['filter']}"
+                                      if r["build"].key else None,
+                  # テスト実行エラー（タイムアウト等）はキャッシュしない
+                  cacheable=lambda ok, value, message: not value.get("details")),
+            Stage("coverage", coverage_stage, ["test", "spec"],
+                  cache_key=lambda r: f"{r['test'].key}|{r['spec'].value.get('min_coverage', 80)}|{self.base_branch}"
+                                      if r["test"].key else None),
+        ]
+        return StageGraph(stages, cache=self.result_cache)
+    
+    def _build_outputs_present(self, worktree_path: Path) -> bool:
+        """全プロジェクトのビルド出力（bin/<構成>）が worktree に残っているか"""
+        projects = [
+            path for paths in match_required_files(worktree_path, ["**/*.csproj"]).values() for path in paths
+        ]
+        for project in projects:
+            project_path = Path(project) if os.path.isabs(project) else worktree_path / project
+            output_dir = project_path.parent / "bin" / self.build_configuration
+            if not output_dir.is_dir() or not any(output_dir.rglob("*.dll")):
+                return False
+        return bool(projects)
+    
+    @staticmethod
+    def _load_resource_budgets(config_file: Path) -> Dict[str, ResourceBudget]:
+        """予算設定ファイル（{"build": {"cpu_seconds": 600, "memory_mb": 4096}, ...}）を読み込み"""
         try:
-            with open(task_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Markdown frontmatterからJSONを抽出（簡易実装）
-            if '```json' in content:
-                json_start = content.find('```json') + 7
-                json_end = content.find('```', json_start)
-                json_content = content[json_start:json_end].strip()
-                return json.loads(json_content)
-            
-            # デフォルト仕様
-            return {
-                "required_files": [f"src/**/{task_id.replace('T-', '').replace('-', '')}*.cs"],
-                "min_coverage": 80,
-                "build_command": "dotnet build",
-                "test_command": "dotnet test"
-            }
-            
-        except Exception as e:
-            print(f"Error loading task spec {task_id}: {e}")
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        budgets = {}
+        for stage, values in config.items():
+            budget = ResourceBudget.from_dict(values) if isinstance(values, dict) else None
+            if budget:
+                budgets[stage] = budget
+        return budgets
+    
+    @staticmethod
+    def _total_resource_usage(resource_usage: Dict) -> None:
+        """restore → build → test の逐次合計を total として追加"""
+        total = None
+        for stage in ("restore", "build", "test"):
+            if stage in resource_usage:
+                usage = ResourceUsage.from_dict(resource_usage[stage])
+                total = usage if total is None else total.combine(usage)
+        if total is not None:
+            resource_usage["total"] = total.to_dict()
+    
+    def _run_static_checks(self, worktree_path: Path) -> Dict:
+        """ビルドと並行して行う軽量な静的チェック（変更ファイルのマージ競合マーカー）"""
+        warnings = []
+        changed = get_changed_lines(worktree_path, self.base_branch) or {}
+        for rel_path in sorted(changed):
+            if os.path.splitext(rel_path)[1].lower() not in (".cs", ".csproj", ".xaml", ".json"):
+                continue
+            try:
+                with open(worktree_path / rel_path, 'r', encoding='utf-8', errors='replace') as f:
+                    for line_number, line in enumerate(f, 1):
+                        if line.startswith(("<<<<<<< ", ">>>>>>> ")) or line.rstrip("\r\n") == "=======":
+                            warnings.append(f"{rel_path}:{line_number}: merge conflict marker")
+                            break
+            except OSError:
+                continue
+        return {"checked_files": len(changed), "warnings": warnings}
+    
+    def _artifact_index(self, worktree_path: Path) -> ArtifactIndex:
+        """worktreeの成果物インデックスを取得して最新化"""
+        key = str(worktree_path)
+        index = self._artifact_indexes.get(key)
+        if index is None:
+            index = self._artifact_indexes[key] = ArtifactIndex(worktree_path)
+        index.refresh()
+        return index
+    
+    def _select_tests(self, task_id: str, worktree_path: Path, full_test_run: bool) -> TestSelection:
+        """今回実行するテストを決定（影響分析が無効なら全件）"""
+        if not self.test_impact:
+            return TestSelection("full", reasons=["test impact analysis disabled"])
+        return self.test_impact.select(task_id, worktree_path, force_full=full_test_run)
+    
+    def _load_task_specification(self, task_id: str) -> Optional[Dict]:
+        """タスク仕様を共有カタログから取得（ファイル変更時のみ再解析）"""
+        entry = self.task_catalog.get_entry(task_id)
+        if entry is None:
+            return None
+        
+        if entry.error:
+            print(f"Error loading task spec {task_id}: {entry.error}")
             return None
+        
+        return self.task_catalog.get(task_id)
     
-    def _validate_build(self, worktree_path: Path) -> Tuple[bool, str]:
-        """ビルド検証"""
+    
+    def _restore_packages(self, worktree_path: Path, env: Dict[str, str], info: Dict) -> Tuple[bool, str]:
+        """共有パッケージキャッシュへの復元（入力が未変更なら省略、実行時はプロセス間ロック）"""
+        if not needs_restore(worktree_path):
+            info["restore"] = "skipped"
+            return True, ""
+        
+        wait_start = time.perf_counter()
+        with self.toolchain.restore_lock:
+            info["restore_wait"] = round(time.perf_counter() - wait_start, 3)
+            result = self.runner.run(
+                self.toolchain.command("restore"),
+                cwd=worktree_path,
+                env=env,
+                timeout=300,
+                budget=self.resource_budgets.get("restore")
+            )
+        info["restore"] = "ran"
+        info["restore_duration"] = round(result.duration, 3)
+        info.setdefault("resource_usage", {})["restore"] = result.usage.to_dict()
+        if result.timed_out:
+            return False, "Restore timeout (5 minutes)"
+        if result.usage.budget_exceeded:
+            return False, f"Restore aborted: {result.usage.budget_exceeded}"
+        if result.returncode != 0:
+            return False, f"Restore failed: {result.output}"
+        return True, ""
+    
+    def _validate_build(self, worktree_path: Path) -> Tuple[bool, str, Dict]:
+        """
+        ビルド検証（出力を逐次解析し、設定によっては最初のエラーで中断）
+        
+        Returns:
+            (build_success, build_message, toolchain_info)
+            toolchain_info: 復元の有無・待ち時間、ビルドサーバーの cold/warm 状態と所要時間
+        """
+        parser = BuildOutputParser(abort_on_first_error=self.abort_on_first_build_error)
+        env = self.toolchain.environment(self.subprocess_env)
+        info: Dict = {"package_cache": str(self.toolchain.package_cache)}
         try:
-            # .NET プロジェクトのビルド
-            result = subprocess.run(
-                ["dotnet", "build", "--configuration", "Release"],
+            restored, restore_message = self._restore_packages(worktree_path, env, info)
+            if not restored:
+                return False, restore_message, info
+            
+            # .NET プロジェクトのビルド（常駐ノード・コンパイラサーバーを再利用）
+            info["server_state"] = self.toolchain.begin_build(env)
+            result = self.runner.run(
+                self.toolchain.command("build", "--configuration", self.build_configuration, "--no-restore",
+                                       *self.toolchain.build_arguments(env)),
                 cwd=worktree_path,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5分タイムアウト
+                env=env,
+                timeout=300,  # 5分タイムアウト
+                parser=parser,
+                budget=self.resource_budgets.get("build")
             )
+            info["build_duration"] = round(result.duration, 3)
+            info["build_warnings"] = parser.warning_count
+            info.setdefault("resource_usage", {})["build"] = result.usage.to_dict()
+            self.toolchain.record_build(info["server_state"], result.duration)
             
-            if result.returncode == 0:
-                return True, "Build succeeded"
-            else:
-                return False, result.stderr or result.stdout
+            if result.timed_out:
+                return False, "Build timeout (5 minutes)", info
+            if result.usage.budget_exceeded:
+                return False, f"Build aborted: {result.usage.budget_exceeded}", info
+            if result.returncode == 0 and not result.aborted:
+                return True, "Build succeeded", info
+            if parser.errors:
+                return False, "\n".join(parser.errors), info
+            return False, result.output, info
                 
-        except subprocess.TimeoutExpired:
-            return False, "Build timeout (5 minutes)"
         except FileNotFoundError:
-            return False, "dotnet command not found"
+            return False, "dotnet command not found", info
         except Exception as e:
-            return False, f"Build error: {e}"
+            return False, f"Build error: {e}", info
     
-    def _validate_tests(self, worktree_path: Path) -> Dict:
-        """テスト実行・結果検証"""
+    def _run_tests(self, worktree_path: Path, results_dir: Path, test_filter: str = "",
+                   test_classes: Optional[List[str]] = None) -> Dict:
+        """
+        テストを実行し、所要時間の履歴を更新（複数シャード指定時は並列実行）
+        
+        test_classes はフィルタ済み（影響分析）の場合のみ渡される。全件実行時は
+        ファイル名から検出したクラスで分割し、最後のシャードは他シャードに
+        含まれない全テストを実行する（検出漏れのクラスも必ず実行される）。
+        テストのビルド出力をシャードごとに複製できない場合は分割せずに実行する。
+        """
+        test_results = None
+        if self.test_shards > 1:
+            discovered = TestImpactAnalyzer.discover_test_classes(worktree_path)
+            qualified = TestImpactAnalyzer.qualify_test_classes(worktree_path, discovered)
+            shards = plan_shards(test_classes or list(discovered), self.duration_history, self.test_shards)
+            if len(shards) > 1:
+                filters = [class_filter(shard, qualified) for shard in shards]
+                if not test_filter:
+                    # 最後のシャード: 他シャードのクラスを除外した残り全て
+                    others = [name for shard in shards[:-1] for name in shard]
+                    filters[-1] = class_exclusion_filter(others, qualified)
+                test_results = self._validate_tests_sharded(worktree_path, results_dir, shards, filters)
+        
+        if test_results is None:
+            test_results = self._validate_tests(worktree_path, results_dir, test_filter)
+        
+        if test_results.get("test_timings"):
+            self.duration_history.record(test_results["test_timings"])
+        return test_results
+    
+    def _test_project_output(self, worktree_path: Path) -> Optional[Tuple[Path, Path]]:
+        """テストプロジェクトとそのビルド出力ディレクトリ（1プロジェクト・1TFMの場合のみ）"""
+        projects = [
+            path for paths in match_required_files(worktree_path, ["**/*Tests.csproj", "**/*Test.csproj"]).values()
+            for path in paths
+        ]
+        if len(set(projects)) != 1:
+            return None
+        project = Path(projects[0]) if os.path.isabs(projects[0]) else worktree_path / projects[0]
+        output_root = project.parent / "bin" / self.build_configuration
+        if not output_root.is_dir():
+            return None
+        target_dirs = [entry for entry in output_root.iterdir() if entry.is_dir()]
+        return (project, target_dirs[0]) if len(target_dirs) == 1 else None
+    
+    def _validate_tests_sharded(self, worktree_path: Path, results_dir: Path,
+                                shards: List[List[str]], filters: List[str]) -> Optional[Dict]:
+        """
+        シャードを別プロセス・別結果ディレクトリで並列実行し、結果を統合
+        
+        coverlet はカバレッジ収集時に出力先のアセンブリをその場で書き換えるため、
+        各シャードはテストのビルド出力のコピー（--output）に対して実行する。
+        複製できない構成（複数のテストプロジェクト・TFM）なら None を返す。
+        """
+        project_output = self._test_project_output(worktree_path)
+        if project_output is None:
+            return None
+        project, output_dir = project_output
+        targets = []
+        try:
+            for index in range(len(shards)):
+                shard_output = results_dir / f"shard-{index}-bin"
+                shutil.copytree(output_dir, shard_output, dirs_exist_ok=True)
+                targets.append((project, shard_output))
+        except OSError as e:
+            print(f"Warning: test output copy failed, running unsharded: {e}")
+            return None
+        
+        self._artifact_index(worktree_path)  # スレッド間で共有するインデックスを先に作成
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+                shard_results = list(executor.map(
+                    lambda item: self._validate_tests(worktree_path, results_dir / f"shard-{item[0]}",
+                                                      item[1], targets[item[0]]),
+                    enumerate(filters)
+                ))
+        finally:
+            for _, shard_output in targets:
+                shutil.rmtree(shard_output, ignore_errors=True)
+        
+        test_results = {
+            "total_count": 0,
+            "passed_count": 0,
+            "failed_count": 0,
+            "skipped_count": 0,
+            "execution_time": f"{time.perf_counter() - start:.1f}s",
+            "details": [],
+            "failed_tests": [],
+            "results_directory": str(results_dir),
+            "success": all(r.get("success", False) for r in shard_results),
+            "shards": [],
+        }
+        # シャードは並行実行のため実時間は最大値、CPU・メモリは合算
+        usage = None
+        for result in shard_results:
+            if result.get("resource_usage"):
+                shard_usage = ResourceUsage.from_dict(result["resource_usage"])
+                usage = shard_usage if usage is None else usage.combine(shard_usage, concurrent=True)
+        if usage is not None:
+            test_results["resource_usage"] = usage.to_dict()
+        for index, (classes, shard_filter, result) in enumerate(zip(shards, filters, shard_results)):
+            for key in ("total_count", "passed_count", "failed_count", "skipped_count"):
+                test_results[key] += result[key]
+            test_results["failed_tests"].extend(result.get("failed_tests", []))
+            test_results["details"].extend(f"[shard {index}] {d}" for d in result["details"])
+            test_results["shards"].append({
+                "test_classes": classes,
+                "filter": shard_filter,
+                "execution_time": result["execution_time"],
+                "total_count": result["total_count"],
+                "failed_count": result["failed_count"],
+                "resource_usage": result.get("resource_usage", {}),
+            })
+        
+        # 全シャードのTRXをまとめて再集計（最遅テスト・失敗詳細をシャード横断で算出）
+        trx_files = [Path(a.path) for a in self._artifact_index(worktree_path).find("trx", results_dir)]
+        trx_summary, _ = parse_trx_files(trx_files)
+        if trx_summary:
+            test_results.update(trx_summary.to_test_results())
+            # タイムアウト・中断したシャードの失敗扱いは維持
+            test_results["failed_count"] = max(
+                test_results["failed_count"], sum(r["failed_count"] for r in shard_results))
+        return test_results
+    
+    def _validate_tests(self, worktree_path: Path, results_dir: Optional[Path] = None,
+                        test_filter: str = "", target: Optional[Tuple[Path, Path]] = None) -> Dict:
+        """
+        テスト実行・結果検証（_validate_build のビルド出力を再利用）
+        
+        target: (テストプロジェクト, ビルド出力のコピー) を指定するとそのコピーに対して実行する
+        """
         test_results = {
             "total_count": 0,
             "passed_count": 0,
@@ -163,80 +621,117 @@ class ArtifactValidator:
             "details": []
         }
         
+        command = self.toolchain.command("test")
+        if target:
+            command += [str(target[0]), "--output", str(target[1])]
+        command += [
+            "--configuration", self.build_configuration,
+            "--no-build",
+            "--logger", "trx",
+            "--collect:XPlat Code Coverage"
+        ]
+        if results_dir:
+            command += ["--results-directory", str(results_dir)]
+            test_results["results_directory"] = str(results_dir)
+        if test_filter:
+            command += ["--filter", test_filter]
+        
+        parser = TestOutputParser(max_failures=self.max_test_failures)
         try:
-            # .NET テスト実行
-            result = subprocess.run(
-                ["dotnet", "test", "--logger", "trx", "--collect:XPlat Code Coverage"],
+            # .NET テスト実行（結果は出力と同時に集計）
+            result = self.runner.run(
+                command,
                 cwd=worktree_path,
-                capture_output=True,
-                text=True,
-                timeout=600  # 10分タイムアウト
+                env=self.toolchain.environment(self.subprocess_env),
+                timeout=600,  # 10分タイムアウト
+                parser=parser,
+                budget=self.resource_budgets.get("test")
             )
             
-            output = result.stdout + result.stderr
+            test_results["resource_usage"] = result.usage.to_dict()
+            test_results.update(parser.counts)
+            test_results["failed_tests"] = parser.failed_tests
+            test_results["execution_time"] = f"{result.duration:.1f}s"
             
-            # 結果パース（簡易実装）
-            if "Total tests:" in output:
-                for line in output.split('\n'):
-                    if "Total tests:" in line:
-                        # 例: "Total tests: 10. Passed: 8. Failed: 2. Skipped: 0."
-                        parts = line.split('.')
-                        for part in parts:
-                            if "Total tests:" in part:
-                                test_results["total_count"] = int(part.split(':')[1].strip())
-                            elif "Passed:" in part:
-                                test_results["passed_count"] = int(part.split(':')[1].strip())
-                            elif "Failed:" in part:
-                                test_results["failed_count"] = int(part.split(':')[1].strip())
-                            elif "Skipped:" in part:
-                                test_results["skipped_count"] = int(part.split(':')[1].strip())
+            # TRXがあれば標準出力の集計より優先（ローカライズ出力に依存しない）
+            if results_dir and results_dir.exists() and not result.aborted:
+                trx_files = [Path(a.path) for a in self._artifact_index(worktree_path).find("trx", results_dir)]
+                trx_summary, trx_errors = parse_trx_files(trx_files)
+                test_results["details"].extend(trx_errors)
+                if trx_summary:
+                    test_results.update(trx_summary.to_test_results())
             
-            test_results["success"] = result.returncode == 0
-            return test_results
+            if result.timed_out:
+                test_results["details"].append("Test execution timeout (10 minutes)")
+                test_results["failed_count"] = max(1, test_results["failed_count"])
+            elif result.usage.budget_exceeded:
+                test_results["details"].append(f"Test execution aborted: {result.usage.budget_exceeded}")
+                test_results["failed_count"] = max(1, test_results["failed_count"])
+            elif result.aborted:
+                test_results["details"].append(result.abort_reason)
+                test_results["failed_count"] = max(len(parser.failed_tests), test_results["failed_count"])
             
-        except subprocess.TimeoutExpired:
-            test_results["details"].append("Test execution timeout (10 minutes)")
-            test_results["failed_count"] = 1
+            test_results["success"] = result.returncode == 0 and not (result.timed_out or result.aborted)
             return test_results
+            
         except Exception as e:
             test_results["details"].append(f"Test execution error: {e}")
             test_results["failed_count"] = 1
             return test_results
     
-    def _validate_coverage(self, worktree_path: Path, min_coverage: float) -> Dict:
-        """コードカバレッジ検証"""
+    def _validate_coverage(self, worktree_path: Path, min_coverage: float,
+                           results_dir: Optional[Path] = None) -> Dict:
+        """
+        コードカバレッジ検証（results_dir 指定時は今回のテスト実行の出力を優先）
+        
+        テストプロジェクトごとのレポートを統合して全体カバレッジを算出し、
+        タスクブランチで変更された行に限定した差分カバレッジも求める。
+        """
         coverage_info = {
             "coverage_percent": 0.0,
             "covered_lines": 0,
             "total_lines": 0,
             "report_path": "",
-            "meets_threshold": False
+            "report_paths": [],
+            "meets_threshold": False,
+            "diff_coverage_percent": None,
+            "diff_covered_lines": 0,
+            "diff_total_lines": 0,
+            "uncovered_changed_lines": {}
         }
         
         try:
-            # coverletで生成されたカバレッジファイルを探す
-            coverage_files = list(worktree_path.glob("**/coverage.cobertura.xml"))
+            # coverletで生成されたカバレッジファイルを探す（インデックス経由）
+            artifact_index = self._artifact_index(worktree_path)
+            coverage_files = []
+            if results_dir and results_dir.exists():
+                # 今回の実行分（テストプロジェクトごとに1ファイル）はすべて統合
+                coverage_files = [Path(a.path) for a in artifact_index.find("coverage", results_dir)]
             if not coverage_files:
-                coverage_files = list(worktree_path.glob("**/TestResults/**/coverage.cobertura.xml"))
+                # 過去の実行分は最新のファイルのみ使用
+                newest = artifact_index.newest("coverage")
+                if newest:
+                    coverage_files = [Path(newest.path)]
             
             if not coverage_files:
-                coverage_info["coverage_percent"] = 0.0
                 return coverage_info
             
-            # 最新のカバレッジファイルを使用
-            coverage_file = max(coverage_files, key=lambda f: f.stat().st_mtime)
-            coverage_info["report_path"] = str(coverage_file)
+            index, errors = self.coverage_analyzer.load_reports(coverage_files, worktree_path)
+            for error in errors:
+                print(f"Coverage validation error: {error}")
             
-            # XML解析してカバレッジ取得（簡易実装）
-            with open(coverage_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-                # line-rate属性から取得
-                import re
-                match = re.search(r'line-rate="([\d.]+)"', content)
-                if match:
-                    coverage_info["coverage_percent"] = float(match.group(1)) * 100
-                    coverage_info["meets_threshold"] = coverage_info["coverage_percent"] >= min_coverage
+            covered, total = index.totals()
+            coverage_info["covered_lines"] = covered
+            coverage_info["total_lines"] = total
+            coverage_info["coverage_percent"] = round(covered / total * 100, 2) if total else 0.0
+            coverage_info["meets_threshold"] = coverage_info["coverage_percent"] >= min_coverage
+            coverage_info["report_paths"] = index.report_paths
+            coverage_info["report_path"] = index.report_paths[0] if index.report_paths else ""
+            
+            # 差分カバレッジ（main からの変更行のみ）
+            changed_lines = get_changed_lines(worktree_path, self.base_branch)
+            if changed_lines is not None:
+                coverage_info.update(index.diff_coverage(changed_lines))
             
             return coverage_info
             
@@ -244,6 +739,31 @@ class ArtifactValidator:
             print(f"Coverage validation error: {e}")
             return coverage_info
     
+    def learn_test_impact(self, task_id: str) -> int:
+        """
+        テストクラスごとにカバレッジ付きで実行し、影響分析の対応表を学習
+        
+        Returns:
+            学習したテストクラス数
+        """
+        if not self.test_impact:
+            return 0
+        worktree_path = self.project_root / "worktrees" / task_id
+        build_success, _, _ = self._validate_build(worktree_path)
+        if not build_success:
+            return 0
+        
+        def run_with_coverage(test_filter: str):
+            results_dir = worktree_path / "TestResults" / datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            self._validate_tests(worktree_path, results_dir, test_filter)
+            reports = [Path(a.path) for a in self._artifact_index(worktree_path).find("coverage", results_dir)]
+            if not reports:
+                return None
+            index, _ = self.coverage_analyzer.load_reports(reports, worktree_path)
+            return index
+        
+        return learn_test_impact(worktree_path, self.test_impact.impact_map, run_with_coverage)
+    
     def validate_agent_evidence(self, evidence: Dict) -> Tuple[bool, List[str]]:
         """エージェント報告証跡の検証"""
         errors = []
@@ -279,33 +799,157 @@ class ArtifactValidator:
         return len(errors) == 0, errors
 
 
-def validate_task_artifacts(task_id: str) -> Tuple[bool, str]:
+# バッチ検証で1ワーカーあたりに見込むメモリ量（dotnet build + test）
+BATCH_WORKER_MEMORY_MB = 2048
+
+
+def _available_memory_mb() -> Optional[int]:
+    """利用可能メモリ(MB)を取得（取得できなければNone）"""
+    try:
+        with open("/proc/meminfo", 'r') as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def default_batch_workers(task_count: int) -> int:
+    """CPUコア数と空きメモリから並列ワーカー数を決定"""
+    workers = os.cpu_count() or 1
+    memory_mb = _available_memory_mb()
+    if memory_mb is not None:
+        workers = min(workers, max(1, memory_mb // BATCH_WORKER_MEMORY_MB))
+    return max(1, min(workers, task_count))
+
+
+def _isolated_env(temp_dir: str) -> Dict[str, str]:
+    """
+    ワーカー専用の一時ディレクトリ・NuGet設定を持つ環境変数を生成
+
+    MSBuild ノード・Roslyn サーバーは同時に複数のビルドを受け付けるため、
+    ワーカー間でも再利用する（ウォームビルドを無効にしない）。
+    """
+    env = dict(os.environ)
+    env.update({
+        "TMP": temp_dir,
+        "TEMP": temp_dir,
+        "TMPDIR": temp_dir,
+        # パッケージ本体は共有、HTTPキャッシュ・作業領域はワーカーごとに分離
+        "NUGET_HTTP_CACHE_PATH": os.path.join(temp_dir, "nuget-http-cache"),
+        "NUGET_SCRATCH": os.path.join(temp_dir, "nuget-scratch"),
+        "NUGET_PLUGINS_CACHE_PATH": os.path.join(temp_dir, "nuget-plugins-cache"),
+        "DOTNET_CLI_TELEMETRY_OPTOUT": "1",
+    })
+    return env
+
+
+def _validate_task_isolated(project_root: str, task_id: str) -> Tuple[str, bool, str, Dict]:
+    """プロセスプール内で1タスクを検証（ワーカー側エントリポイント）"""
+    temp_dir = tempfile.mkdtemp(prefix=f"gma-validate-{task_id}-")
+    try:
+        # タスク間で並列化済みのため、タスク内のテストシャーディングは行わない
+        validator = ArtifactValidator(project_root, subprocess_env=_isolated_env(temp_dir), test_shards=1)
+        is_valid, message, details = validator.validate_task_completion(task_id)
+        return task_id, is_valid, message, details
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def validate_tasks_batch(task_ids: Iterable[str], project_root: str = ".",
+                         max_workers: Optional[int] = None) -> Iterator[Tuple[str, bool, str, Dict]]:
     """
-    外部呼び出し用のタスク検証関数
+    複数タスクのworktreeを並列検証し、完了順に結果を返す
     
-    Returns:
-        (is_valid, message)
+    Yields:
+        (task_id, is_valid, message, validation_details)
     """
-    validator = ArtifactValidator()
-    is_valid, message, details = validator.validate_task_completion(task_id)
+    task_ids = list(dict.fromkeys(task_ids))
+    if not task_ids:
+        return
+    
+    workers = max_workers or default_batch_workers(len(task_ids))
+    project_root = str(Path(project_root).resolve())
     
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_validate_task_isolated, project_root, task_id): task_id
+                for task_id in task_ids
+            }
+            for future in as_completed(futures):
+                task_id = futures[future]
+                try:
+                    yield future.result()
+                except Exception as e:
+                    error_msg = f"Validation worker error: {e}"
+                    yield task_id, False, error_msg, {"task_id": task_id, "errors": [error_msg]}
+    finally:
+        # ワーカーは atexit を実行せずに終了するため、起動したビルドサーバーはこのプロセスの終了時に停止する
+        get_toolchain(Path(project_root)).adopt_servers(dict(os.environ))
+
+
+def _summarize_validation(task_id: str, is_valid: bool, message: str, details: Dict) -> Tuple[bool, str]:
+    """検証結果を (is_valid, message) 形式に要約"""
     if is_valid:
-        coverage_pct = details.get("test_results", {}).get("coverage_percent", "unknown")
+        coverage_pct = details.get("coverage", {}).get("coverage_percent", "unknown")
         test_count = details.get("test_results", {}).get("total_count", 0)
         return True, f"Task {task_id} validated: {test_count} tests passed, coverage: {coverage_pct}%"
     else:
         return False, message
 
 
+def validate_task_artifacts(task_id: str, full_test_run: bool = False) -> Tuple[bool, str]:
+    """
+    外部呼び出し用のタスク検証関数（統合前は full_test_run=True で全テスト実行）
+    
+    Returns:
+        (is_valid, message)
+    """
+    validator = ArtifactValidator()
+    is_valid, message, details = validator.validate_task_completion(task_id, full_test_run=full_test_run)
+    return _summarize_validation(task_id, is_valid, message, details)
+
+
+def validate_task_artifacts_batch(task_ids: Iterable[str],
+                                  max_workers: Optional[int] = None) -> Iterator[Tuple[str, bool, str]]:
+    """
+    外部呼び出し用の複数タスク並列検証関数（スプリント終了時など）
+    
+    Yields:
+        (task_id, is_valid, message) を完了順に返す
+    """
+    for task_id, is_valid, message, details in validate_tasks_batch(task_ids, max_workers=max_workers):
+        yield (task_id,) + _summarize_validation(task_id, is_valid, message, details)
+
+
 if __name__ == "__main__":
     # テストケース実行
     import sys
     
-    if len(sys.argv) > 1:
-        task_id = sys.argv[1]
-        is_valid, message = validate_task_artifacts(task_id)
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    full_test_run = "--full" in sys.argv
+    
+    if "--learn-impact" in sys.argv and args:
+        for task_id in args:
+            learned = ArtifactValidator().learn_test_impact(task_id)
+            print(f"Task {task_id}: learned test impact for {learned} test classes")
+    elif len(args) > 1:
+        for task_id, is_valid, message in validate_task_artifacts_batch(args):
+            print(f"Task {task_id}: {'✅ VALID' if is_valid else '❌ INVALID'}")
+            print(f"Message: {message}")
+    elif args:
+        task_id = args[0]
+        is_valid, message = validate_task_artifacts(task_id, full_test_run=full_test_run)
         print(f"Task {task_id}: {'✅ VALID' if is_valid else '❌ INVALID'}")
         print(f"Message: {message}")
     else:
-        print("Usage: python ArtifactValidator.py <TaskID>")
-        print("Example: python ArtifactValidator.py T-009")
\ No newline at end of file
+        print("Usage: python ArtifactValidator.py <TaskID> [<TaskID> ...]")
+        print("Example: python ArtifactValidator.py T-009")
+        print("         python ArtifactValidator.py T-009 T-010 T-011  (並列検証)")
+        print("         python ArtifactValidator.py T-009 --full  (影響分析なしで全テスト実行)")
+        print("         python ArtifactValidator.py T-009 --learn-impact  (テスト影響対応表の学習)")
\ No newline at end of file
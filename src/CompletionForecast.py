@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+完了予測モジュール（モンテカルロ法）
+
+完了済みタスクの status_history からサイクルタイム（着手 → 完了）を取り出し、
+残りタスク数分のサイクルタイムを復元抽出して完了までの日数を多数回試行する。
+並行度はリトルの法則（平均WIP = サイクルタイム合計 / 実績期間）で推定する。
+結果は P50 / P85 / P95 の日数として .claude/cache/forecast_cache.json（再生成可能な
+キャッシュ、バージョン管理外）に保存し、progress.json が変わらない限り
+（変わっても履歴が同じなら）再計算しない。
+"""
+
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np  # 任意依存（試行のベクトル化）
+except ImportError:
+    np = None
+
+try:
+    from .ProgressSnapshot import cache_dir, load_progress_sections
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from ProgressSnapshot import cache_dir, load_progress_sections
+
+
+# 予測に必要な最小サイクルタイム数（未満は従来のベロシティ方式）
+MIN_CYCLE_TIMES = 3
+PERCENTILES = (50, 85, 95)
+
+
+@dataclass
+class Forecast:
+    """完了までの日数の分布"""
+    p50_days: float
+    p85_days: float
+    p95_days: float
+    remaining_tasks: int
+    cycle_time_samples: int
+    wip: float
+    history_hash: str
+
+    def dates(self, now: Optional[datetime] = None) -> Dict[str, datetime]:
+        now = now or datetime.now()
+        return {
+            f"p{pct}": now + timedelta(days=getattr(self, f"p{pct}_days"))
+            for pct in PERCENTILES
+        }
+
+    def format(self, now: Optional[datetime] = None) -> str:
+        return " / ".join(f"P{name[1:]} {date.strftime('%Y-%m-%d')}"
+                          for name, date in self.dates(now).items())
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _parse_time(value: str) -> Optional[datetime]:
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    # タイムゾーンの有無が混在しても比較できるよう naive に揃える
+    return parsed.replace(tzinfo=None) if parsed.tzinfo is None else \
+        parsed.astimezone().replace(tzinfo=None)
+
+
+def cycle_times(tasks: Iterable[Dict]) -> Tuple[List[float], float]:
+    """
+    完了済みタスクのサイクルタイム（日）と実績期間（日）
+
+    サイクルタイムは最初に in_progress になってから最後に completed になるまで。
+    """
+    durations = []
+    first_start: Optional[datetime] = None
+    last_end: Optional[datetime] = None
+    for task in tasks:
+        start = end = None
+        for transition in task.get("status_history") or []:
+            timestamp = _parse_time(transition.get("timestamp", ""))
+            if timestamp is None:
+                continue
+            if transition.get("to_status") == "in_progress" and (start is None or timestamp < start):
+                start = timestamp
+            elif transition.get("to_status") == "completed" and (end is None or timestamp > end):
+                end = timestamp
+        if start is None or end is None or end <= start or task.get("status") != "completed":
+            continue
+        durations.append((end - start).total_seconds() / 86400)
+        first_start = start if first_start is None else min(first_start, start)
+        last_end = end if last_end is None else max(last_end, end)
+    span = (last_end - first_start).total_seconds() / 86400 if durations else 0.0
+    return durations, span
+
+
+def simulate_completion_days(samples: List[float], remaining: int, wip: float, trials: int,
+                             seed: int) -> List[float]:
+    """
+    残りタスクのサイクルタイムを復元抽出し、完了日数の試行結果（昇順）を返す
+
+    1試行の日数 = max(抽出したサイクルタイム合計 / WIP, 最長のサイクルタイム)
+    """
+    if np is not None:
+        rng = np.random.default_rng(seed)
+        drawn = rng.choice(np.asarray(samples), size=(trials, remaining), replace=True)
+        days = np.maximum(drawn.sum(axis=1) / wip, drawn.max(axis=1))
+        return np.sort(days).tolist()
+    rng = random.Random(seed)
+    days = []
+    for _ in range(trials):
+        drawn = rng.choices(samples, k=remaining)
+        days.append(max(sum(drawn) / wip, max(drawn)))
+    days.sort()
+    return days
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class CompletionForecaster:
+    """progress.json の履歴に基づく完了予測（結果をファイルにキャッシュ）"""
+
+    def __init__(self, progress_file: str, cache_file: Optional[str] = None, trials: int = 10000):
+        self.progress_file = progress_file
+        self.cache_file = Path(cache_file or Path(cache_dir(progress_file)) / "forecast_cache.json")
+        self.trials = trials
+        self._lock = threading.Lock()
+        self._cache: Optional[Dict] = None
+
+    def _load_cache(self) -> Dict:
+        if self._cache is None:
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    self._cache = json.load(f)
+            except (OSError, ValueError):
+                self._cache = {}
+        return self._cache
+
+    def _save_cache(self, cache: Dict) -> None:
+        self._cache = cache
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.cache_file.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            temp_file.replace(self.cache_file)
+        except OSError as e:
+            print(f"Warning: forecast cache save failed: {e}")
+
+    def forecast(self, remaining_tasks: int, tasks: Optional[Iterable[Dict]] = None) -> Optional[Forecast]:
+        """
+        残りタスク数の完了日数分布（履歴不足なら None）
+
+        Args:
+            tasks: active_tasks の生データ（省略時は progress.json から読み込む）
+        """
+        with self._lock:
+            try:
+                st = os.stat(self.progress_file)
+                stat_key = [st.st_mtime_ns, st.st_size]
+            except OSError:
+                stat_key = None
+            cache = self._load_cache()
+            if tasks is None and stat_key is not None and cache.get("stat_key") == stat_key \
+                    and cache.get("remaining_tasks") == remaining_tasks:
+                return Forecast(**cache["forecast"]) if cache.get("forecast") else None
+
+            if tasks is None:
+                try:
+                    tasks = load_progress_sections(self.progress_file, ("active_tasks",)) \
+                        .get("active_tasks", {}).values()
+                except (OSError, ValueError):
+                    return None
+            samples, span = cycle_times(tasks)
+            wip = max(1.0, sum(samples) / span) if span > 0 else 1.0
+            history_hash = hashlib.sha256(json.dumps(
+                [sorted(round(s, 6) for s in samples), round(wip, 6), remaining_tasks, self.trials]
+            ).encode()).hexdigest()[:16]
+
+            if cache.get("forecast") and cache["forecast"].get("history_hash") == history_hash:
+                forecast = Forecast(**cache["forecast"])
+            elif len(samples) < MIN_CYCLE_TIMES or remaining_tasks <= 0:
+                forecast = None
+            else:
+                # 同じ履歴なら同じ予測になるよう履歴ハッシュを乱数シードにする
+                days = simulate_completion_days(samples, remaining_tasks, wip, self.trials,
+                                                int(history_hash, 16))
+                forecast = Forecast(
+                    *(round(_percentile(days, pct), 2) for pct in PERCENTILES),
+                    remaining_tasks=remaining_tasks,
+                    cycle_time_samples=len(samples),
+                    wip=round(wip, 2),
+                    history_hash=history_hash,
+                )
+            self._save_cache({
+                "stat_key": stat_key,
+                "remaining_tasks": remaining_tasks,
+                "forecast": forecast.to_dict() if forecast else None,
+            })
+            return forecast
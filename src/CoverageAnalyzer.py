@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Cobertura カバレッジ解析モジュール
+
+coverage.cobertura.xml を逐次解析してファイルごとの行ヒット索引（array）を
+構築し、複数テストプロジェクトのレポートを統合する。タスクブランチで
+変更された行に限定した差分カバレッジも算出する。
+"""
+
+import hashlib
+import os
+import re
+import subprocess
+import threading
+import xml.etree.ElementTree as ET
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+_HUNK_PATTERN = re.compile(r'^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@')
+
+
+class FileCoverage:
+    """1ファイル分の行ヒット情報（行番号・ヒット数を昇順の配列で保持）"""
+    __slots__ = ("lines", "hits")
+
+    def __init__(self, line_hits: Dict[int, int]):
+        ordered = sorted(line_hits.items())
+        self.lines = array('I', (line for line, _ in ordered))
+        self.hits = array('I', (hit for _, hit in ordered))
+
+    def to_dict(self) -> Dict[int, int]:
+        return dict(zip(self.lines, self.hits))
+
+    @property
+    def valid_count(self) -> int:
+        return len(self.lines)
+
+    @property
+    def covered_count(self) -> int:
+        return sum(1 for hit in self.hits if hit > 0)
+
+    def covered_lines(self, only: Optional[Set[int]] = None) -> Tuple[int, int, List[int]]:
+        """(対象の実行可能行数, カバー済み行数, 未カバー行) を返す"""
+        valid = covered = 0
+        uncovered = []
+        for line, hit in zip(self.lines, self.hits):
+            if only is not None and line not in only:
+                continue
+            valid += 1
+            if hit > 0:
+                covered += 1
+            else:
+                uncovered.append(line)
+        return valid, covered, uncovered
+
+
+class CoverageIndex:
+    """ファイル単位のカバレッジ索引"""
+
+    def __init__(self, files: Optional[Dict[str, FileCoverage]] = None,
+                 report_paths: Optional[List[str]] = None):
+        self.files: Dict[str, FileCoverage] = files or {}
+        self.report_paths: List[str] = report_paths or []
+
+    def totals(self) -> Tuple[int, int]:
+        """(カバー済み行数, 実行可能行数)"""
+        covered = valid = 0
+        for coverage in self.files.values():
+            covered += coverage.covered_count
+            valid += coverage.valid_count
+        return covered, valid
+
+    @property
+    def line_rate(self) -> float:
+        covered, valid = self.totals()
+        return covered / valid if valid else 0.0
+
+    def merge(self, other: "CoverageIndex") -> "CoverageIndex":
+        """他レポートの索引を統合（同一行のヒット数は加算）"""
+        merged = {path: cov for path, cov in self.files.items()}
+        for path, coverage in other.files.items():
+            if path in merged:
+                combined = merged[path].to_dict()
+                for line, hit in zip(coverage.lines, coverage.hits):
+                    combined[line] = combined.get(line, 0) + hit
+                merged[path] = FileCoverage(combined)
+            else:
+                merged[path] = coverage
+        return CoverageIndex(merged, self.report_paths + other.report_paths)
+
+    def diff_coverage(self, changed: Dict[str, Set[int]]) -> Dict:
+        """変更行に限定したカバレッジ"""
+        valid = covered = 0
+        uncovered: Dict[str, List[int]] = {}
+        for path, lines in changed.items():
+            coverage = self.files.get(path)
+            if not coverage:
+                continue
+            file_valid, file_covered, file_uncovered = coverage.covered_lines(lines)
+            valid += file_valid
+            covered += file_covered
+            if file_uncovered:
+                uncovered[path] = file_uncovered
+        return {
+            "diff_coverage_percent": round(covered / valid * 100, 2) if valid else None,
+            "diff_covered_lines": covered,
+            "diff_total_lines": valid,
+            "uncovered_changed_lines": uncovered,
+        }
+
+
+def _normalize_path(filename: str, sources: List[str], root: Optional[Path]) -> str:
+    """レポート内のファイル名を worktree ルートからの相対パス（/区切り）に正規化"""
+    candidates = [filename] if os.path.isabs(filename) else [os.path.join(s, filename) for s in sources] + [filename]
+    for candidate in candidates:
+        if root is not None and os.path.isabs(candidate):
+            try:
+                rel = os.path.relpath(candidate, root)
+            except ValueError:
+                continue
+            if not rel.startswith(".."):
+                return rel.replace(os.sep, "/").replace("\\", "/")
+    return filename.replace("\\", "/")
+
+
+def parse_cobertura(report_path: Path, root: Optional[Path] = None) -> CoverageIndex:
+    """
+    Coberturaレポートを逐次解析して索引を構築
+
+    Raises:
+        ET.ParseError, OSError
+    """
+    sources: List[str] = []
+    files: Dict[str, Dict[int, int]] = {}
+    current: Optional[Dict[int, int]] = None
+    method_depth = 0
+
+    for event, elem in ET.iterparse(str(report_path), events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == "class":
+                filename = _normalize_path(elem.get("filename", ""), sources, root)
+                current = files.setdefault(filename, {})
+            elif tag == "method":
+                method_depth += 1
+            continue
+
+        if tag == "source":
+            if elem.text:
+                sources.append(elem.text.strip())
+        elif tag == "line" and current is not None and method_depth == 0:
+            # クラス直下の lines のみ集計（method配下は重複）
+            try:
+                number = int(elem.get("number", "0"))
+                hits = int(elem.get("hits", "0"))
+            except ValueError:
+                continue
+            current[number] = max(current.get(number, 0), hits)
+        elif tag == "method":
+            method_depth -= 1
+            elem.clear()
+        elif tag == "class":
+            current = None
+            elem.clear()
+        elif tag == "package":
+            elem.clear()
+
+    return CoverageIndex({path: FileCoverage(hits) for path, hits in files.items()},
+                         [str(report_path)])
+
+
+class CoverageAnalyzer:
+    """レポートのハッシュをキーに解析結果をキャッシュするカバレッジ解析器"""
+
+    def __init__(self, max_cached_reports: int = 64):
+        self.max_cached_reports = max_cached_reports
+        self._cache: "OrderedDict[Tuple[str, str], CoverageIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _report_hash(report_path: Path) -> str:
+        h = hashlib.sha256()
+        with open(report_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def load_report(self, report_path: Path, root: Optional[Path] = None) -> CoverageIndex:
+        """
+        レポートを解析（同じ内容のレポートは解析結果を再利用）
+
+        キャッシュは内容のハッシュで引くため、report_paths は常に今回の入力から作り直す
+        （内容が同じ別シャードのレポートを取り違えない）。
+        """
+        key = (self._report_hash(report_path), str(root))
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+        if cached is None:
+            cached = parse_cobertura(report_path, root)
+            with self._lock:
+                self._cache[key] = cached
+                while len(self._cache) > self.max_cached_reports:
+                    self._cache.popitem(last=False)
+        return CoverageIndex(cached.files, [str(report_path)])
+
+    def load_reports(self, report_paths: Iterable[Path], root: Optional[Path] = None) -> Tuple[CoverageIndex, List[str]]:
+        """複数レポートを統合。Returns: (merged_index, errors)"""
+        merged = CoverageIndex()
+        errors = []
+        for report_path in report_paths:
+            try:
+                merged = merged.merge(self.load_report(report_path, root))
+            except (ET.ParseError, OSError) as e:
+                errors.append(f"Coverage report parse error ({report_path}): {e}")
+        return merged, errors
+
+
+def get_changed_lines(worktree_path: Path, base_branch: str = "main") -> Optional[Dict[str, Set[int]]]:
+    """
+    タスクブランチで main から変更・追加された行を取得（未コミット分を含む）
+
+    Returns:
+        {相対パス: 行番号集合}（git が使えない場合は None）
+    """
+    diff = _git_against_merge_base(worktree_path, base_branch, ["diff", "-U0", "--no-color", "--no-ext-diff"])
+    if diff is None:
+        return None
+
+    changed: Dict[str, Set[int]] = {}
+    current: Optional[Set[int]] = None
+    for line in diff.stdout.splitlines():
+        if line.startswith("+++ "):
+            path = line[4:]
+            current = None if path == "/dev/null" else changed.setdefault(path[2:] if path.startswith("b/") else path, set())
+        elif line.startswith("@@") and current is not None:
+            match = _HUNK_PATTERN.match(line)
+            if match:
+                start = int(match.group(1))
+                count = int(match.group(2)) if match.group(2) is not None else 1
+                current.update(range(start, start + count))
+    return changed
+
+
+def get_structural_changes(worktree_path: Path, base_branch: str = "main") -> Optional[List[Tuple[str, str]]]:
+    """
+    行単位の差分に現れない変更（削除・リネーム・未追跡ファイル）を取得
+
+    get_changed_lines は削除ファイル（+++ /dev/null）を含まず、未追跡ファイルも見えないため、
+    テスト選択ではこちらで補う。
+
+    Returns:
+        [(状態, 相対パス)]（状態は "D" / "R" / "??"。リネームは旧・新の両方を返す。git が使えない場合は None）
+    """
+    diff = _git_against_merge_base(worktree_path, base_branch, ["diff", "--name-status", "-M", "-z", "--no-ext-diff"])
+    try:
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "-z", "--untracked-files=all"],
+            cwd=worktree_path, capture_output=True, text=True, encoding="utf-8",
+            errors="replace", timeout=60
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if diff is None or status.returncode != 0:
+        return None
+
+    changes: List[Tuple[str, str]] = []
+    fields = diff.stdout.split("\0")
+    index = 0
+    while index < len(fields) and fields[index]:
+        kind = fields[index][0]
+        path_count = 2 if kind in ("R", "C") else 1
+        paths = fields[index + 1:index + 1 + path_count]
+        index += 1 + path_count
+        if kind in ("D", "R"):
+            changes.extend((kind, path) for path in paths)
+    for entry in status.stdout.split("\0"):
+        if entry.startswith("?? "):
+            changes.append(("??", entry[3:]))
+    return changes
+
+
+def _git_against_merge_base(worktree_path: Path, base_branch: str,
+                            args: List[str]) -> Optional[subprocess.CompletedProcess]:
+    """base_branch との merge-base に対して git コマンドを実行（失敗時は None）"""
+    try:
+        merge_base = subprocess.run(
+            ["git", "merge-base", base_branch, "HEAD"],
+            cwd=worktree_path, capture_output=True, text=True, timeout=30
+        )
+        if merge_base.returncode != 0:
+            return None
+        result = subprocess.run(
+            ["git", *args, merge_base.stdout.strip()],
+            cwd=worktree_path, capture_output=True, text=True, encoding="utf-8",
+            errors="replace", timeout=60
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return result if result.returncode == 0 else None
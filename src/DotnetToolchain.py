@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+dotnet ツールチェーン管理モジュール
+
+オーケストレーターの存続期間中 MSBuild ノード・Roslyn コンパイラサーバーを
+再利用し、全 worktree で共有パッケージキャッシュを使う。パッケージ復元は
+プロセス間ロックで直列化し、入力が変わっていない worktree では省略する。
+終了時は build-server を停止する。コールド／ウォームのビルド時間を記録する。
+"""
+
+import atexit
+import os
+import shlex
+import subprocess
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .ArtifactIndex import DEFAULT_PRUNE_DIRS
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from ArtifactIndex import DEFAULT_PRUNE_DIRS
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+
+# テスト用に偽の dotnet を指定する環境変数
+DOTNET_COMMAND_ENV = "GMA_DOTNET"
+
+# 変更されるとパッケージ復元が必要になるファイル（小文字）
+RESTORE_INPUT_NAMES = {
+    "directory.build.props", "directory.build.targets", "directory.packages.props",
+    "nuget.config", "global.json",
+}
+
+
+def default_dotnet_command() -> str:
+    return os.environ.get(DOTNET_COMMAND_ENV) or "dotnet"
+
+
+class InterProcessLock:
+    """ロックファイルによるプロセス間排他（パッケージ復元の直列化）"""
+
+    def __init__(self, lock_file: Path):
+        self.lock_file = Path(lock_file)
+        self._handle = None
+        self._thread_lock = threading.Lock()
+
+    def __enter__(self) -> "InterProcessLock":
+        self._thread_lock.acquire()
+        try:
+            self.lock_file.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(self.lock_file, 'a+')
+            if os.name == "nt":
+                self._handle.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._handle.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue  # LK_LOCK は約10秒で諦めるため再試行
+            else:
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            self._release()
+            raise
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._release()
+
+    def _release(self) -> None:
+        try:
+            if self._handle is not None:
+                if os.name == "nt":
+                    self._handle.seek(0)
+                    msvcrt.locking(self._handle.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+                self._handle.close()
+        except OSError:
+            pass
+        finally:
+            self._handle = None
+            self._thread_lock.release()
+
+
+def _restore_inputs(worktree_path: Path) -> Tuple[List[str], int]:
+    """(プロジェクトファイル一覧, 復元入力の最新mtime_ns)"""
+    projects: List[str] = []
+    newest = 0
+    stack = [str(worktree_path)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in DEFAULT_PRUNE_DIRS and entry.name != "TestResults":
+                    stack.append(entry.path)
+                continue
+            lower = entry.name.lower()
+            if lower.endswith(".csproj") or lower in RESTORE_INPUT_NAMES:
+                if lower.endswith(".csproj"):
+                    projects.append(entry.path)
+                try:
+                    newest = max(newest, entry.stat().st_mtime_ns)
+                except OSError:
+                    continue
+    return projects, newest
+
+
+def needs_restore(worktree_path: Path) -> bool:
+    """全プロジェクトの obj/project.assets.json が入力より新しければ復元不要"""
+    projects, newest = _restore_inputs(worktree_path)
+    if not projects:
+        return True
+    for project in projects:
+        assets = os.path.join(os.path.dirname(project), "obj", "project.assets.json")
+        try:
+            if os.stat(assets).st_mtime_ns < newest:
+                return True
+        except OSError:
+            return True
+    return False
+
+
+class DotnetToolchain:
+    """ビルドサーバーとパッケージキャッシュを管理する dotnet 実行環境"""
+
+    def __init__(self, project_root: Path, dotnet_command: Optional[str] = None,
+                 package_cache: Optional[Path] = None):
+        self.project_root = Path(project_root)
+        self.dotnet_command = dotnet_command or default_dotnet_command()
+        # 既定は利用者のグローバルパッケージフォルダ（既存のダウンロードを再利用）
+        self.package_cache = Path(
+            package_cache or os.environ.get("NUGET_PACKAGES") or Path.home() / ".nuget" / "packages"
+        )
+        self.restore_lock = InterProcessLock(self.project_root / ".claude" / "cache" / "locks" / "nuget-restore.lock")
+        self._lock = threading.Lock()
+        self._servers_started = False
+        self._shutdown_registered = False
+        self.build_timings: Dict[str, List[float]] = {"cold": [], "warm": []}
+
+    def environment(self, base_env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """dotnet 子プロセスの環境変数（呼び出し側の明示設定を優先）"""
+        env = dict(base_env if base_env is not None else os.environ)
+        env["NUGET_PACKAGES"] = str(self.package_cache)
+        for key, value in (
+            ("DOTNET_CLI_TELEMETRY_OPTOUT", "1"),
+            ("DOTNET_NOLOGO", "1"),
+            ("DOTNET_SKIP_FIRST_TIME_EXPERIENCE", "1"),
+            ("DOTNET_CLI_USE_MSBUILD_SERVER", "1"),
+            ("UseSharedCompilation", "true"),
+        ):
+            env.setdefault(key, value)
+        return env
+
+    def command(self, *args: str) -> List[str]:
+        """dotnet コマンド行を生成（GMA_DOTNET に "python tests/FakeDotnet.py" 等も指定可）"""
+        return shlex.split(self.dotnet_command, posix=os.name != "nt") + list(args)
+
+    @staticmethod
+    def node_reuse(env: Dict[str, str]) -> bool:
+        return env.get("MSBUILDDISABLENODEREUSE") != "1"
+
+    def build_arguments(self, env: Dict[str, str]) -> List[str]:
+        """ビルドサーバー再利用のための追加引数"""
+        reuse = "true" if self.node_reuse(env) else "false"
+        return [f"-nodeReuse:{reuse}", f"-p:UseSharedCompilation={reuse}"]
+
+    def begin_build(self, env: Dict[str, str]) -> str:
+        """ビルド開始時のサーバー状態（cold / warm）を返し、終了時の停止を登録"""
+        with self._lock:
+            state = "warm" if self._servers_started else "cold"
+            self._register_servers(env)
+            return state
+
+    def adopt_servers(self, env: Dict[str, str]) -> None:
+        """他プロセス（バッチ検証のワーカー）が起動したサーバーを終了時の停止対象にする"""
+        with self._lock:
+            self._register_servers(env)
+
+    def _register_servers(self, env: Dict[str, str]) -> None:
+        if self.node_reuse(env):
+            self._servers_started = True
+            if not self._shutdown_registered:
+                atexit.register(self.shutdown)
+                self._shutdown_registered = True
+
+    def record_build(self, state: str, duration: float) -> None:
+        with self._lock:
+            self.build_timings[state].append(round(duration, 3))
+
+    def timing_summary(self) -> Dict:
+        """コールド／ウォームの平均ビルド時間"""
+        with self._lock:
+            return {
+                state: {
+                    "count": len(values),
+                    "average_seconds": round(sum(values) / len(values), 3) if values else None,
+                }
+                for state, values in self.build_timings.items()
+            }
+
+    def shutdown(self) -> None:
+        """常駐ビルドサーバー（MSBuild ノード・Roslyn・Razor）を停止"""
+        with self._lock:
+            if not self._servers_started:
+                return
+            self._servers_started = False
+        try:
+            subprocess.run(
+                self.command("build-server", "shutdown"),
+                capture_output=True, text=True, timeout=60, env=self.environment()
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Warning: dotnet build-server shutdown failed: {e}")
+
+
+_toolchains: Dict[Tuple[str, str], DotnetToolchain] = {}
+_toolchains_lock = threading.Lock()
+
+
+def get_toolchain(project_root: Path, dotnet_command: Optional[str] = None) -> DotnetToolchain:
+    """プロジェクト・dotnet コマンドごとに共有されるツールチェーンを取得"""
+    command = dotnet_command or default_dotnet_command()
+    key = (str(Path(project_root).resolve()), command)
+    with _toolchains_lock:
+        toolchain = _toolchains.get(key)
+        if toolchain is None:
+            toolchain = _toolchains[key] = DotnetToolchain(Path(key[0]), command)
+        return toolchain
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+タスク仕様の required_files パターン照合モジュール
+
+required_files の glob パターン（`**` 対応）をまとめてコンパイルし、worktree を
+1回だけ走査して各パターンに一致したファイルを報告する。
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .ArtifactIndex import DEFAULT_PRUNE_DIRS
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from ArtifactIndex import DEFAULT_PRUNE_DIRS
+
+
+_GLOB_CHARS = re.compile(r'[*?\[]')
+
+
+def normalize_pattern(pattern: str) -> str:
+    """区切り文字を / に統一し先頭の ./ を除去"""
+    pattern = pattern.replace("\\", "/")
+    while pattern.startswith("./"):
+        pattern = pattern[2:]
+    return pattern.strip("/")
+
+
+def is_glob(pattern: str) -> bool:
+    return bool(_GLOB_CHARS.search(pattern))
+
+
+def _translate_segment(segment: str) -> str:
+    """パス要素1つ分の glob を正規表現に変換（/ は跨がない）"""
+    out = []
+    i = 0
+    while i < len(segment):
+        c = segment[i]
+        if c == "*":
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            end = segment.find("]", i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = segment[i + 1:end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def glob_to_regex(pattern: str) -> str:
+    """glob（** は0個以上のディレクトリ）を正規表現文字列に変換"""
+    segments = normalize_pattern(pattern).split("/")
+    out = []
+    for index, segment in enumerate(segments):
+        last = index == len(segments) - 1
+        if segment == "**":
+            out.append(".*" if last else "(?:[^/]+/)*")
+        else:
+            out.append(_translate_segment(segment) + ("" if last else "/"))
+    return "".join(out)
+
+
+def _literal_prefix(pattern: str) -> str:
+    """glob を含まない先頭ディレクトリ部分（走査範囲の限定に使用）"""
+    prefix = []
+    for segment in normalize_pattern(pattern).split("/")[:-1]:
+        if is_glob(segment):
+            break
+        prefix.append(segment)
+    return "/".join(prefix)
+
+
+class RequiredFilesMatcher:
+    """複数パターンを1つの照合器にまとめた required_files マッチャー"""
+
+    def __init__(self, patterns: Iterable[str], prune_dirs: Iterable[str] = DEFAULT_PRUNE_DIRS):
+        self.patterns = list(dict.fromkeys(patterns))
+        self.prune_dirs = frozenset(prune_dirs)
+        self.literal_patterns = [p for p in self.patterns if not is_glob(p)]
+        self.glob_patterns = [p for p in self.patterns if is_glob(p)]
+
+        # 全globを1つの正規表現に結合（不一致パスを1回の照合で除外）
+        self._compiled: List[Tuple[str, "re.Pattern"]] = [
+            (p, re.compile(glob_to_regex(p) + r"\Z")) for p in self.glob_patterns
+        ]
+        self._combined: Optional["re.Pattern"] = (
+            re.compile("|".join(f"(?:{glob_to_regex(p)})" for p in self.glob_patterns) + r"\Z")
+            if self.glob_patterns else None
+        )
+        self._roots = sorted({_literal_prefix(p) for p in self.glob_patterns})
+
+    def _walk_roots(self) -> List[str]:
+        """走査開始ディレクトリ（他の開始点の配下にあるものは除く）"""
+        roots: List[str] = []
+        for root in self._roots:
+            if not any(root == r or root.startswith(r + "/") or r == "" for r in roots):
+                roots.append(root)
+        return roots
+
+    def match(self, worktree_path: Path) -> Dict[str, List[str]]:
+        """
+        worktree を走査してパターンごとの一致ファイルを返す
+
+        Returns:
+            {pattern: [一致した相対パス, ...]}（一致なしは空リスト）
+        """
+        worktree = str(worktree_path)
+        results: Dict[str, List[str]] = {p: [] for p in self.patterns}
+
+        # 固定パスは存在確認のみ（走査不要）
+        for pattern in self.literal_patterns:
+            if os.path.exists(os.path.join(worktree, normalize_pattern(pattern))):
+                results[pattern].append(normalize_pattern(pattern))
+
+        if not self._combined:
+            return results
+
+        for root in self._walk_roots():
+            stack = [root]
+            while stack:
+                rel_dir = stack.pop()
+                abs_dir = os.path.join(worktree, rel_dir) if rel_dir else worktree
+                try:
+                    with os.scandir(abs_dir) as it:
+                        entries = list(it)
+                except OSError:
+                    continue
+                for entry in entries:
+                    rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in self.prune_dirs:
+                            stack.append(rel_path)
+                        continue
+                    if not self._combined.match(rel_path):
+                        continue
+                    for pattern, regex in self._compiled:
+                        if regex.match(rel_path):
+                            results[pattern].append(rel_path)
+
+        for files in results.values():
+            files.sort()
+        return results
+
+
+def match_required_files(worktree_path: Path, patterns: Iterable[str]) -> Dict[str, List[str]]:
+    """外部呼び出し用: required_files パターンを照合"""
+    return RequiredFilesMatcher(patterns).match(worktree_path)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+ファイル変更の待機モジュール
+
+Linux では inotify（ctypes 経由）でファイルのあるディレクトリを監視し、
+変更があるまでブロックする（待機中の CPU 消費はほぼゼロ）。progress.json は
+一時ファイルからの rename で置き換えられるため、ファイル自体ではなく
+ディレクトリの IN_CLOSE_WRITE / IN_MOVED_TO を監視する。
+inotify が使えない環境では mtime のポーリングに切り替える。
+どちらの方式でも (inode, mtime, size) が実際に変わった場合のみ変更とみなす。
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from typing import Optional, Tuple
+
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")   # wd, mask, cookie, len
+
+
+def _load_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class FileChangeWatcher:
+    """1つのファイルの変更を待つ（inotify / ポーリング）"""
+
+    def __init__(self, path: str, poll_interval: float = 1.0, use_inotify: bool = True):
+        self.path = os.path.abspath(path)
+        self.poll_interval = poll_interval
+        self._name = os.path.basename(self.path).encode()
+        self._fd: Optional[int] = None
+        self._stat_key = self._current_stat_key()
+        self.backend = "poll"
+        libc = _load_inotify() if use_inotify else None
+        if libc is not None:
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY
+                if libc.inotify_add_watch(fd, os.path.dirname(self.path).encode(), mask) >= 0:
+                    self._fd = fd
+                    self.backend = "inotify"
+                else:
+                    os.close(fd)
+
+    def _current_stat_key(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _changed(self) -> bool:
+        stat_key = self._current_stat_key()
+        if stat_key == self._stat_key:
+            return False
+        self._stat_key = stat_key
+        return True
+
+    def _drain_events(self) -> bool:
+        """読み取り可能な inotify イベントを消費し、対象ファイルのものがあったか"""
+        relevant = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + _EVENT_HEADER.size:offset + _EVENT_HEADER.size + length].rstrip(b"\0")
+                relevant = relevant or name == self._name
+                offset += _EVENT_HEADER.size + length
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        ファイルが変わるまで待つ
+
+        Returns:
+            変更があれば True、timeout 秒以内に変更がなければ False
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if self._fd is not None:
+                readable, _, _ = select.select([self._fd], [], [], remaining)
+                if readable and self._drain_events() and self._changed():
+                    return True
+            else:
+                time.sleep(self.poll_interval if remaining is None else min(self.poll_interval, remaining))
+                if self._changed():
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileChangeWatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+累積フロー・バーンダウン集計モジュール
+
+各タスクの status_history（状態遷移記録）から日単位のステータス別件数を集計し、
+累積フロー図・バーンダウン・WIP・リードタイム・サイクルタイムの時系列を作る。
+集計結果は .claude/cache/flow_metrics.json（再生成可能なキャッシュ、バージョン管理外）に
+列指向（ステータスごとの日別増減配列）で保存する。
+status_history は追記のみなので、タスクごとに処理済みの遷移数を記録しておき、
+次回は新しい遷移だけを反映する（progress.json が変わっていなければ読み込みもしない）。
+履歴が書き換えられて短くなった場合のみ全件を再集計する。
+タスクの作成時刻は記録されていないため、リードタイムは最初の遷移から完了まで、
+サイクルタイムは最初に作業中の状態になってから完了までとする。
+"""
+
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from .ProgressSnapshot import cache_dir, load_progress_sections
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from ProgressSnapshot import cache_dir, load_progress_sections
+
+
+STORE_VERSION = 1
+NOT_STARTED_STATUSES = frozenset({"pending", "unknown"})
+DONE_STATUSES = frozenset({"completed"})
+BUCKETS = ("day", "week", "month")
+
+
+def _day_of(timestamp: str) -> Optional[Tuple[int, float]]:
+    """遷移時刻の (UTC の日付序数, UNIX 時刻)。解釈できなければ None"""
+    try:
+        parsed = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.astimezone()
+    parsed = parsed.astimezone(timezone.utc)
+    return parsed.toordinal(), parsed.timestamp()
+
+
+def _bucket_start(ordinal: int, bucket: str) -> int:
+    if bucket == "week":
+        return ordinal - date.fromordinal(ordinal).weekday()
+    if bucket == "month":
+        return date.fromordinal(ordinal).replace(day=1).toordinal()
+    return ordinal
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+@dataclass
+class FlowSeries:
+    """バケット単位の時系列（各値はバケット末時点）"""
+    bucket: str
+    labels: List[str]
+    counts: Dict[str, List[int]]          # ステータス別の件数（累積フロー図の各帯）
+    wip: List[int]
+    completed: List[int]                  # 完了済みの累計
+    remaining: List[int]                  # 未完了の件数（バーンダウン）
+    throughput: List[int]                 # バケット内の完了件数
+    lead_time_p50: List[Optional[float]]  # バケット内に完了したタスクの中央値（日）
+    cycle_time_p50: List[Optional[float]]
+    untracked_tasks: int = 0              # 遷移記録がなく集計に含まれないタスク数
+    lead_times: List[float] = field(default_factory=list)
+    cycle_times: List[float] = field(default_factory=list)
+
+
+class FlowMetricsStore:
+    """status_history の増分集計と列指向ストア"""
+
+    def __init__(self, progress_file: str, store_file: Optional[str] = None):
+        self.progress_file = progress_file
+        self.store_file = Path(store_file or Path(cache_dir(progress_file)) / "flow_metrics.json")
+        self._lock = threading.Lock()
+        self._store: Optional[Dict] = None
+        # 直近の update() で反映した遷移数（0 なら変化なし）
+        self.processed = 0
+
+    # --- ストアの読み書き ---
+
+    @staticmethod
+    def _empty_store() -> Dict:
+        return {
+            "version": STORE_VERSION,
+            "stat_key": None,
+            "start_day": None,   # deltas の先頭要素の日付序数
+            "deltas": {},        # ステータス -> 日別の増減（出入りの差）
+            "tasks": {},         # task_id -> [処理済み遷移数, 現在の状態, 初回遷移時刻, 着手時刻]
+            "completions": {"day": [], "lead": [], "cycle": []},
+            "untracked": 0,
+        }
+
+    def _load_store(self) -> Dict:
+        if self._store is None:
+            try:
+                with open(self.store_file, 'r', encoding='utf-8') as f:
+                    store = json.load(f)
+                self._store = store if store.get("version") == STORE_VERSION else self._empty_store()
+            except (OSError, ValueError):
+                self._store = self._empty_store()
+        return self._store
+
+    def _save_store(self, store: Dict) -> None:
+        try:
+            self.store_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.store_file.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(store, f, separators=(',', ':'))
+            temp_file.replace(self.store_file)
+        except OSError as e:
+            print(f"Warning: flow metrics save failed: {e}")
+
+    # --- 増分集計 ---
+
+    @staticmethod
+    def _add(store: Dict, status: str, ordinal: int, amount: int) -> None:
+        """status の ordinal 日の増減に amount を加える（配列は必要に応じて前後に伸ばす）"""
+        start = store["start_day"]
+        if start is None:
+            start = store["start_day"] = ordinal
+        if ordinal < start:
+            pad = start - ordinal
+            for series in store["deltas"].values():
+                series[:0] = [0] * pad
+            start = store["start_day"] = ordinal
+        length = max((len(s) for s in store["deltas"].values()), default=0)
+        series = store["deltas"].setdefault(status, [0] * length)
+        needed = ordinal - start + 1
+        if needed > length:
+            for other in store["deltas"].values():
+                other.extend([0] * (needed - len(other)))
+        series[ordinal - start] += amount
+
+    def _apply(self, store: Dict, task_id: str, task: Dict) -> int:
+        """1タスクの未処理の遷移を反映し、反映した件数を返す"""
+        history = task.get("status_history") or []
+        state = store["tasks"].get(task_id)
+        if state is None:
+            if not history:
+                return 0
+            state = store["tasks"][task_id] = [0, None, None, None]
+        processed, current, first_seen, started = state
+        applied = 0
+        for transition in history[processed:]:
+            processed += 1
+            when = _day_of(transition.get("timestamp", ""))
+            if when is None:
+                continue
+            ordinal, timestamp = when
+            to_status = transition.get("to_status") or "unknown"
+            if current is not None:
+                self._add(store, current, ordinal, -1)
+            self._add(store, to_status, ordinal, +1)
+            if first_seen is None:
+                first_seen = timestamp
+            if started is None and to_status not in NOT_STARTED_STATUSES | DONE_STATUSES:
+                started = timestamp
+            if to_status in DONE_STATUSES and current not in DONE_STATUSES:
+                completions = store["completions"]
+                completions["day"].append(ordinal)
+                completions["lead"].append(round((timestamp - first_seen) / 86400, 4))
+                completions["cycle"].append(
+                    None if started is None else round((timestamp - started) / 86400, 4)
+                )
+            current = to_status
+            applied += 1
+        store["tasks"][task_id] = [processed, current, first_seen, started]
+        return applied
+
+    def update(self, tasks: Optional[Dict[str, Dict]] = None) -> int:
+        """
+        新しい遷移をストアに反映し、反映した遷移数を返す
+
+        Args:
+            tasks: active_tasks の生データ（省略時は progress.json が変わった場合のみ読み込む）
+        """
+        with self._lock:
+            store = self._load_store()
+            try:
+                st = os.stat(self.progress_file)
+                stat_key = [st.st_mtime_ns, st.st_size]
+            except OSError:
+                stat_key = None
+            self.processed = 0
+            if tasks is None:
+                if stat_key is None or store.get("stat_key") == stat_key:
+                    return 0
+                try:
+                    tasks = load_progress_sections(self.progress_file, ("active_tasks",)) \
+                        .get("active_tasks", {})
+                except (OSError, ValueError):
+                    return 0
+
+            # 履歴が短くなったタスクがあれば増分では追えないので全件を再集計する
+            known = store["tasks"]
+            if any(len(task.get("status_history") or []) < known[task_id][0]
+                   for task_id, task in tasks.items() if task_id in known) \
+                    or any(task_id not in tasks for task_id in known):
+                store = self._store = self._empty_store()
+
+            processed = 0
+            for task_id, task in tasks.items():
+                processed += self._apply(store, task_id, task)
+            store["untracked"] = sum(1 for task_id in tasks
+                                     if task_id not in store["tasks"] or store["tasks"][task_id][1] is None)
+            store["stat_key"] = stat_key
+            self.processed = processed
+            self._save_store(store)
+            return processed
+
+    # --- 時系列 ---
+
+    def series(self, bucket: str = "day", last: Optional[int] = None) -> Optional[FlowSeries]:
+        """
+        バケット単位の時系列（遷移記録がなければ None）
+
+        Args:
+            bucket: "day" / "week" / "month"
+            last: 末尾から何バケット分を返すか（省略時は全期間）
+        """
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unknown bucket: {bucket} (choose from {', '.join(BUCKETS)})")
+        with self._lock:
+            store = self._load_store()
+            start = store["start_day"]
+            if start is None:
+                return None
+            deltas = {status: list(values) for status, values in store["deltas"].items()}
+            completions = {key: list(values) for key, values in store["completions"].items()}
+            untracked = store["untracked"]
+
+        length = max(len(values) for values in deltas.values())
+        # 日付序数 -> バケット番号
+        bucket_starts: List[int] = []
+        bucket_of_day: List[int] = []
+        for offset in range(length):
+            first = _bucket_start(start + offset, bucket)
+            if not bucket_starts or bucket_starts[-1] != first:
+                bucket_starts.append(first)
+            bucket_of_day.append(len(bucket_starts) - 1)
+
+        counts: Dict[str, List[int]] = {}
+        for status, values in sorted(deltas.items()):
+            running = 0
+            column = [0] * len(bucket_starts)
+            for offset, delta in enumerate(values):
+                running += delta
+                column[bucket_of_day[offset]] = running   # バケット末の値で上書き
+            if any(column):
+                counts[status] = column
+
+        total_tracked = [sum(column[i] for column in counts.values()) for i in range(len(bucket_starts))]
+        completed = [sum(counts[s][i] for s in counts if s in DONE_STATUSES) for i in range(len(bucket_starts))]
+        wip = [
+            sum(counts[s][i] for s in counts if s not in NOT_STARTED_STATUSES | DONE_STATUSES)
+            for i in range(len(bucket_starts))
+        ]
+        # 遷移記録のないタスクは未着手のまま残っているものとして扱う
+        remaining = [total_tracked[i] + untracked - completed[i] for i in range(len(bucket_starts))]
+
+        throughput = [0] * len(bucket_starts)
+        lead_by_bucket: List[List[float]] = [[] for _ in bucket_starts]
+        cycle_by_bucket: List[List[float]] = [[] for _ in bucket_starts]
+        for ordinal, lead, cycle in zip(completions["day"], completions["lead"], completions["cycle"]):
+            index = bucket_of_day[ordinal - start]
+            throughput[index] += 1
+            lead_by_bucket[index].append(lead)
+            if cycle is not None:
+                cycle_by_bucket[index].append(cycle)
+
+        label_format = "%Y-%m" if bucket == "month" else "%Y-%m-%d"
+        window = slice(-last, None) if last else slice(None)
+        return FlowSeries(
+            bucket=bucket,
+            labels=[date.fromordinal(first).strftime(label_format) for first in bucket_starts][window],
+            counts={status: column[window] for status, column in counts.items()},
+            wip=wip[window],
+            completed=completed[window],
+            remaining=remaining[window],
+            throughput=throughput[window],
+            lead_time_p50=[_percentile(values, 50) for values in lead_by_bucket][window],
+            cycle_time_p50=[_percentile(values, 50) for values in cycle_by_bucket][window],
+            untracked_tasks=untracked,
+            lead_times=completions["lead"],
+            cycle_times=[c for c in completions["cycle"] if c is not None],
+        )
+
+    def span_days(self) -> int:
+        """集計済みの期間（日数）"""
+        with self._lock:
+            return max((len(values) for values in self._load_store()["deltas"].values()), default=0)
+
+
+def choose_bucket(days: int, max_rows: int = 16) -> str:
+    """期間の長さに応じて、表示行数が max_rows 前後に収まるバケット"""
+    if days <= max_rows:
+        return "day"
+    if days <= max_rows * 7:
+        return "week"
+    return "month"
+
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+ビルド・テスト性能の回帰検出モジュール
+
+タスクごとの検証メトリクス（ビルド時間・テスト時間・TRXのテスト別時間・
+カバレッジ）を時系列（JSON Lines）で蓄積し、プロジェクト・ブランチ単位の
+ベースラインと中央値/MAD による頑健な統計で回帰を検出する。
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import threading
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .DotnetToolchain import InterProcessLock
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from DotnetToolchain import InterProcessLock
+
+
+# MAD を標準偏差相当に換算する係数（正規分布）
+MAD_SCALE = 1.4826
+
+# 値が大きいほど悪化するメトリクス / 小さいほど悪化するメトリクス
+HIGHER_IS_WORSE = ("build_seconds", "test_seconds")
+LOWER_IS_WORSE = ("coverage_percent",)
+
+
+@dataclass
+class RegressionPolicy:
+    """回帰判定の閾値"""
+    min_samples: int = 5             # ベースラインに必要な最小サンプル数
+    window: int = 30                 # ベースラインに使う直近サンプル数
+    mad_threshold: float = 3.0       # 中央値から何 MAD 離れたら回帰とみなすか
+    min_relative_change: float = 0.2  # 中央値に対する最小変化率（MAD≈0 の誤検出防止）
+    min_absolute_seconds: float = 2.0  # 時間メトリクスの最小変化量（秒）
+    min_coverage_drop: float = 2.0     # カバレッジの最小低下量（ポイント）
+    slow_test_seconds: float = 1.0     # 新規テストを「遅い」とみなす時間
+    fail_ratio: float = 2.0            # この倍率以上の悪化はゲート失敗
+    mode: str = "warn"                 # "warn": 警告のみ / "fail": 回帰でゲート失敗
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> "RegressionPolicy":
+        if not data:
+            return cls()
+        known = set(cls.__dataclass_fields__)
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+@dataclass
+class RegressionReport:
+    """1回の検証に対する回帰判定結果"""
+    status: str = "ok"               # "ok" / "warning" / "fail" / "no_baseline"
+    baseline: str = ""               # 使用したベースライン（"project@branch" 等）
+    baseline_samples: int = 0
+    regressions: List[Dict] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def robust_stats(values: List[float]) -> Tuple[float, float]:
+    """(中央値, MAD)"""
+    median = statistics.median(values)
+    mad = statistics.median(abs(v - median) for v in values)
+    return median, mad
+
+
+def current_branch(worktree_path: Path) -> str:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--abbrev-ref", "HEAD"], cwd=worktree_path,
+                                capture_output=True, text=True, timeout=10)
+        if result.returncode == 0:
+            return result.stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    return "unknown"
+
+
+def extract_metrics(details: Dict) -> Tuple[Dict[str, float], Dict[str, float]]:
+    """
+    ArtifactValidator の検証詳細から (メトリクス, テスト別時間) を抽出
+
+    キャッシュから再利用したステージの時間は実測ではないため除外する。
+    テスト時間は全件実行の場合のみ比較対象とする。
+    """
+    stages = details.get("stages", {})
+    metrics: Dict[str, float] = {}
+
+    if not stages.get("build", {}).get("cached", True):
+        build_seconds = details.get("toolchain", {}).get("build_duration")
+        if build_seconds is None:
+            build_seconds = details.get("stage_timings", {}).get("build")
+        if build_seconds is not None:
+            metrics["build_seconds"] = float(build_seconds)
+
+    test_results = details.get("test_results", {})
+    test_timings: Dict[str, float] = {}
+    if not stages.get("test", {}).get("cached", True):
+        test_timings = dict(test_results.get("test_timings", {}))
+        if details.get("test_selection", {}).get("mode", "full") == "full":
+            test_seconds = details.get("resource_usage", {}).get("test", {}).get("wall_seconds")
+            if test_seconds is None:
+                test_seconds = details.get("stage_timings", {}).get("test")
+            if test_seconds is not None:
+                metrics["test_seconds"] = float(test_seconds)
+
+    coverage = details.get("coverage", {})
+    if coverage.get("coverage_percent") is not None and not coverage.get("partial"):
+        metrics["coverage_percent"] = float(coverage["coverage_percent"])
+    return metrics, test_timings
+
+
+class PerformanceTracker:
+    """検証メトリクスの時系列ストアと回帰検出"""
+
+    def __init__(self, store_file: Path, policy: Optional[RegressionPolicy] = None,
+                 max_records: int = 5000):
+        self.store_file = Path(store_file)
+        self.policy = policy or RegressionPolicy()
+        self.max_records = max_records
+        self._lock = threading.Lock()
+        # 並列バッチ検証のワーカープロセスからの追記・切り詰めを直列化
+        self._file_lock = InterProcessLock(self.store_file.with_suffix('.lock'))
+        self._records: Optional[List[Dict]] = None
+        self._stat_key: Optional[Tuple[int, int]] = None
+
+    # --- 時系列ストア ---
+
+    def _load(self) -> List[Dict]:
+        """ストアを読み込み（ファイルが変わっていなければメモリ上の内容を再利用）"""
+        try:
+            st = os.stat(self.store_file)
+            stat_key = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return self._records if self._records is not None else []
+        if self._records is not None and stat_key == self._stat_key:
+            return self._records
+        records = []
+        with open(self.store_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # 書き込み途中の行は無視
+        self._records, self._stat_key = records, stat_key
+        return records
+
+    def record(self, task_id: str, project: str, branch: str, metrics: Dict[str, float],
+               test_timings: Dict[str, float]) -> Dict:
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "task_id": task_id,
+            "project": project,
+            "branch": branch,
+            "metrics": metrics,
+            "test_timings": {name: round(d, 4) for name, d in test_timings.items()},
+        }
+        with self._lock, self._file_lock:
+            records = list(self._load())
+            records.append(entry)
+            self.store_file.parent.mkdir(parents=True, exist_ok=True)
+            if len(records) > self.max_records * 1.2:
+                # 古いサンプルを切り詰めて書き直し
+                records = records[-self.max_records:]
+                temp_file = self.store_file.with_suffix('.tmp')
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    for record in records:
+                        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                temp_file.replace(self.store_file)
+            else:
+                with open(self.store_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            st = os.stat(self.store_file)
+            self._records, self._stat_key = records, (st.st_mtime_ns, st.st_size)
+        return entry
+
+    # --- ベースライン ---
+
+    def baseline(self, project: str, branch: str, base_branch: str = "main") -> Tuple[str, List[Dict]]:
+        """
+        ベースラインとなる直近サンプルを選択
+
+        同じブランチに十分なサンプルがあればそれを、なければ基準ブランチ、
+        それもなければプロジェクト全体（他タスクのブランチを含む）を使う。
+        """
+        with self._lock:
+            records = [r for r in self._load() if r.get("project") == project]
+        window = self.policy.window
+        for label, selected in (
+            (f"{project}@{branch}", [r for r in records if r.get("branch") == branch]),
+            (f"{project}@{base_branch}", [r for r in records if r.get("branch") == base_branch]),
+            (f"{project}@*", records),
+        ):
+            if len(selected) >= self.policy.min_samples:
+                return label, selected[-window:]
+        return f"{project}@*", records[-window:]
+
+    # --- 回帰検出 ---
+
+    def _check_metric(self, name: str, value: float, history: List[float]) -> Optional[Dict]:
+        policy = self.policy
+        median, mad = robust_stats(history)
+        spread = MAD_SCALE * mad
+        if name in LOWER_IS_WORSE:
+            drop = median - value
+            if drop >= policy.min_coverage_drop and drop > policy.mad_threshold * spread:
+                return {"metric": name, "value": value, "baseline_median": round(median, 3),
+                        "mad": round(mad, 3), "change": round(-drop, 3),
+                        "severity": "fail" if value < median / policy.fail_ratio else "warning"}
+            return None
+
+        delta = value - median
+        if (delta > policy.mad_threshold * spread
+                and delta >= policy.min_absolute_seconds
+                and delta >= policy.min_relative_change * median):
+            ratio = value / median if median > 0 else float("inf")
+            return {"metric": name, "value": round(value, 3), "baseline_median": round(median, 3),
+                    "mad": round(mad, 3), "ratio": round(ratio, 2),
+                    "severity": "fail" if ratio >= policy.fail_ratio else "warning"}
+        return None
+
+    def _check_tests(self, test_timings: Dict[str, float], samples: List[Dict]) -> List[Dict]:
+        """テスト別の遅延（既存テストの悪化・遅い新規テスト）"""
+        regressions = []
+        history: Dict[str, List[float]] = {}
+        for sample in samples:
+            for name, duration in sample.get("test_timings", {}).items():
+                history.setdefault(name, []).append(duration)
+        for name, duration in test_timings.items():
+            past = history.get(name)
+            if not past:
+                if duration >= self.policy.slow_test_seconds and samples:
+                    regressions.append({"metric": "test_duration", "test": name, "value": round(duration, 3),
+                                        "baseline_median": None, "severity": "warning", "new_test": True})
+                continue
+            if len(past) < self.policy.min_samples:
+                continue
+            found = self._check_metric("test_duration", duration, past)
+            if found and duration >= self.policy.slow_test_seconds:
+                # テスト単位の時間はばらつきが大きいため警告に留める
+                found["test"] = name
+                found["severity"] = "warning"
+                regressions.append(found)
+        return regressions
+
+    def detect(self, project: str, branch: str, metrics: Dict[str, float], test_timings: Dict[str, float],
+               base_branch: str = "main") -> RegressionReport:
+        label, samples = self.baseline(project, branch, base_branch)
+        report = RegressionReport(baseline=label, baseline_samples=len(samples))
+        if len(samples) < self.policy.min_samples:
+            report.status = "no_baseline"
+            return report
+
+        for name, value in metrics.items():
+            history = [s["metrics"][name] for s in samples if name in s.get("metrics", {})]
+            if len(history) < self.policy.min_samples:
+                continue
+            found = self._check_metric(name, value, history)
+            if found:
+                report.regressions.append(found)
+        report.regressions.extend(self._check_tests(test_timings, samples))
+
+        if any(r["severity"] == "fail" for r in report.regressions) and self.policy.mode == "fail":
+            report.status = "fail"
+        elif report.regressions:
+            report.status = "warning"
+        return report
+
+    def evaluate(self, task_id: str, worktree_path: Path, details: Dict, project: str,
+                 base_branch: str = "main") -> RegressionReport:
+        """検証結果を判定してから時系列に追加（判定対象自身はベースラインに含めない）"""
+        metrics, test_timings = extract_metrics(details)
+        branch = current_branch(worktree_path)
+        report = self.detect(project, branch, metrics, test_timings, base_branch)
+        if metrics or test_timings:
+            self.record(task_id, project, branch, metrics, test_timings)
+        return report
+
+
+def load_tracker(project_root: Path) -> PerformanceTracker:
+    """プロジェクト設定（.claude/performance_policy.json）付きでトラッカーを生成"""
+    project_root = Path(project_root)
+    policy_data = None
+    try:
+        with open(project_root / ".claude" / "performance_policy.json", 'r', encoding='utf-8') as f:
+            policy_data = json.load(f)
+    except (OSError, ValueError):
+        pass
+    return PerformanceTracker(project_root / ".claude" / "metrics" / "validation_metrics.jsonl",
+                              RegressionPolicy.from_dict(policy_data))
+
+
+def summarize_regressions(regressions: Iterable[Dict], limit: int = 5) -> List[str]:
+    """表示用の1行要約"""
+    lines = []
+    for regression in list(regressions)[:limit]:
+        target = regression.get("test", regression["metric"])
+        if regression.get("new_test"):
+            lines.append(f"{target}: new slow test ({regression['value']}s)")
+        elif "ratio" in regression:
+            lines.append(f"{target}: {regression['value']} vs median {regression['baseline_median']} "
+                         f"(x{regression['ratio']}, {regression['severity']})")
+        else:
+            lines.append(f"{target}: {regression['value']} vs median {regression['baseline_median']} "
+                         f"({regression['severity']})")
+    return lines
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+ストリーミング型サブプロセス実行モジュール
+
+dotnet build / test の出力を逐次読み取り、ビルドエラー・テスト結果を
+生成と同時に解析する。早期中断・ログ保持量の上限・進捗イベント通知・
+資源使用量の計測と予算超過時の停止に対応。
+"""
+
+import os
+import queue
+import re
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from .ResourceAccounting import (ProcessTreeSampler, ResourceBudget, ResourceUsage,
+                                     apply_cpu_rlimit, rusage_peak_rss_mb)
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from ResourceAccounting import (ProcessTreeSampler, ResourceBudget, ResourceUsage,
+                                    apply_cpu_rlimit, rusage_peak_rss_mb)
+
+
+ProgressCallback = Callable[[Dict], None]
+
+
+@dataclass
+class RunResult:
+    """ストリーミング実行結果"""
+    returncode: Optional[int]
+    duration: float = 0.0
+    timed_out: bool = False
+    aborted: bool = False
+    abort_reason: str = ""
+    output_bytes: int = 0
+    line_count: int = 0
+    log_tail: List[str] = field(default_factory=list)
+    usage: Optional[ResourceUsage] = None
+
+    @property
+    def output(self) -> str:
+        return "\n".join(self.log_tail)
+
+
+class OutputParser:
+    """出力行パーサー基底クラス"""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def feed(self, line: str, emit: ProgressCallback) -> Optional[str]:
+        """1行を解析。中断すべき場合は理由文字列を返す"""
+        return None
+
+
+class BuildOutputParser(OutputParser):
+    """MSBuild出力からエラー・警告を抽出"""
+
+    # 例: src/Foo.cs(10,5): error CS1002: ; expected [/path/Foo.csproj]
+    ERROR_PATTERN = re.compile(r':\s*error\s+([A-Z]+\d+)?\s*:?\s*(.*)$', re.IGNORECASE)
+    WARNING_PATTERN = re.compile(r':\s*warning\s+[A-Z]+\d+\s*:', re.IGNORECASE)
+
+    def __init__(self, abort_on_first_error: bool = False, max_errors: int = 50):
+        super().__init__("build")
+        self.abort_on_first_error = abort_on_first_error
+        self.max_errors = max_errors
+        self.errors: List[str] = []
+        self._seen_errors = set()
+        self.warning_count = 0
+
+    def feed(self, line: str, emit: ProgressCallback) -> Optional[str]:
+        if self.ERROR_PATTERN.search(line):
+            error = line.strip()
+            # MSBuild はサマリーで同じエラーを再出力するため重複除去
+            if error not in self._seen_errors:
+                self._seen_errors.add(error)
+                if len(self.errors) < self.max_errors:
+                    self.errors.append(error)
+                emit({"stage": self.stage, "event": "build_error", "message": error})
+                if self.abort_on_first_error:
+                    return f"Build error: {error}"
+        elif self.WARNING_PATTERN.search(line):
+            self.warning_count += 1
+        return None
+
+
+class TestOutputParser(OutputParser):
+    """dotnet test 出力から結果を逐次集計"""
+
+    # 例: "  Failed GameMacroAssistant.Tests.FooTests.Bar [12 ms]"
+    FAILED_PATTERN = re.compile(r'^\s*Failed\s+(\S+)(?:\s+\[[^\]]*\])?\s*$')
+    # 例: "Passed!  - Failed:     0, Passed:    10, Skipped:     0, Total:    10, Duration: 1 s"
+    SUMMARY_PATTERN = re.compile(
+        r'(Passed|Failed)!\s*-\s*Failed:\s*(\d+),\s*Passed:\s*(\d+),\s*Skipped:\s*(\d+),\s*Total:\s*(\d+)'
+    )
+
+    def __init__(self, max_failures: Optional[int] = None):
+        super().__init__("test")
+        self.max_failures = max_failures
+        self.failed_tests: List[str] = []
+        self.counts = {"total_count": 0, "passed_count": 0, "failed_count": 0, "skipped_count": 0}
+        # 最初に見つかったサマリー形式のみ合算する（"new" / "legacy"）
+        self.summary_format: Optional[str] = None
+
+    def feed(self, line: str, emit: ProgressCallback) -> Optional[str]:
+        match = self.FAILED_PATTERN.match(line)
+        if match:
+            self.failed_tests.append(match.group(1))
+            emit({"stage": self.stage, "event": "test_failed", "test": match.group(1),
+                  "failed_so_far": len(self.failed_tests)})
+            if self.max_failures is not None and len(self.failed_tests) >= self.max_failures:
+                return f"Aborted after {len(self.failed_tests)} test failures"
+            return None
+
+        match = self.SUMMARY_PATTERN.search(line)
+        if match and self.summary_format in (None, "new"):
+            # テストプロジェクトごとのサマリーを合算
+            self.summary_format = "new"
+            self._add_counts(total=match.group(5), passed=match.group(3),
+                             failed=match.group(2), skipped=match.group(4))
+            emit({"stage": self.stage, "event": "test_summary", **self.counts})
+            return None
+
+        if "Total tests:" in line and self.summary_format in (None, "legacy"):
+            # 旧形式: "Total tests: 10. Passed: 8. Failed: 2. Skipped: 0."
+            parsed = {}
+            for part in line.split('.'):
+                for label, key in (("Total tests:", "total"), ("Passed:", "passed"),
+                                   ("Failed:", "failed"), ("Skipped:", "skipped")):
+                    if label in part:
+                        try:
+                            parsed[key] = part.split(':')[1].strip()
+                        except IndexError:
+                            pass
+            if parsed:
+                self.summary_format = "legacy"
+                self._add_counts(**parsed)
+                emit({"stage": self.stage, "event": "test_summary", **self.counts})
+        return None
+
+    @property
+    def summary_found(self) -> bool:
+        return self.summary_format is not None
+
+    def _add_counts(self, total="0", passed="0", failed="0", skipped="0") -> None:
+        self.counts["total_count"] += int(total)
+        self.counts["passed_count"] += int(passed)
+        self.counts["failed_count"] += int(failed)
+        self.counts["skipped_count"] += int(skipped)
+
+
+class StreamingRunner:
+    """stdout/stderr を逐次処理するサブプロセス実行器"""
+
+    def __init__(self, max_log_lines: int = 2000, progress_callback: Optional[ProgressCallback] = None,
+                 progress_interval: float = 2.0, sample_interval: float = 0.5):
+        self.max_log_lines = max_log_lines
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+        # プロセスツリーの資源使用量をサンプリングする間隔（秒）
+        self.sample_interval = sample_interval
+
+    def _emit(self, event: Dict) -> None:
+        if self.progress_callback:
+            try:
+                self.progress_callback(event)
+            except Exception as e:
+                print(f"Warning: progress callback failed: {e}")
+
+    @staticmethod
+    def _pump(stream, source: str, lines: "queue.Queue") -> None:
+        try:
+            for line in iter(stream.readline, ''):
+                lines.put((source, line))
+        finally:
+            lines.put((source, None))
+
+    @staticmethod
+    def _kill(process: subprocess.Popen) -> None:
+        """プロセスツリーごと終了（子のMSBuildノード・testhost 等も含む）"""
+        try:
+            if os.name == "posix":
+                os.killpg(process.pid, signal.SIGKILL)
+                return
+            # Windows は process.kill() だと親だけが終わり子が残るため taskkill /T でツリーを終了
+            result = subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                                    capture_output=True, timeout=30)
+            if result.returncode != 0:
+                process.kill()
+        except (ProcessLookupError, PermissionError, OSError, subprocess.TimeoutExpired):
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _has_exited(process: subprocess.Popen) -> bool:
+        """終了済みか（POSIX では rusage を取得するため回収せずに確認）"""
+        if os.name == "posix":
+            try:
+                info = os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT)
+            except ChildProcessError:
+                return True
+            return info is not None
+        return process.poll() is not None
+
+    def _wait(self, process: subprocess.Popen, timeout: float) -> Tuple[int, Optional[object]]:
+        """プロセスを回収し (returncode, rusage) を返す（rusage は POSIX のみ）"""
+        if os.name != "posix":
+            try:
+                return process.wait(timeout=timeout), None
+            except subprocess.TimeoutExpired:
+                self._kill(process)
+                return process.wait(), None
+
+        deadline = time.perf_counter() + timeout
+        options = os.WNOHANG
+        while True:
+            try:
+                pid, status, rusage = os.wait4(process.pid, options)
+            except ChildProcessError:
+                return process.wait(), None
+            if pid:
+                process.returncode = os.waitstatus_to_exitcode(status)
+                return process.returncode, rusage
+            if time.perf_counter() >= deadline:
+                self._kill(process)
+                options = 0
+            else:
+                time.sleep(0.05)
+
+    def run(self, command: List[str], cwd=None, env: Optional[Dict[str, str]] = None,
+            timeout: Optional[float] = None, parser: Optional[OutputParser] = None,
+            budget: Optional[ResourceBudget] = None) -> RunResult:
+        """
+        コマンドを実行し、出力を逐次 parser に渡す
+
+        budget を超えた場合はプロセスグループごと停止し aborted として返す。
+        資源使用量は常に result.usage に記録する。
+
+        Raises:
+            FileNotFoundError: コマンドが存在しない場合
+        """
+        stage = parser.stage if parser else "process"
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            command,
+            cwd=cwd,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            bufsize=1,
+            start_new_session=(os.name == "posix")
+        )
+        self._emit({"stage": stage, "event": "started", "command": command, "pid": process.pid})
+        sampler = ProcessTreeSampler(process.pid)
+        apply_cpu_rlimit(process.pid, budget)
+
+        lines: "queue.Queue" = queue.Queue()
+        readers = [
+            threading.Thread(target=self._pump, args=(process.stdout, "stdout", lines), daemon=True),
+            threading.Thread(target=self._pump, args=(process.stderr, "stderr", lines), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        result = RunResult(returncode=None)
+        tail = deque(maxlen=self.max_log_lines)
+        open_streams = 2
+        deadline = started + timeout if timeout else None
+        last_progress = started
+        last_sample = started
+        idle_after_exit = 0.0
+
+        while open_streams:
+            now = time.perf_counter()
+            if deadline is not None and now >= deadline:
+                result.timed_out = True
+                self._kill(process)
+                break
+            if now - last_sample >= self.sample_interval:
+                last_sample = now
+                rss, cpu = sampler.sample()
+                exceeded = budget.check(cpu, rss, result.output_bytes) if budget else None
+                if exceeded:
+                    result.aborted = True
+                    result.abort_reason = f"Resource budget exceeded: {exceeded}"
+                    self._kill(process)
+                    break
+
+            wait = 0.5
+            if deadline is not None:
+                wait = max(0.0, min(wait, deadline - now))
+            try:
+                source, line = lines.get(timeout=wait)
+            except queue.Empty:
+                # 本体終了後も常駐ノード等がパイプを保持している場合は待ち続けない
+                if self._has_exited(process):
+                    idle_after_exit += wait
+                    if idle_after_exit >= 2.0:
+                        break
+                continue
+
+            if line is None:
+                if source is not None:
+                    open_streams -= 1
+                continue
+
+            result.output_bytes += len(line.encode("utf-8", errors="replace"))
+            result.line_count += 1
+            tail.append(line.rstrip("\r\n"))
+
+            if parser:
+                reason = parser.feed(line, self._emit)
+                if reason:
+                    result.aborted = True
+                    result.abort_reason = reason
+                    self._kill(process)
+                    break
+
+            now = time.perf_counter()
+            if now - last_progress >= self.progress_interval:
+                last_progress = now
+                self._emit({"stage": stage, "event": "progress", "lines": result.line_count,
+                            "elapsed": round(now - started, 1)})
+
+        if not result.aborted:
+            sampler.sample()
+        result.returncode, rusage = self._wait(process, timeout=10)
+        for reader in readers:
+            reader.join(timeout=1)
+
+        result.duration = time.perf_counter() - started
+        result.log_tail = list(tail)
+        result.usage = ResourceUsage(
+            wall_seconds=result.duration,
+            user_cpu_seconds=rusage.ru_utime if rusage else 0.0,
+            system_cpu_seconds=rusage.ru_stime if rusage else 0.0,
+            peak_rss_mb=max(rusage_peak_rss_mb(rusage.ru_maxrss) if rusage else 0.0,
+                            sampler.peak_rss_bytes / 1048576),
+            output_bytes=result.output_bytes,
+            source="rusage" if rusage else sampler.source,
+            budget_exceeded=result.abort_reason if result.abort_reason.startswith("Resource budget") else "",
+        )
+        # rusage に含まれない子孫（回収されない常駐ノード等）の分はサンプリング値で補う
+        untracked_cpu = sampler.cpu_seconds - result.usage.cpu_seconds
+        if untracked_cpu > 0:
+            result.usage.user_cpu_seconds += untracked_cpu
+        self._emit({"stage": stage, "event": "finished", "returncode": result.returncode,
+                    "timed_out": result.timed_out, "aborted": result.aborted,
+                    "duration": round(result.duration, 3)})
+        return result
@@ -13,6 +13,12 @@ import inspect
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Tuple
 from pathlib import Path
+try:
+    from .ProgressSnapshot import ProgressSnapshot, load_progress_snapshot, invalidate_snapshot
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from ProgressSnapshot import ProgressSnapshot, load_progress_snapshot, invalidate_snapshot
 
 
 class ProgressManager:
@@ -221,6 +227,7 @@ class ProgressManager:
                 json.dump(progress_data, f, indent=2, ensure_ascii=False)
             
             temp_file.replace(self.progress_file)
+            invalidate_snapshot(str(self.progress_file))
             return True
             
         except (IOError, OSError) as e:
@@ -273,6 +280,12 @@ class ProgressManager:
         """読み取り専用の進捗データを取得"""
         return self._load_progress()
     
+    def get_snapshot(self) -> ProgressSnapshot:
+        """型付きの共有スナップショットを取得（他モジュールと解析結果を共有）"""
+        if not self.progress_file.exists():
+            return ProgressSnapshot(self._load_progress())
+        return load_progress_snapshot(str(self.progress_file))[1]
+    
     def check_agent_permissions(self, agent_name: str) -> Dict[str, bool]:
         """エージェントの権限状況を確認（診断用）"""
         return {
@@ -324,10 +337,9 @@ if __name__ == "__main__":
     
     # 進捗読み取りテスト
     try:
-        progress = manager.get_readonly_progress()
-        task_count = len(progress.get("active_tasks", {}))
+        snapshot = manager.get_snapshot()
         print(f"\nCurrent project status:")
-        print(f"  Active tasks: {task_count}")
-        print(f"  Last updated: {progress.get('last_updated', 'unknown')}")
+        print(f"  Active tasks: {len(snapshot.active_tasks)}")
+        print(f"  Last updated: {snapshot.last_updated or 'unknown'}")
     except Exception as e:
         print(f"Error reading progress: {e}")
\ No newline at end of file
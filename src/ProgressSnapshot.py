@@ -0,0 +1,522 @@
+#!/usr/bin/env python3
+"""
+progress.json の型付きスナップショットモジュール
+
+progress.json を一度だけ解析し、__slots__ ベースの不変オブジェクトとして
+WorkflowStateMachine / WorkflowController / ProgressVisualizer / ProgressManager
+の間で共有する。
+"""
+
+import json
+import mmap
+import os
+import re
+import sys
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+
+class SnapshotValidationError(ValueError):
+    """progress.json の構造が不正な場合の例外"""
+
+
+def _intern(value: Any, default: str = "") -> str:
+    """ステータス等の頻出文字列をインターン化"""
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        value = str(value)
+    return sys.intern(value)
+
+
+def _freeze(value: Any) -> Any:
+    """ネストしたdict/listを読み取り専用構造に変換"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _expect(value: Any, expected_type: type, path: str) -> Any:
+    """型検証（不一致ならSnapshotValidationError）"""
+    if not isinstance(value, expected_type):
+        raise SnapshotValidationError(
+            f"{path}: expected {expected_type.__name__}, got {type(value).__name__}"
+        )
+    return value
+
+
+def _as_int(value: Any, path: str) -> int:
+    """数値フィールドの検証・変換"""
+    if value is None:
+        return 0
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise SnapshotValidationError(f"{path}: expected number, got {type(value).__name__}")
+    return int(value)
+
+
+def parse_coverage_percent(coverage: Any) -> Optional[float]:
+    """"85%" / 85 形式のカバレッジ表記を数値に変換"""
+    if coverage is None or coverage == "":
+        return None
+    try:
+        if isinstance(coverage, str):
+            return float(coverage.strip().rstrip("%"))
+        return float(coverage)
+    except (TypeError, ValueError):
+        return None
+
+
+class _Frozen:
+    """__slots__ クラス共通の不変化ベース"""
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def _init(self, **fields: Any) -> None:
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __repr__(self) -> str:
+        shown = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[:3])
+        return f"{type(self).__name__}({shown})"
+
+
+class StatusTransition(_Frozen):
+    """タスクの状態遷移記録（status_history の1件）"""
+    __slots__ = ("from_status", "to_status", "timestamp")
+
+    def __init__(self, data: Dict, path: str = "status_history"):
+        _expect(data, dict, path)
+        self._init(
+            from_status=_intern(data.get("from_status"), "unknown"),
+            to_status=_intern(data.get("to_status"), "unknown"),
+            timestamp=data.get("timestamp") or "",
+        )
+
+
+class TaskSnapshot(_Frozen):
+    """タスク情報（active_tasks / current_working_tasks の1件）"""
+    __slots__ = (
+        "task_id", "status", "assignee", "description", "review_status",
+        "sprint", "dependencies", "worktree_path", "branch_name",
+        "last_updated", "current_step", "progress_details",
+        "interruption_point", "status_history", "evidence",
+    )
+
+    def __init__(self, task_id: str, data: Dict, path: str = "active_tasks"):
+        path = f"{path}.{task_id}"
+        _expect(data, dict, path)
+        status = data.get("status", "pending")
+        _expect(status, str, f"{path}.status")
+        history = data.get("status_history") or []
+        _expect(history, list, f"{path}.status_history")
+        dependencies = data.get("dependencies") or []
+        _expect(dependencies, list, f"{path}.dependencies")
+
+        self._init(
+            task_id=_intern(task_id),
+            status=_intern(status),
+            assignee=_intern(data.get("assignee")),
+            description=data.get("description") or "",
+            review_status=_intern(data.get("review_status")),
+            sprint=_intern(data.get("sprint")),
+            dependencies=tuple(_intern(d) for d in dependencies),
+            worktree_path=data.get("worktree_path") or f"worktrees/{task_id}",
+            branch_name=data.get("branch_name") or f"task-{task_id}",
+            last_updated=data.get("last_updated") or "",
+            current_step=_intern(data.get("current_step")),
+            progress_details=_freeze(data.get("progress_details") or {}),
+            interruption_point=_freeze(data.get("interruption_point") or {}),
+            status_history=tuple(
+                StatusTransition(h, f"{path}.status_history[{i}]") for i, h in enumerate(history)
+            ),
+            evidence=_freeze(data.get("evidence") or {}),
+        )
+
+    @property
+    def implementation_progress(self) -> str:
+        return self.progress_details.get("implementation_progress", "")
+
+
+class AgentSnapshot(_Frozen):
+    """エージェント稼働情報（workflow_state.active_agents の1件）"""
+    __slots__ = ("agent_id", "status", "current_task", "last_heartbeat")
+
+    def __init__(self, agent_id: str, data: Dict, path: str = "workflow_state.active_agents"):
+        _expect(data, dict, f"{path}.{agent_id}")
+        current_task = data.get("current_task")
+        self._init(
+            agent_id=_intern(agent_id),
+            status=_intern(data.get("status"), "unknown"),
+            current_task=_intern(current_task) if current_task else None,
+            last_heartbeat=data.get("last_heartbeat") or "",
+        )
+
+
+class WorkflowStateSnapshot(_Frozen):
+    """workflow_state セクション"""
+    __slots__ = (
+        "user_test_pending", "active_agents", "integration_completed",
+        "ready_for_next_sprint", "waiting_for_user",
+        "last_completed_step", "next_step",
+    )
+
+    def __init__(self, data: Optional[Dict], path: str = "workflow_state"):
+        data = _expect(data or {}, dict, path)
+        pending = _expect(data.get("user_test_pending") or [], list, f"{path}.user_test_pending")
+        agents = _expect(data.get("active_agents") or {}, dict, f"{path}.active_agents")
+        integrated = _expect(data.get("integration_completed") or [], list, f"{path}.integration_completed")
+        self._init(
+            user_test_pending=tuple(_intern(t) for t in pending),
+            active_agents=MappingProxyType({
+                agent_id: AgentSnapshot(agent_id, agent_data, f"{path}.active_agents")
+                for agent_id, agent_data in agents.items()
+            }),
+            integration_completed=tuple(_intern(t) for t in integrated),
+            ready_for_next_sprint=bool(data.get("ready_for_next_sprint", False)),
+            waiting_for_user=bool(data.get("waiting_for_user", False)),
+            last_completed_step=str(data.get("last_completed_step", "")),
+            next_step=str(data.get("next_step", "")),
+        )
+
+    def idle_agents(self) -> List[str]:
+        return [a.agent_id for a in self.active_agents.values() if a.status == "idle"]
+
+
+class MetricsSnapshot(_Frozen):
+    """project_metrics セクション"""
+    __slots__ = (
+        "total_tasks_planned", "completed_tasks", "in_progress_tasks",
+        "test_coverage", "test_coverage_percent", "sprint_velocity",
+    )
+
+    def __init__(self, data: Optional[Dict], path: str = "project_metrics"):
+        data = _expect(data or {}, dict, path)
+        coverage = data.get("test_coverage")
+        velocity = data.get("sprint_velocity", 0)
+        if velocity is not None and (isinstance(velocity, bool) or not isinstance(velocity, (int, float))):
+            raise SnapshotValidationError(f"{path}.sprint_velocity: expected number")
+        self._init(
+            total_tasks_planned=_as_int(data.get("total_tasks_planned"), f"{path}.total_tasks_planned"),
+            completed_tasks=_as_int(data.get("completed_tasks"), f"{path}.completed_tasks"),
+            in_progress_tasks=_as_int(data.get("in_progress_tasks"), f"{path}.in_progress_tasks"),
+            test_coverage=str(coverage) if coverage is not None else "",
+            test_coverage_percent=parse_coverage_percent(coverage),
+            sprint_velocity=velocity or 0,
+        )
+
+
+class ProgressSnapshot(_Frozen):
+    """progress.json 全体の不変スナップショット"""
+    __slots__ = (
+        "project_id", "last_updated", "current_phase", "current_sprint",
+        "completed_sprints", "active_tasks", "current_working_tasks",
+        "next_available_tasks", "workflow_state", "metrics",
+        "session_context", "sections", "_status_index",
+    )
+
+    def __init__(self, data: Dict, sections: Optional[Iterable[str]] = None):
+        _expect(data, dict, "progress")
+        active = _expect(data.get("active_tasks") or {}, dict, "active_tasks")
+        working = _expect(data.get("current_working_tasks") or {}, dict, "current_working_tasks")
+        next_tasks = _expect(data.get("next_available_tasks") or [], list, "next_available_tasks")
+        completed_sprints = _expect(data.get("completed_sprints") or [], list, "completed_sprints")
+
+        active_tasks = {tid: TaskSnapshot(tid, t, "active_tasks") for tid, t in active.items()}
+        status_index: Dict[str, List[str]] = {}
+        for task in active_tasks.values():
+            status_index.setdefault(task.status, []).append(task.task_id)
+
+        self._init(
+            project_id=data.get("project_id") or "Unknown",
+            last_updated=data.get("last_updated") or "",
+            current_phase=_intern(data.get("current_phase"), "unknown"),
+            current_sprint=_intern(data.get("current_sprint"), "unknown"),
+            completed_sprints=tuple(_intern(s) for s in completed_sprints),
+            active_tasks=MappingProxyType(active_tasks),
+            current_working_tasks=MappingProxyType({
+                tid: TaskSnapshot(tid, t, "current_working_tasks") for tid, t in working.items()
+            }),
+            next_available_tasks=tuple(_intern(t) for t in next_tasks),
+            workflow_state=WorkflowStateSnapshot(data.get("workflow_state")),
+            metrics=MetricsSnapshot(data.get("project_metrics")),
+            session_context=_freeze(_expect(data.get("session_context") or {}, dict, "session_context")),
+            sections=frozenset(sections) if sections is not None else None,
+            _status_index=MappingProxyType({s: tuple(ids) for s, ids in status_index.items()}),
+        )
+
+    # --- 高速アクセサ ---
+
+    def task(self, task_id: str) -> Optional[TaskSnapshot]:
+        return self.active_tasks.get(task_id) or self.current_working_tasks.get(task_id)
+
+    def task_ids_by_status(self, status: str) -> Tuple[str, ...]:
+        return self._status_index.get(status, ())
+
+    def tasks_by_status(self, status: str) -> Iterator[TaskSnapshot]:
+        for task_id in self._status_index.get(status, ()):
+            yield self.active_tasks[task_id]
+
+    def count_by_status(self, status: str) -> int:
+        return len(self._status_index.get(status, ()))
+
+    def has_review_pending(self) -> bool:
+        return any(t.review_status == "pending" for t in self.active_tasks.values())
+
+    @property
+    def interruption_cause(self) -> Optional[str]:
+        return self.session_context.get("interruption_cause")
+
+
+# --- セクション単位の遅延読み込み ---
+
+_WS = re.compile(rb'[ \t\r\n]*')
+_SCALAR = re.compile(rb'[^,}\]\s]*')
+_MAX_SKIP_DEPTH = 32
+# 所有量指定子は Python 3.11 以降のみ対応
+_POSSESSIVE = sys.version_info >= (3, 11)
+
+
+def _string_pattern(possessive: bool = _POSSESSIVE) -> bytes:
+    """JSON 文字列リテラルに一致する正規表現"""
+    q = b'+' if possessive else b''
+    return rb'"[^"\\]*' + q + rb'(?:\\.[^"\\]*' + q + rb')*' + q + rb'"'
+
+
+def _container_pattern(depth: int, possessive: bool = _POSSESSIVE) -> "re.Pattern":
+    """ネスト深さ depth までの JSON コンテナ全体に一致する正規表現を生成
+
+    括弧の種類の対応は検査しない（読み飛ばし専用）。1回の match で
+    コンテナ終端まで到達するため、Pythonループを回さずに済む。
+    「通常文字の連続 ((文字列|コンテナ) 通常文字の連続)*」と展開して一致の仕方を
+    1通りに限定するので、所有量指定子がない 3.10 でも不一致時のバックトラックは
+    爆発しない（所有量指定子があれば状態を保存しない分さらに速い）。
+    """
+    q = b'+' if possessive else b''
+    string = _string_pattern(possessive)
+    plain = rb'[^"{}\[\]]*' + q
+    inner = plain + rb'(?:' + string + plain + rb')*' + q
+    for _ in range(depth):
+        inner = plain + rb'(?:(?:' + string + rb'|[{\[]' + inner + rb'[}\]])' + plain + rb')*' + q
+    return re.compile(rb'[{\[]' + inner + rb'[}\]]')
+
+
+_STRING_RE = re.compile(_string_pattern())
+_CONTAINER_RE = _container_pattern(_MAX_SKIP_DEPTH)
+
+
+def _skip_ws(buf, pos: int) -> int:
+    return _WS.match(buf, pos).end()
+
+
+def _skip_value(buf, pos: int) -> int:
+    """オブジェクトを構築せずにJSON値を読み飛ばし、終端位置を返す"""
+    head = buf[pos:pos + 1]
+    if head == b'"':
+        m = _STRING_RE.match(buf, pos)
+    elif head in (b'{', b'['):
+        m = _CONTAINER_RE.match(buf, pos)
+    else:
+        m = _SCALAR.match(buf, pos)
+    if not m or m.end() == pos:
+        raise json.JSONDecodeError(
+            f"Cannot skip value (malformed or nested deeper than {_MAX_SKIP_DEPTH})", "", pos
+        )
+    return m.end()
+
+
+def _scan_section_offsets(buf) -> Dict[str, Tuple[int, int]]:
+    """トップレベルの各セクションの (開始, 終了) バイト位置を求める"""
+    offsets: Dict[str, Tuple[int, int]] = {}
+    pos = _skip_ws(buf, 0)
+    if buf[pos:pos + 3] == b'\xef\xbb\xbf':
+        pos = _skip_ws(buf, pos + 3)
+    if buf[pos:pos + 1] != b'{':
+        raise json.JSONDecodeError("Expecting top-level object", "", pos)
+    pos = _skip_ws(buf, pos + 1)
+
+    while buf[pos:pos + 1] != b'}':
+        if buf[pos:pos + 1] != b'"':
+            raise json.JSONDecodeError("Expecting property name", "", pos)
+        key_end = _skip_value(buf, pos)
+        key = json.loads(buf[pos:key_end])
+        pos = _skip_ws(buf, key_end)
+        if buf[pos:pos + 1] != b':':
+            raise json.JSONDecodeError("Expecting ':' delimiter", "", pos)
+        value_start = _skip_ws(buf, pos + 1)
+        value_end = _skip_value(buf, value_start)
+        offsets[key] = (value_start, value_end)
+
+        pos = _skip_ws(buf, value_end)
+        if buf[pos:pos + 1] == b',':
+            pos = _skip_ws(buf, pos + 1)
+        elif buf[pos:pos + 1] != b'}':
+            raise json.JSONDecodeError("Expecting ',' delimiter", "", pos)
+
+    return offsets
+
+
+def cache_dir(progress_file: str) -> str:
+    """progress.json の派生データ（再生成可能なキャッシュ）の置き場所"""
+    return os.path.join(os.path.dirname(os.path.abspath(progress_file)), "cache")
+
+
+def _index_path(progress_file: str) -> str:
+    return os.path.join(cache_dir(progress_file), os.path.basename(progress_file) + ".sections")
+
+
+def _load_section_index(progress_file: str, stat_key: Tuple[int, int]) -> Optional[Dict]:
+    """サイドカーのセクション位置インデックスを読み込み（古ければNone）"""
+    try:
+        with open(_index_path(progress_file), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if (index.get("mtime_ns"), index.get("size")) != stat_key:
+            return None
+        return {k: tuple(v) for k, v in index["offsets"].items()}
+    except (OSError, ValueError, KeyError, AttributeError):
+        return None
+
+
+def _save_section_index(progress_file: str, stat_key: Tuple[int, int],
+                        offsets: Dict[str, Tuple[int, int]]) -> None:
+    """セクション位置インデックスを保存（失敗しても読み込みは継続）"""
+    try:
+        os.makedirs(cache_dir(progress_file), exist_ok=True)
+        temp_file = _index_path(progress_file) + ".tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({"mtime_ns": stat_key[0], "size": stat_key[1], "offsets": offsets}, f)
+        os.replace(temp_file, _index_path(progress_file))
+    except OSError:
+        pass
+
+
+def _decode_sections(buf, offsets: Dict[str, Tuple[int, int]], wanted: FrozenSet[str]) -> Optional[Dict]:
+    """
+    インデックスの位置でセクションをデコード（位置が現在の内容と合わなければ None）
+
+    各範囲の直前が ':'、直後が ',' か '}' であり、範囲全体が JSON 値として
+    解釈できることを確認する。同じ mtime/size のまま書き換えられた場合に
+    古い位置で誤った値を返さないための検査。
+    """
+    size = len(buf)
+    result = {}
+    for key, (start, end) in offsets.items():
+        if key not in wanted:
+            continue
+        if not 0 < start < end <= size:
+            return None
+        before = start - 1
+        while before > 0 and buf[before:before + 1] in b' \t\r\n':
+            before -= 1
+        after = _skip_ws(buf, end)
+        if buf[before:before + 1] != b':' or buf[after:after + 1] not in (b',', b'}'):
+            return None
+        try:
+            result[key] = json.loads(buf[start:end])
+        except ValueError:
+            return None
+    return result
+
+
+def load_progress_sections(progress_file: str, sections: Iterable[str]) -> Dict:
+    """
+    progress.json から指定トップレベルセクションのみを読み込む
+
+    ファイルをmmapし、不要なセクションは正規表現1回で読み飛ばす（Python
+    オブジェクトを生成しない）。各セクションのバイト位置は
+    キャッシュディレクトリ（progress.json と同じ階層の cache/）に mtime/size と
+    共に保存し、ファイルが変わらない限り次回以降は該当範囲のみを直接デコードする。
+    保存済みの位置が内容と合わない場合は走査し直す。
+
+    Raises:
+        FileNotFoundError, json.JSONDecodeError
+    """
+    wanted = frozenset(sections)
+    with open(progress_file, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if st.st_size == 0:
+            raise json.JSONDecodeError("Expecting value", "", 0)
+        stat_key = (st.st_mtime_ns, st.st_size)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            offsets = _load_section_index(progress_file, stat_key)
+            if offsets is not None:
+                decoded = _decode_sections(buf, offsets, wanted)
+                if decoded is not None:
+                    return decoded
+            offsets = _scan_section_offsets(buf)
+            _save_section_index(progress_file, stat_key, offsets)
+            return {
+                key: json.loads(buf[start:end])
+                for key, (start, end) in offsets.items() if key in wanted
+            }
+
+
+# --- 読み込み・共有キャッシュ ---
+
+def _copy_json(value: Any) -> Any:
+    """JSON 由来の値の複製（dict/list のみ再帰的にコピー。deepcopy より高速）"""
+    if isinstance(value, dict):
+        return {k: _copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_json(v) for v in value]
+    return value
+
+
+_cache_lock = threading.Lock()
+_snapshot_cache: Dict[Tuple[str, Optional[FrozenSet[str]]],
+                      Tuple[Tuple[int, int], Dict, ProgressSnapshot]] = {}
+
+
+def _stat_key(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def load_progress_snapshot(progress_file: str,
+                           sections: Optional[Iterable[str]] = None) -> Tuple[Dict, ProgressSnapshot]:
+    """
+    progress.json を読み込み (生データ, スナップショット) を返す
+
+    ファイルの mtime/size が変わらない限り、同一プロセス内の全利用者で
+    解析結果を共有する。生データは呼び出しごとの複製を返すため、
+    利用者が変更してもキャッシュや他の利用者には影響しない。
+    sections を指定した場合はそのセクションのみを読み込む（有効な全体
+    スナップショットがキャッシュにあればそれを再利用する）。
+
+    Raises:
+        FileNotFoundError, json.JSONDecodeError, SnapshotValidationError
+    """
+    path = os.path.abspath(progress_file)
+    wanted = frozenset(sections) if sections is not None else None
+    stat_key = _stat_key(path)
+    with _cache_lock:
+        for cache_key in ((path, None), (path, wanted)):
+            cached = _snapshot_cache.get(cache_key)
+            if cached and cached[0] == stat_key:
+                return _copy_json(cached[1]), cached[2]
+
+    if wanted is None:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    else:
+        data = load_progress_sections(path, wanted)
+    snapshot = ProgressSnapshot(data, wanted)
+
+    with _cache_lock:
+        _snapshot_cache[(path, wanted)] = (stat_key, data, snapshot)
+    return _copy_json(data), snapshot
+
+
+def invalidate_snapshot(progress_file: str) -> None:
+    """書き込み後にキャッシュを破棄"""
+    path = os.path.abspath(progress_file)
+    with _cache_lock:
+        for cache_key in [k for k in _snapshot_cache if k[0] == path]:
+            del _snapshot_cache[cache_key]
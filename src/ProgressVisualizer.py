@@ -4,24 +4,66 @@ GameMacroAssistant Progress Visualizer
 プロジェクト進捗の視覚的表示システム
 """
 
+import argparse
+import contextlib
+import io
 import json
 import os
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional
 import sys
+try:
+    from .ProgressSnapshot import load_progress_snapshot, SnapshotValidationError
+    from .CompletionForecast import CompletionForecaster
+    from .FileWatcher import FileChangeWatcher
+    from .TaskQuery import TaskQuery, QueryError, get_task_index, DEFAULT_PAGE_SIZE
+    from .FlowMetrics import FlowMetricsStore, choose_bucket
+except ImportError:
+    sys.path.append(os.path.dirname(__file__))
+    from ProgressSnapshot import load_progress_snapshot, SnapshotValidationError
+    from CompletionForecast import CompletionForecaster
+    from FileWatcher import FileChangeWatcher
+    from TaskQuery import TaskQuery, QueryError, get_task_index, DEFAULT_PAGE_SIZE
+    from FlowMetrics import FlowMetricsStore, choose_bucket
 
 class ProgressVisualizer:
-    def __init__(self, progress_file_path: str = ".claude/progress.json"):
+    # コマンドごとに必要なprogress.jsonのトップレベルセクション
+    # （ここに無いセクションは読み飛ばされる）
+    COMMAND_SECTIONS = {
+        "overview": ("current_sprint", "current_phase", "project_metrics"),
+        "tasks": ("active_tasks", "current_working_tasks", "next_available_tasks"),
+        "agents": ("workflow_state",),
+        "timeline": ("last_updated", "completed_sprints", "session_context"),
+        "dashboard": ("project_id", "current_sprint", "current_phase",
+                      "project_metrics", "current_working_tasks"),
+    }
+    # watch で表示するビューと、再描画の要否を判定する入力セクション
+    # （overview の完了予測と timeline の累積フローは active_tasks の履歴に依存する）
+    WATCH_INPUTS = {
+        "overview": COMMAND_SECTIONS["overview"] + ("active_tasks",),
+        "tasks": COMMAND_SECTIONS["tasks"],
+        "agents": COMMAND_SECTIONS["agents"],
+        "timeline": COMMAND_SECTIONS["timeline"] + ("active_tasks",),
+    }
+    COMMAND_SECTIONS["watch"] = tuple(sorted({s for inputs in WATCH_INPUTS.values() for s in inputs}))
+    
+    def __init__(self, progress_file_path: str = ".claude/progress.json",
+                 sections: Optional[tuple] = None):
         self.progress_file = progress_file_path
+        self.sections = sections
         self.progress_data = None
+        self.snapshot = None
+        # 履歴ベースの完了予測（active_tasks は予測の再計算時のみ読み込む）
+        self.forecaster = CompletionForecaster(progress_file_path)
+        # status_history の増分集計（active_tasks は新しい遷移がありそうな時のみ読み込む）
+        self.flow_metrics = FlowMetricsStore(progress_file_path)
         self.load_progress()
     
     def load_progress(self) -> bool:
         """progress.jsonファイルを読み込む"""
         try:
             if os.path.exists(self.progress_file):
-                with open(self.progress_file, 'r', encoding='utf-8') as f:
-                    self.progress_data = json.load(f)
+                self.progress_data, self.snapshot = load_progress_snapshot(self.progress_file, self.sections)
                 return True
             else:
                 print(f"ERROR: {self.progress_file} not found")
@@ -29,6 +71,9 @@ class ProgressVisualizer:
         except json.JSONDecodeError as e:
             print(f"ERROR: Invalid JSON format: {e}")
             return False
+        except SnapshotValidationError as e:
+            print(f"ERROR: Invalid progress structure: {e}")
+            return False
         except Exception as e:
             print(f"ERROR: File read error: {e}")
             return False
@@ -45,22 +90,34 @@ class ProgressVisualizer:
         return f"{bar} {percentage:.1f}%"
     
     def estimate_completion_time(self) -> Optional[str]:
-        """完了予想時間を計算"""
-        if not self.progress_data:
+        """
+        完了予想時間を計算
+        
+        完了済みタスクのサイクルタイム履歴が十分あればモンテカルロ予測の
+        P50 / P85 / P95、なければスプリントベロシティからの単一の予想日時。
+        """
+        if not self.snapshot:
             return None
         
-        metrics = self.progress_data.get("project_metrics", {})
-        total_tasks = metrics.get("total_tasks_planned", 0)
-        completed_tasks = metrics.get("completed_tasks", 0)
-        velocity = metrics.get("sprint_velocity", 1)
+        metrics = self.snapshot.metrics
+        total_tasks = metrics.total_tasks_planned
+        completed_tasks = metrics.completed_tasks
+        velocity = metrics.sprint_velocity
         
-        if total_tasks == 0 or velocity == 0:
+        if total_tasks == 0:
             return None
         
         remaining_tasks = total_tasks - completed_tasks
         if remaining_tasks <= 0:
             return "[COMPLETED]"
         
+        forecast = self.forecaster.forecast(remaining_tasks)
+        if forecast:
+            return forecast.format()
+        
+        if velocity == 0:
+            return None
+        
         # 1スプリントあたりの平均タスク数から予想
         sprints_remaining = max(1, remaining_tasks / velocity)
         days_remaining = sprints_remaining * 7  # 1スプリント = 7日と仮定
@@ -82,20 +139,16 @@ class ProgressVisualizer:
     
     def show_sprint_overview(self):
         """スプリント概要を表示"""
-        if not self.progress_data:
+        if not self.snapshot:
             return
         
-        current_sprint = self.progress_data.get("current_sprint", "unknown")
-        current_phase = self.progress_data.get("current_phase", "unknown")
-        
-        print(f"🎯 スプリント: {current_sprint}")
-        print(f"📊 現在フェーズ: {current_phase}")
+        print(f"🎯 スプリント: {self.snapshot.current_sprint}")
+        print(f"📊 現在フェーズ: {self.snapshot.current_phase}")
         
         # プロジェクト全体の進捗
-        metrics = self.progress_data.get("project_metrics", {})
-        total_tasks = metrics.get("total_tasks_planned", 0)
-        completed_tasks = metrics.get("completed_tasks", 0)
-        in_progress_tasks = metrics.get("in_progress_tasks", 0)
+        metrics = self.snapshot.metrics
+        total_tasks = metrics.total_tasks_planned
+        completed_tasks = metrics.completed_tasks
         
         progress_bar = self.create_progress_bar(completed_tasks, total_tasks)
         print(f"📈 全体進捗: {progress_bar} ({completed_tasks}/{total_tasks})")
@@ -106,57 +159,61 @@ class ProgressVisualizer:
         
         print()
     
-    def show_active_tasks(self):
-        """アクティブタスクを表示"""
-        if not self.progress_data:
+    def show_active_tasks(self, query: Optional[TaskQuery] = None):
+        """
+        タスク一覧を表示
+
+        索引を使って検索し、1ページ分をジェネレーターから逐次表示する
+        （省略時は task_id 順の先頭ページ）。続きがあれば次ページのカーソルを表示する。
+        """
+        if not self.snapshot:
             return
+        query = query or TaskQuery()
         
-        print("📋 タスク状況:")
+        counts = get_task_index(self.snapshot).counts("status")
+        summary = ", ".join(f"{self.get_task_status_icon(status)} {status} {count}"
+                            for status, count in sorted(counts.items()))
+        print(f"📋 タスク状況 ({summary}):")
         print("-" * 50)
         
-        # 完了タスク
-        active_tasks = self.progress_data.get("active_tasks", {})
-        completed_count = 0
-        for task_id, task_data in active_tasks.items():
-            if task_data.get("status") == "completed":
-                completed_count += 1
-                icon = self.get_task_status_icon("completed")
-                description = task_data.get("description", "説明なし")
-                assignee = task_data.get("assignee", "未割当")
-                print(f"  {icon} {task_id}: {description} ({assignee})")
-        
-        # 進行中タスク
-        working_tasks = self.progress_data.get("current_working_tasks", {})
-        for task_id, task_data in working_tasks.items():
-            icon = self.get_task_status_icon("in_progress")
-            description = task_data.get("description", "説明なし")
-            assignee = task_data.get("assignee", "未割当")
-            progress = task_data.get("progress_details", {}).get("implementation_progress", "不明")
-            print(f"  {icon} {task_id}: {description} ({assignee}) - {progress}")
+        working = self.snapshot.current_working_tasks
+        shown = 0
+        for task in query.iter_tasks(self.snapshot):
+            shown += 1
+            icon = self.get_task_status_icon(task.status)
+            description = task.description or "説明なし"
+            assignee = task.assignee or "未割当"
+            if task.task_id not in working:
+                print(f"  {icon} {task.task_id}: {description} ({assignee})")
+                continue
+            progress = working[task.task_id].implementation_progress or "不明"
+            print(f"  {icon} {task.task_id}: {description} ({assignee}) - {progress}")
             
             # 中断情報がある場合
-            if "interruption_point" in task_data:
-                interruption = task_data["interruption_point"]
+            interruption = working[task.task_id].interruption_point
+            if interruption:
                 reason = interruption.get("reason", "不明")
                 next_action = interruption.get("next_action", "不明")
                 print(f"      ⚠️  中断: {reason} → 次: {next_action}")
         
-        # 待機中タスク
-        next_tasks = self.progress_data.get("next_available_tasks", [])
+        if not shown:
+            print("  該当するタスクはありません")
+        if query.next_cursor:
+            print(f"  … 続き: --cursor={query.next_cursor}")
+        
+        # 着手可能タスク（一覧は --status=pending などで絞り込む）
+        next_tasks = self.snapshot.next_available_tasks
         if next_tasks:
-            print(f"  ⏳ 待機中: {', '.join(next_tasks[:3])}")
-            if len(next_tasks) > 3:
-                print(f"      他{len(next_tasks) - 3}個...")
+            print(f"  ⏳ 着手可能: {len(next_tasks)}個")
         
         print()
     
     def show_agent_status(self):
         """エージェント稼働状況を表示"""
-        if not self.progress_data:
+        if not self.snapshot:
             return
         
-        workflow_state = self.progress_data.get("workflow_state", {})
-        active_agents = workflow_state.get("active_agents", {})
+        active_agents = self.snapshot.workflow_state.active_agents
         
         if not active_agents:
             return
@@ -164,10 +221,10 @@ class ProgressVisualizer:
         print("🤖 エージェント状況:")
         print("-" * 30)
         
-        for agent_name, agent_data in active_agents.items():
-            status = agent_data.get("status", "unknown")
-            current_task = agent_data.get("current_task")
-            last_heartbeat = agent_data.get("last_heartbeat", "不明")
+        for agent_name, agent in active_agents.items():
+            status = agent.status
+            current_task = agent.current_task
+            last_heartbeat = agent.last_heartbeat or "不明"
             
             status_icon = "🟢" if status == "working" else "⚪" if status == "idle" else "🔴"
             
@@ -189,15 +246,14 @@ class ProgressVisualizer:
     
     def show_test_coverage(self):
         """テストカバレッジ情報を表示"""
-        if not self.progress_data:
+        if not self.snapshot:
             return
         
-        metrics = self.progress_data.get("project_metrics", {})
-        coverage = metrics.get("test_coverage")
+        coverage = self.snapshot.metrics.test_coverage
         
         if coverage:
             try:
-                coverage_pct = float(coverage.replace('%', ''))
+                coverage_pct = self.snapshot.metrics.test_coverage_percent
                 coverage_bar = self.create_progress_bar(int(coverage_pct), 100, width=15)
                 
                 # カバレッジ品質の判定
@@ -219,24 +275,24 @@ class ProgressVisualizer:
     
     def show_timeline(self):
         """最近の活動タイムラインを表示"""
-        if not self.progress_data:
+        if not self.snapshot:
             return
         
         print("📅 最近の活動:")
         print("-" * 40)
         
         # 最後の更新時刻
-        last_updated = self.progress_data.get("last_updated")
+        last_updated = self.snapshot.last_updated
         if last_updated:
             print(f"  📝 最終更新: {last_updated}")
         
         # 完了したスプリント
-        completed_sprints = self.progress_data.get("completed_sprints", [])
+        completed_sprints = self.snapshot.completed_sprints
         if completed_sprints:
             print(f"  ✅ 完了スプリント: {', '.join(completed_sprints)}")
         
         # セッション情報
-        session_context = self.progress_data.get("session_context", {})
+        session_context = self.snapshot.session_context
         if session_context:
             last_session = session_context.get("last_session_end")
             interruption_cause = session_context.get("interruption_cause")
@@ -247,28 +303,66 @@ class ProgressVisualizer:
                 print(f"  ⚠️ 中断原因: {interruption_cause}")
         
         print()
+        self.show_cumulative_flow()
+    
+    def show_cumulative_flow(self, bucket: Optional[str] = None, width: int = 30):
+        """
+        累積フロー・バーンダウンを表示
+
+        各行はバケット末時点の完了(█)・作業中(▓)・未着手(░)の帯と、
+        WIP・残り件数・バケット内の完了件数・サイクルタイム中央値。
+        """
+        self.flow_metrics.update()
+        bucket = bucket or choose_bucket(self.flow_metrics.span_days())
+        series = self.flow_metrics.series(bucket)
+        if series is None:
+            return
+        
+        unit = {"day": "日", "week": "週", "month": "月"}[bucket]
+        print(f"📈 累積フロー（{unit}単位）:")
+        print("-" * 40)
+        totals = [series.completed[i] + series.remaining[i] for i in range(len(series.labels))]
+        scale = width / max(max(totals), 1)
+        for i, label in enumerate(series.labels):
+            done_len = round(series.completed[i] * scale)
+            wip_len = round(series.wip[i] * scale)
+            wait_len = max(0, round(totals[i] * scale) - done_len - wip_len)
+            bar = "█" * done_len + "▓" * wip_len + "░" * wait_len
+            cycle = series.cycle_time_p50[i]
+            cycle_text = f"{cycle:.1f}日" if cycle is not None else "-"
+            print(f"  {label} {bar:<{width}} WIP {series.wip[i]:>3} 残り {series.remaining[i]:>4} "
+                  f"完了 +{series.throughput[i]:<3} CT {cycle_text}")
+        
+        if series.cycle_times:
+            lead = sorted(series.lead_times)
+            cycle = sorted(series.cycle_times)
+            print(f"  ⏱️ リードタイム 中央値 {lead[len(lead) // 2]:.1f}日 / "
+                  f"サイクルタイム 中央値 {cycle[len(cycle) // 2]:.1f}日 ({len(cycle)}件)")
+        print()
     
     def show_dashboard(self):
         """Display complete dashboard"""
-        if not self.progress_data:
+        if not self.snapshot:
             print("ERROR: Failed to load progress.json")
             return
         
+        snapshot = self.snapshot
+        
         print("GameMacroAssistant Development Dashboard")
         print("=" * 60)
         print()
         
         # Basic project info
-        print(f"Project: {self.progress_data.get('project_id', 'Unknown')}")
-        print(f"Current Sprint: {self.progress_data.get('current_sprint', 'Unknown')}")
-        print(f"Current Phase: {self.progress_data.get('current_phase', 'Unknown')}")
+        print(f"Project: {snapshot.project_id}")
+        print(f"Current Sprint: {snapshot.current_sprint}")
+        print(f"Current Phase: {snapshot.current_phase}")
         print()
         
         # Progress
-        metrics = self.progress_data.get("project_metrics", {})
-        total_tasks = metrics.get("total_tasks_planned", 0)
-        completed_tasks = metrics.get("completed_tasks", 0)
-        in_progress_tasks = metrics.get("in_progress_tasks", 0)
+        metrics = snapshot.metrics
+        total_tasks = metrics.total_tasks_planned
+        completed_tasks = metrics.completed_tasks
+        in_progress_tasks = metrics.in_progress_tasks
         
         if total_tasks > 0:
             progress_bar = self.create_progress_bar(completed_tasks, total_tasks)
@@ -278,15 +372,15 @@ class ProgressVisualizer:
         print()
         
         # Interrupted work
-        working_tasks = self.progress_data.get("current_working_tasks", {})
+        working_tasks = snapshot.current_working_tasks
         if working_tasks:
             print("INTERRUPTED WORK:")
-            for task_id, task_data in working_tasks.items():
-                desc = task_data.get("description", "No description")
-                progress = task_data.get("progress_details", {}).get("implementation_progress", "Unknown")
+            for task_id, task in working_tasks.items():
+                desc = task.description or "No description"
+                progress = task.implementation_progress or "Unknown"
                 print(f"  {task_id}: {desc} ({progress})")
                 
-                interruption = task_data.get("interruption_point", {})
+                interruption = task.interruption_point
                 if interruption:
                     reason = interruption.get("reason", "Unknown")
                     next_action = interruption.get("next_action", "Unknown")
@@ -295,27 +389,179 @@ class ProgressVisualizer:
             print()
         
         # Test coverage
-        coverage = metrics.get("test_coverage", "Unknown")
+        coverage = metrics.test_coverage or "Unknown"
         print(f"Test Coverage: {coverage}")
         
         print()
         print("Dashboard Complete")
 
+    def render_view(self, view: str) -> str:
+        """ビューの表示内容を文字列として取得"""
+        show = {
+            "overview": self.show_sprint_overview,
+            "tasks": self.show_active_tasks,
+            "agents": self.show_agent_status,
+            "timeline": self.show_timeline,
+        }[view]
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            show()
+        return buffer.getvalue()
+    
+    def watch(self, poll_interval: float = 1.0, refresh_interval: float = 60.0,
+              max_updates: Optional[int] = None, out=None):
+        """
+        progress.json の変更を待ち、変わったビューだけを再描画
+        
+        ファイルが実際に変わった時だけ再読み込みし、各ビューの入力セクションを
+        前回と比較して変わったビューだけを再描画する。経過時間に依存する表示
+        （ハートビートの鮮度など）のため refresh_interval ごとに描画内容を比較する。
+        """
+        out = out or sys.stdout
+        self.sections = self.COMMAND_SECTIONS["watch"]
+        screen = _WatchScreen(out, list(self.WATCH_INPUTS))
+        previous_inputs: Dict[str, tuple] = {}
+        updates = 0
+        
+        with FileChangeWatcher(self.progress_file, poll_interval) as watcher:
+            changed = True
+            while max_updates is None or updates < max_updates:
+                if changed:
+                    self.load_progress()
+                data = self.progress_data or {}
+                for view, sections in self.WATCH_INPUTS.items():
+                    inputs = tuple(data.get(section) for section in sections)
+                    if not changed or previous_inputs.get(view) != inputs:
+                        previous_inputs[view] = inputs
+                        screen.update(view, self.render_view(view))
+                if screen.flush(f"📡 {self.progress_file} ({watcher.backend}) "
+                                f"更新: {datetime.now().strftime('%H:%M:%S')}"):
+                    updates += 1
+                changed = watcher.wait(refresh_interval)
+
+
+class _WatchScreen:
+    """ビュー単位の差分描画（端末では変わった行だけを書き換える）"""
+    
+    def __init__(self, out, views: List[str]):
+        self.out = out
+        self.views = views
+        self.lines: Dict[str, List[str]] = {view: [] for view in views}
+        self.drawn_heights: Optional[Dict[str, int]] = None
+        self.dirty: set = set()
+        self.tty = hasattr(out, "isatty") and out.isatty()
+    
+    def update(self, view: str, text: str) -> None:
+        lines = text.split("\n")[:-1] if text else []
+        if lines != self.lines[view]:
+            self.lines[view] = lines
+            self.dirty.add(view)
+    
+    def flush(self, header: str) -> bool:
+        """変更があれば描画して True"""
+        if not self.dirty:
+            return False
+        if not self.tty:
+            self.out.write(f"{header}\n")
+            for view in self.views:
+                if view in self.dirty:
+                    self.out.write("".join(f"{line}\n" for line in self.lines[view]))
+        else:
+            heights = {view: len(lines) for view, lines in self.lines.items()}
+            try:
+                rows = os.get_terminal_size(self.out.fileno()).lines
+            except (AttributeError, OSError, ValueError):
+                rows = 0
+            if heights != self.drawn_heights or (rows and sum(heights.values()) + 1 > rows):
+                # 行数が変わったビューがあれば全体を描き直す
+                body = "".join(f"{line}\n" for view in self.views for line in self.lines[view])
+                self.out.write(f"\x1b[H\x1b[2J{header}\n{body}")
+            else:
+                parts = [f"\x1b[1;1H\x1b[2K{header}"]
+                row = 2
+                for view in self.views:
+                    if view in self.dirty:
+                        parts.extend(f"\x1b[{row + i};1H\x1b[2K{line}" for i, line in enumerate(self.lines[view]))
+                    row += heights[view]
+                parts.append(f"\x1b[{row};1H")
+                self.out.write("".join(parts))
+            self.drawn_heights = heights
+        self.out.flush()
+        self.dirty.clear()
+        return True
+
+
+_QUERY_VALUE_OPTIONS = ("--status", "--assignee", "--sprint", "--filter", "--sort", "--cursor")
+
+
+def _join_option_values(args: List[str]) -> List[str]:
+    """
+    "--sort -age" を "--sort=-age" に結合する
+
+    argparse は - で始まる値（降順のソート式・- で始まるカーソル）を
+    別のオプションとみなして「値がない」と扱うため。
+    """
+    joined = []
+    index = 0
+    while index < len(args):
+        arg = args[index]
+        if arg in _QUERY_VALUE_OPTIONS and index + 1 < len(args):
+            joined.append(f"{arg}={args[index + 1]}")
+            index += 2
+        else:
+            joined.append(arg)
+            index += 1
+    return joined
+
+
+def parse_task_query(args: List[str]) -> TaskQuery:
+    """tasks コマンドの検索オプションを解釈する"""
+    parser = argparse.ArgumentParser(prog="ProgressVisualizer.py tasks")
+    parser.add_argument("--status", help="ステータス（| 区切りで複数）")
+    parser.add_argument("--assignee", help="担当者（| 区切りで複数）")
+    parser.add_argument("--sprint", help="スプリント（| 区切りで複数）")
+    parser.add_argument("--filter", default="", help="フィルタ式（例: 'status=pending age>3d'）")
+    parser.add_argument("--sort", default="task_id",
+                        help="ソート式（カンマ区切り、- は降順。例: --sort -age,task_id）")
+    parser.add_argument("--limit", type=int, default=DEFAULT_PAGE_SIZE, help="1ページの件数")
+    parser.add_argument("--cursor", help="前ページの末尾に表示されたカーソル")
+    options = parser.parse_args(_join_option_values(args))
+    if options.limit <= 0:
+        raise QueryError("--limit must be positive")
+    terms = [options.filter] + [f"{name}={getattr(options, name)}"
+                                for name in ("status", "assignee", "sprint")
+                                if getattr(options, name)]
+    return TaskQuery(" ".join(terms), options.sort, options.limit, options.cursor)
+
+
 def main():
     """メイン実行関数"""
-    visualizer = ProgressVisualizer()
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else "dashboard"
+    sections = ProgressVisualizer.COMMAND_SECTIONS.get(
+        command, ProgressVisualizer.COMMAND_SECTIONS["dashboard"]
+    )
+    visualizer = ProgressVisualizer(sections=sections)
     
     # コマンドライン引数による機能選択
     if len(sys.argv) > 1:
-        command = sys.argv[1].lower()
         if command == "overview":
             visualizer.show_sprint_overview()
         elif command == "tasks":
-            visualizer.show_active_tasks()
+            try:
+                query = parse_task_query(sys.argv[2:])
+            except QueryError as e:
+                print(f"❌ {e}")
+                sys.exit(2)
+            visualizer.show_active_tasks(query)
         elif command == "agents":
             visualizer.show_agent_status()
         elif command == "timeline":
             visualizer.show_timeline()
+        elif command == "watch":
+            try:
+                visualizer.watch()
+            except KeyboardInterrupt:
+                print()
         else:
             visualizer.show_dashboard()
     else:
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+宣言的品質ゲートエンジン
+
+ゲートを設定（.claude/quality_gates.json）で定義し、ArtifactValidator が保存した
+タスクごとの最新検証結果（なければ progress.json の完了証跡）に対して評価する。
+タスク単位の評価結果は入力（検証結果ファイル・証跡・ステータス・設定）の
+指紋でキャッシュし、変化したタスクだけを再計算する。
+"""
+
+import json
+import operator
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from .ProgressSnapshot import ProgressSnapshot, TaskSnapshot
+    from .ValidationCache import validation_cache_dir
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from ProgressSnapshot import ProgressSnapshot, TaskSnapshot
+    from ValidationCache import validation_cache_dir
+
+
+_OPERATORS = {
+    ">=": operator.ge,
+    "<=": operator.le,
+    ">": operator.gt,
+    "<": operator.lt,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+# 設定ファイルがない場合のゲート（従来の check_quality_gates と同じキー）
+DEFAULT_GATES = [
+    {"name": "test_coverage_ok", "scope": "project", "metric": "project_coverage_percent", "op": ">=", "value": 80,
+     "on_missing": "fail"},
+    {"name": "diff_coverage_ok", "scope": "task", "metric": "diff_coverage_percent", "op": ">=", "value": 80},
+    {"name": "no_performance_regressions", "scope": "task", "metric": "performance_failures", "op": "==", "value": 0},
+    {"name": "no_critical_bugs", "scope": "project", "metric": "open_defects", "op": "==", "value": 0},
+    {"name": "all_tests_passing", "scope": "task", "metric": "failed_tests", "op": "==", "value": 0},
+    {"name": "build_warnings_ok", "scope": "task", "metric": "build_warnings", "op": "<=", "value": 50,
+     "blocking": False},
+]
+
+# 不具合ありとみなすタスク状態
+DEFECT_STATUSES = {"bug_fixing"}
+DEFECT_REVIEW_STATUSES = {"rejected", "failed"}
+
+
+@dataclass(frozen=True)
+class Gate:
+    """1つの品質ゲート定義"""
+    name: str
+    metric: str
+    op: str
+    value: float
+    scope: str = "task"          # "task": 検証結果のある全タスクで成立 / "project": プロジェクト指標
+    on_missing: str = "pass"     # 指標が得られない場合の扱い（"pass" / "fail"）
+    blocking: bool = True        # ready_for_integration の条件に含めるか
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Gate":
+        if data.get("op") not in _OPERATORS:
+            raise ValueError(f"Unknown operator in gate {data.get('name')}: {data.get('op')}")
+        return cls(
+            name=data["name"],
+            metric=data["metric"],
+            op=data["op"],
+            value=data["value"],
+            scope=data.get("scope", "task"),
+            on_missing=data.get("on_missing", "pass"),
+            blocking=data.get("blocking", True),
+        )
+
+    def check(self, actual: Optional[float]) -> bool:
+        if actual is None:
+            return self.on_missing == "pass"
+        return _OPERATORS[self.op](actual, self.value)
+
+
+def task_metrics(result: Dict) -> Dict[str, Optional[float]]:
+    """検証結果（validation_details 形式）からゲート用の指標を抽出"""
+    test_results = result.get("test_results") or {}
+    coverage = result.get("coverage") or {}
+    performance = result.get("performance") or {}
+    return {
+        "failed_tests": test_results.get("failed_count"),
+        "total_tests": test_results.get("total_count"),
+        "coverage_percent": None if coverage.get("partial") else coverage.get("coverage_percent"),
+        "diff_coverage_percent": coverage.get("diff_coverage_percent"),
+        "build_warnings": result.get("build_warnings"),
+        "build_success": 1 if result.get("build_success") else 0 if "build_success" in result else None,
+        "performance_failures": sum(1 for r in performance.get("regressions", []) if r.get("severity") == "fail"),
+        "performance_warnings": sum(1 for r in performance.get("regressions", []) if r.get("severity") != "fail"),
+    }
+
+
+class QualityGateEngine:
+    """品質ゲートの評価器（タスク単位の増分再計算）"""
+
+    def __init__(self, project_root: Path, config_file: Optional[Path] = None):
+        self.project_root = Path(project_root)
+        self.config_file = Path(config_file or self.project_root / ".claude" / "quality_gates.json")
+        self.results_dir = validation_cache_dir(self.project_root) / "latest"
+        self._lock = threading.Lock()
+        self._config_key: Optional[Tuple[int, int]] = None
+        self.gates: List[Gate] = [Gate.from_dict(g) for g in DEFAULT_GATES]
+        # task_id -> (指紋, 指標)
+        self._task_cache: Dict[str, Tuple[Tuple, Dict[str, Optional[float]]]] = {}
+        self.recomputed = 0
+
+    def _load_config(self) -> None:
+        """設定ファイルが変わっていれば再読み込み（ゲート変更時はタスクキャッシュも破棄）"""
+        try:
+            st = os.stat(self.config_file)
+            config_key = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            config_key = None
+        if config_key == self._config_key:
+            return
+        gates = [Gate.from_dict(g) for g in DEFAULT_GATES]
+        if config_key is not None:
+            try:
+                with open(self.config_file, 'r', encoding='utf-8') as f:
+                    gates = [Gate.from_dict(g) for g in json.load(f).get("gates", [])]
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Warning: quality gate config invalid, using defaults: {e}")
+        self.gates = gates
+        self._config_key = config_key
+        self._task_cache.clear()
+
+    def _latest_result(self, task_id: str) -> Tuple[Optional[Tuple[int, int]], Optional[Path]]:
+        path = self.results_dir / f"{task_id}.json"
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None, None
+        return (st.st_mtime_ns, st.st_size), path
+
+    def _metrics_for(self, task: TaskSnapshot) -> Dict[str, Optional[float]]:
+        """タスクの指標（入力の指紋が変わった場合のみ再抽出）"""
+        evidence = task.evidence.get("completion_evidence") or {}
+        stat_key, path = self._latest_result(task.task_id)
+        fingerprint = (stat_key, evidence.get("validation_timestamp"), task.status, task.review_status)
+        cached = self._task_cache.get(task.task_id)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+
+        result: Dict[str, Any] = dict(evidence)
+        if path is not None:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    latest = json.load(f)
+                # 最新の検証結果を優先（性能判定は証跡側にしかない場合がある）
+                latest.setdefault("performance", result.get("performance"))
+                result = latest
+            except (OSError, ValueError):
+                pass
+        metrics = task_metrics(result) if result else {}
+        self._task_cache[task.task_id] = (fingerprint, metrics)
+        self.recomputed += 1
+        return metrics
+
+    def _project_metrics(self, snapshot: ProgressSnapshot) -> Dict[str, Optional[float]]:
+        open_defects = sum(
+            1 for task in snapshot.active_tasks.values()
+            if task.status in DEFECT_STATUSES or task.review_status in DEFECT_REVIEW_STATUSES
+        )
+        return {
+            "project_coverage_percent": snapshot.metrics.test_coverage_percent,
+            "open_defects": open_defects,
+            "completed_tasks": snapshot.metrics.completed_tasks,
+        }
+
+    def evaluate(self, snapshot: ProgressSnapshot) -> Dict[str, Dict]:
+        """
+        全ゲートを評価
+
+        Returns:
+            {gate_name: {"passed", "blocking", "failing_tasks", "value"}} と
+            "ready_for_integration"（blocking ゲートが全て成立）
+        """
+        with self._lock:
+            self._load_config()
+            project = self._project_metrics(snapshot)
+            per_task = {
+                task_id: self._metrics_for(task)
+                for task_id, task in snapshot.active_tasks.items()
+            }
+            # 削除されたタスクのキャッシュを破棄
+            for task_id in set(self._task_cache) - set(per_task):
+                del self._task_cache[task_id]
+
+            report: Dict[str, Dict] = {}
+            for gate in self.gates:
+                if gate.scope == "project":
+                    value = project.get(gate.metric)
+                    report[gate.name] = {"passed": gate.check(value), "blocking": gate.blocking,
+                                         "failing_tasks": [], "value": value}
+                    continue
+                failing = [
+                    task_id for task_id, metrics in per_task.items()
+                    if metrics and not gate.check(metrics.get(gate.metric))
+                ]
+                report[gate.name] = {"passed": not failing, "blocking": gate.blocking,
+                                     "failing_tasks": sorted(failing), "value": None}
+
+            report["ready_for_integration"] = {
+                "passed": all(r["passed"] for r in report.values() if r["blocking"]),
+                "blocking": True, "failing_tasks": [], "value": None,
+            }
+            return report
+
+    def check(self, snapshot: ProgressSnapshot) -> Dict[str, bool]:
+        """ゲート名 → 成立可否"""
+        return {name: result["passed"] for name, result in self.evaluate(snapshot).items()}
+
+
+def save_latest_result(project_root: Path, task_id: str, details: Dict) -> None:
+    """タスクの最新検証結果を保存（ゲート評価の入力）"""
+    results_dir = validation_cache_dir(project_root) / "latest"
+    try:
+        results_dir.mkdir(parents=True, exist_ok=True)
+        temp_file = results_dir / f"{task_id}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(details, f, ensure_ascii=False, default=str)
+        temp_file.replace(results_dir / f"{task_id}.json")
+    except OSError as e:
+        print(f"Warning: latest validation result save failed: {e}")
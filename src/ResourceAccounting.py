@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+サブプロセス資源計測モジュール
+
+ビルド・テストのサブプロセスごとに実時間・ユーザー/システムCPU時間・最大RSS・
+出力量を計測し、設定された予算を超えたらプロセスグループごと停止する。
+Core プロジェクトの PerformanceMetrics（CPU使用率・メモリMB・実行時間）と
+同じ観点で検証詳細に記録する。
+
+CPU・メモリはプロセスツリーを定期的にサンプリングして監視する（Linux は /proc、
+それ以外は psutil があれば使用）。終了時の CPU 時間・最大RSSは POSIX では
+wait4 の rusage で確定する。RLIMIT_AS は .NET ランタイムの大きな仮想領域予約と
+相性が悪いため使わず、CPU 時間のみ RLIMIT_CPU を補助的に設定する。
+"""
+
+import os
+import sys
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional, Tuple
+
+try:
+    import psutil  # 任意依存（Windows/macOS でのプロセスツリー計測）
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+@dataclass
+class ResourceBudget:
+    """1回のサブプロセス実行に許す資源量（None は無制限）"""
+    cpu_seconds: Optional[float] = None
+    memory_mb: Optional[float] = None
+    output_mb: Optional[float] = None
+
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> Optional["ResourceBudget"]:
+        if not data:
+            return None
+        return cls(**{k: data[k] for k in ("cpu_seconds", "memory_mb", "output_mb") if k in data})
+
+    def check(self, cpu_seconds: float, rss_bytes: int, output_bytes: int) -> Optional[str]:
+        """超過した予算の説明（超過なしは None）"""
+        if self.cpu_seconds is not None and cpu_seconds > self.cpu_seconds:
+            return f"CPU time {cpu_seconds:.1f}s > {self.cpu_seconds}s"
+        if self.memory_mb is not None and rss_bytes > self.memory_mb * 1024 * 1024:
+            return f"memory {rss_bytes / 1048576:.0f}MB > {self.memory_mb}MB"
+        if self.output_mb is not None and output_bytes > self.output_mb * 1024 * 1024:
+            return f"output {output_bytes / 1048576:.1f}MB > {self.output_mb}MB"
+        return None
+
+
+@dataclass
+class ResourceUsage:
+    """1回以上のサブプロセス実行の資源使用量"""
+    wall_seconds: float = 0.0
+    user_cpu_seconds: float = 0.0
+    system_cpu_seconds: float = 0.0
+    peak_rss_mb: float = 0.0
+    output_bytes: int = 0
+    source: str = "none"            # "rusage" / "proc" / "psutil" / "none"
+    budget_exceeded: str = ""
+
+    @property
+    def cpu_seconds(self) -> float:
+        return self.user_cpu_seconds + self.system_cpu_seconds
+
+    @property
+    def cpu_usage_percent(self) -> float:
+        """実時間に対するCPU時間の割合（複数コア使用時は100%を超える）"""
+        return round(self.cpu_seconds / self.wall_seconds * 100, 1) if self.wall_seconds else 0.0
+
+    def combine(self, other: "ResourceUsage", concurrent: bool = False) -> "ResourceUsage":
+        """別の実行分を合算（並行実行なら実時間・RSSは最大値、逐次なら実時間は加算）"""
+        return ResourceUsage(
+            wall_seconds=max(self.wall_seconds, other.wall_seconds) if concurrent
+            else self.wall_seconds + other.wall_seconds,
+            user_cpu_seconds=self.user_cpu_seconds + other.user_cpu_seconds,
+            system_cpu_seconds=self.system_cpu_seconds + other.system_cpu_seconds,
+            peak_rss_mb=self.peak_rss_mb + other.peak_rss_mb if concurrent
+            else max(self.peak_rss_mb, other.peak_rss_mb),
+            output_bytes=self.output_bytes + other.output_bytes,
+            source=self.source if self.source == other.source else "mixed",
+            budget_exceeded=self.budget_exceeded or other.budget_exceeded,
+        )
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data.update({
+            "wall_seconds": round(self.wall_seconds, 3),
+            "user_cpu_seconds": round(self.user_cpu_seconds, 3),
+            "system_cpu_seconds": round(self.system_cpu_seconds, 3),
+            "peak_rss_mb": round(self.peak_rss_mb, 1),
+            # PerformanceMetrics と同じ観点の要約値
+            "cpu_usage_percent": self.cpu_usage_percent,
+            "memory_usage_mb": round(self.peak_rss_mb, 1),
+            "execution_time_seconds": round(self.wall_seconds, 3),
+        })
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ResourceUsage":
+        return cls(**{k: data[k] for k in ("wall_seconds", "user_cpu_seconds", "system_cpu_seconds",
+                                           "peak_rss_mb", "output_bytes", "source", "budget_exceeded")
+                      if k in data})
+
+
+def _read_proc_group(pgid: int) -> Optional[Tuple[int, float]]:
+    """/proc からプロセスグループの (合計RSSバイト, 合計CPU秒) を取得"""
+    rss_pages = 0
+    ticks = 0
+    try:
+        pids = [name for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return None
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat", 'rb') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # comm は括弧内に空白を含みうるため、最後の ')' 以降を分割
+        fields = stat[stat.rfind(b')') + 2:].split()
+        try:
+            if int(fields[2]) != pgid:
+                continue
+            ticks += int(fields[11]) + int(fields[12])
+            rss_pages += int(fields[21])
+        except (IndexError, ValueError):
+            continue
+    return rss_pages * _PAGE_SIZE, ticks / _CLOCK_TICKS
+
+
+def _read_psutil_tree(pid: int) -> Optional[Tuple[int, float]]:
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+    except psutil.Error:
+        return None
+    rss = 0
+    cpu = 0.0
+    for process in processes:
+        try:
+            rss += process.memory_info().rss
+            times = process.cpu_times()
+            cpu += times.user + times.system
+        except psutil.Error:
+            continue
+    return rss, cpu
+
+
+class ProcessTreeSampler:
+    """実行中のプロセスツリー（グループ）の資源使用量サンプラー"""
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.peak_rss_bytes = 0
+        self.cpu_seconds = 0.0
+        if sys.platform.startswith("linux") and os.path.isdir("/proc"):
+            self.source = "proc"
+        elif psutil is not None:
+            self.source = "psutil"
+        else:
+            self.source = "none"
+
+    def sample(self) -> Tuple[int, float]:
+        """(現在のRSSバイト, 累積CPU秒) を取得しピーク値を更新"""
+        if self.source == "proc":
+            sampled = _read_proc_group(self.pid)
+        elif self.source == "psutil":
+            sampled = _read_psutil_tree(self.pid)
+        else:
+            sampled = None
+        if sampled is None:
+            return 0, self.cpu_seconds
+        rss, cpu = sampled
+        self.peak_rss_bytes = max(self.peak_rss_bytes, rss)
+        # 終了したプロセスの分はサンプルから消えるため累積の最大値を保持
+        self.cpu_seconds = max(self.cpu_seconds, cpu)
+        return rss, self.cpu_seconds
+
+
+def apply_cpu_rlimit(pid: int, budget: Optional[ResourceBudget]) -> None:
+    """CPU予算を RLIMIT_CPU として設定（Linux の prlimit が使える場合のみ）"""
+    if budget is None or budget.cpu_seconds is None or resource is None or not hasattr(resource, "prlimit"):
+        return
+    soft = int(budget.cpu_seconds) + 1
+    try:
+        resource.prlimit(pid, resource.RLIMIT_CPU, (soft, soft + 5))
+    except (OSError, ValueError):
+        pass
+
+
+def rusage_peak_rss_mb(maxrss: int) -> float:
+    """ru_maxrss を MB に換算（macOS はバイト、他は KB 単位）"""
+    return maxrss / 1048576 if sys.platform == "darwin" else maxrss / 1024
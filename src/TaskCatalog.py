@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+タスク仕様カタログモジュール
+
+docs/pm/tasks/T-*.md を一括で索引化し、frontmatter と JSON コードブロックを
+解析した結果を mtime 単位でキャッシュする。ID・依存関係・スプリントで検索でき、
+スケジューラ（WorkflowController）と ArtifactValidator で共有する。
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+_FENCE_PATTERN = re.compile(r'^ {0,3}(`{3,}|~{3,})\s*([^`\s]*)')
+
+
+def default_spec(task_id: str) -> Dict:
+    """JSONブロックのないタスクのデフォルト仕様"""
+    return {
+        "required_files": [f"src/**/{task_id.replace('T-', '').replace('-', '')}*.cs"],
+        "min_coverage": 80,
+        "build_command": "dotnet build",
+        "test_command": "dotnet test"
+    }
+
+
+def _parse_scalar(value: str) -> Any:
+    value = value.strip()
+    if not value:
+        return ""
+    if value[0] in "[{\"" or value in ("true", "false", "null") or re.fullmatch(r'-?\d+(\.\d+)?', value):
+        try:
+            return json.loads(value)
+        except ValueError:
+            pass
+    if value.startswith("[") and value.endswith("]"):
+        return [_parse_scalar(v) for v in value[1:-1].split(",") if v.strip()]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    return value
+
+
+def parse_frontmatter(lines: List[str]) -> Tuple[Dict, int]:
+    """
+    先頭の --- で囲まれた frontmatter を解析（key: value / インライン・ブロックリスト）
+
+    Returns:
+        (frontmatter_dict, 本文開始行)
+    """
+    if not lines or lines[0].strip() != "---":
+        return {}, 0
+
+    data: Dict[str, Any] = {}
+    current_key: Optional[str] = None
+    for index in range(1, len(lines)):
+        line = lines[index].rstrip()
+        if line.strip() in ("---", "..."):
+            return data, index + 1
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        stripped = line.strip()
+        if stripped.startswith("- ") and current_key is not None:
+            if not isinstance(data.get(current_key), list):
+                data[current_key] = []
+            data[current_key].append(_parse_scalar(stripped[2:]))
+            continue
+        if ":" in line and not line[0].isspace():
+            key, value = line.split(":", 1)
+            current_key = key.strip()
+            data[current_key] = _parse_scalar(value) if value.strip() else []
+    # 閉じ区切りがない場合は frontmatter とみなさない
+    return {}, 0
+
+
+def extract_json_blocks(lines: List[str], start: int = 0) -> List[str]:
+    """フェンス（``` / ~~~）を正しく対応付けて json ブロックの中身を抽出"""
+    blocks = []
+    fence: Optional[str] = None
+    is_json = False
+    buffer: List[str] = []
+    for line in lines[start:]:
+        match = _FENCE_PATTERN.match(line)
+        if fence is None:
+            if match:
+                fence = match.group(1)
+                is_json = match.group(2).lower() == "json"
+                buffer = []
+            continue
+        # 閉じフェンス: 同じ文字で開きフェンス以上の長さ、情報文字列なし
+        if match and match.group(1)[0] == fence[0] and len(match.group(1)) >= len(fence) and not match.group(2):
+            if is_json:
+                blocks.append("\n".join(buffer))
+            fence = None
+            continue
+        buffer.append(line)
+    return blocks
+
+
+class TaskSpecEntry:
+    """カタログ内の1タスク分のエントリ"""
+    __slots__ = ("task_id", "path", "stat_key", "spec", "frontmatter", "has_json", "error")
+
+    def __init__(self, task_id: str, path: str, stat_key: Tuple[int, int]):
+        self.task_id = task_id
+        self.path = path
+        self.stat_key = stat_key
+        self.spec: Optional[Dict] = None
+        self.frontmatter: Dict = {}
+        self.has_json = False
+        self.error: Optional[str] = None
+
+    @property
+    def dependencies(self) -> List[str]:
+        source = self.spec or {}
+        deps = source.get("dependencies", source.get("depends_on", []))
+        return [deps] if isinstance(deps, str) else list(deps or [])
+
+    @property
+    def sprint(self) -> Optional[str]:
+        return (self.spec or {}).get("sprint")
+
+
+def parse_task_file(task_id: str, path: str, stat_key: Tuple[int, int]) -> TaskSpecEntry:
+    """タスク仕様ファイルを解析（frontmatter → JSONブロックの順に統合）"""
+    entry = TaskSpecEntry(task_id, path, stat_key)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        frontmatter, body_start = parse_frontmatter(lines)
+        entry.frontmatter = frontmatter
+        blocks = extract_json_blocks(lines, body_start)
+        if blocks:
+            entry.has_json = True
+            spec = dict(frontmatter)
+            spec.update(json.loads(blocks[0]))
+        else:
+            spec = default_spec(task_id)
+            spec.update(frontmatter)
+        entry.spec = spec
+    except (OSError, ValueError) as e:
+        entry.error = str(e)
+    return entry
+
+
+class TaskCatalog:
+    """docs/pm/tasks の仕様カタログ（差分更新・依存/スプリント索引付き）"""
+
+    def __init__(self, docs_path: Path, refresh_interval: float = 1.0):
+        self.docs_path = Path(docs_path)
+        self.refresh_interval = refresh_interval
+        self._entries: Dict[str, TaskSpecEntry] = {}
+        self._dependents: Dict[str, List[str]] = {}
+        self._by_sprint: Dict[str, List[str]] = {}
+        self._last_refresh = 0.0
+        self._lock = threading.RLock()
+
+    def refresh(self, force: bool = False) -> int:
+        """
+        ディレクトリを1回走査し、mtime/size が変わったファイルのみ再解析
+
+        Returns:
+            再解析したファイル数
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._entries and now - self._last_refresh < self.refresh_interval:
+                return 0
+            self._last_refresh = now
+
+            seen = set()
+            reparsed = 0
+            try:
+                with os.scandir(self.docs_path) as it:
+                    entries = [e for e in it if e.name.startswith("T-") and e.name.endswith(".md")]
+            except OSError:
+                entries = []
+
+            for dir_entry in entries:
+                task_id = dir_entry.name[:-3]
+                seen.add(task_id)
+                try:
+                    st = dir_entry.stat()
+                except OSError:
+                    continue
+                stat_key = (st.st_mtime_ns, st.st_size)
+                cached = self._entries.get(task_id)
+                if cached is None or cached.stat_key != stat_key:
+                    self._entries[task_id] = parse_task_file(task_id, dir_entry.path, stat_key)
+                    reparsed += 1
+
+            removed = set(self._entries) - seen
+            for task_id in removed:
+                del self._entries[task_id]
+
+            if reparsed or removed:
+                self._rebuild_indexes()
+            return reparsed
+
+    def _rebuild_indexes(self) -> None:
+        dependents: Dict[str, List[str]] = {}
+        by_sprint: Dict[str, List[str]] = {}
+        for task_id in sorted(self._entries):
+            entry = self._entries[task_id]
+            for dep in entry.dependencies:
+                dependents.setdefault(dep, []).append(task_id)
+            if entry.sprint:
+                by_sprint.setdefault(str(entry.sprint), []).append(task_id)
+        self._dependents = dependents
+        self._by_sprint = by_sprint
+
+    # --- 検索 ---
+
+    def get_entry(self, task_id: str) -> Optional[TaskSpecEntry]:
+        self.refresh()
+        with self._lock:
+            return self._entries.get(task_id)
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        """タスク仕様のコピーを返す（未定義・解析エラーはNone）"""
+        entry = self.get_entry(task_id)
+        if entry is None or entry.spec is None:
+            return None
+        return deepcopy(entry.spec)
+
+    def task_ids(self) -> List[str]:
+        self.refresh()
+        with self._lock:
+            return sorted(self._entries)
+
+    def dependencies_of(self, task_id: str) -> List[str]:
+        entry = self.get_entry(task_id)
+        return entry.dependencies if entry else []
+
+    def dependents_of(self, task_id: str) -> List[str]:
+        self.refresh()
+        with self._lock:
+            return list(self._dependents.get(task_id, []))
+
+    def by_sprint(self, sprint: str) -> List[str]:
+        self.refresh()
+        with self._lock:
+            return list(self._by_sprint.get(str(sprint), []))
+
+
+_catalogs: Dict[str, TaskCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_task_catalog(docs_path: Path) -> TaskCatalog:
+    """docs パスごとに共有されるカタログを取得"""
+    key = str(Path(docs_path).resolve())
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = _catalogs[key] = TaskCatalog(Path(key))
+        return catalog
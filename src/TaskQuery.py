@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+タスク検索モジュール
+
+ProgressSnapshot のタスクに対し、ステータス・担当者・スプリントの副索引と
+経過時間（last_updated からの日数）順の索引を作り、フィルタ式・ソート式・
+カーソル方式のページングで検索する。結果はジェネレーターで逐次返すため、
+索引順で足りるソート（task_id・age）では先頭ページがすぐに得られる。
+索引はスナップショット単位でキャッシュする（progress.json が変わらない限り再利用）。
+
+フィルタ式（空白またはカンマ区切りの AND、値の | は OR）:
+    status=pending|in_progress  assignee!=dev-agent-1  sprint=sprint-02
+    age>3d  age<=12h  description~ログ
+ソート式（カンマ区切り、- は降順）:
+    -age,task_id
+"""
+
+import base64
+import json
+import re
+import threading
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from .ProgressSnapshot import ProgressSnapshot, TaskSnapshot
+except ImportError:
+    import os
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from ProgressSnapshot import ProgressSnapshot, TaskSnapshot
+
+
+INDEXED_FIELDS = ("status", "assignee", "sprint")
+FIELDS = ("task_id", "status", "assignee", "sprint", "review_status", "description", "age")
+DEFAULT_PAGE_SIZE = 50
+
+_TERM_PATTERN = re.compile(r'^(\w+)\s*(!=|>=|<=|=|>|<|~)\s*(.+)$')
+_AGE_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)\s*([dhm]?)$')
+_AGE_UNITS = {"d": 1.0, "h": 1 / 24, "m": 1 / 1440, "": 1.0}
+
+
+class QueryError(ValueError):
+    """フィルタ式・ソート式・カーソルの誤り"""
+
+
+def natural_key(task_id: str) -> Tuple:
+    """T-2 < T-10 となる並び順"""
+    return tuple(int(part) if part.isdigit() else part for part in re.split(r'(\d+)', task_id))
+
+
+def _updated_at(task: TaskSnapshot) -> Optional[float]:
+    """last_updated の UNIX 時刻（解釈できなければ None）"""
+    try:
+        updated = datetime.fromisoformat(task.last_updated.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if updated.tzinfo is None:
+        updated = updated.astimezone()
+    return updated.timestamp()
+
+
+def _parse_age(value: str) -> float:
+    match = _AGE_PATTERN.match(value.strip())
+    if not match:
+        raise QueryError(f"Invalid age: {value} (e.g. 3d, 12h, 30m)")
+    return float(match.group(1)) * _AGE_UNITS[match.group(2)]
+
+
+class TaskIndex:
+    """1つのスナップショットに対するタスクの索引"""
+
+    def __init__(self, snapshot: ProgressSnapshot, now: Optional[datetime] = None):
+        self.snapshot = snapshot
+        now_ts = (now or datetime.now(timezone.utc)).timestamp()
+        tasks: Dict[str, TaskSnapshot] = dict(snapshot.active_tasks)
+        for task_id, task in snapshot.current_working_tasks.items():
+            tasks.setdefault(task_id, task)
+        self.tasks = tasks
+        self.updated_at: Dict[str, Optional[float]] = {tid: _updated_at(t) for tid, t in tasks.items()}
+        self.ages: Dict[str, Optional[float]] = {
+            tid: None if ts is None else (now_ts - ts) / 86400 for tid, ts in self.updated_at.items()
+        }
+        self.by_field: Dict[str, Dict[str, List[str]]] = {name: {} for name in INDEXED_FIELDS}
+        for task_id, task in tasks.items():
+            for name in INDEXED_FIELDS:
+                self.by_field[name].setdefault(getattr(task, name), []).append(task_id)
+        # 索引順で返せるソート
+        self.by_task_id = sorted(tasks, key=natural_key)
+        self.by_age = sorted(tasks, key=lambda tid: (self.updated_at[tid] is None,
+                                                     -(self.updated_at[tid] or 0.0), natural_key(tid)))
+
+    def value(self, task_id: str, field: str) -> Any:
+        if field == "age":
+            return self.ages[task_id]
+        return getattr(self.tasks[task_id], field)
+
+    def sort_value(self, task_id: str, field: str) -> Any:
+        """ソート・カーソル用の値（age は実行時刻に依存しないよう更新時刻の符号反転）"""
+        if field == "age":
+            updated = self.updated_at[task_id]
+            return None if updated is None else -updated
+        return getattr(self.tasks[task_id], field)
+
+    def counts(self, field: str = "status") -> Dict[str, int]:
+        return {value: len(ids) for value, ids in self.by_field[field].items()}
+
+
+_index_lock = threading.Lock()
+_index_cache: Optional[Tuple[ProgressSnapshot, TaskIndex]] = None
+
+
+def get_task_index(snapshot: ProgressSnapshot) -> TaskIndex:
+    """スナップショットの索引（同じスナップショットなら再利用）"""
+    global _index_cache
+    with _index_lock:
+        if _index_cache is not None and _index_cache[0] is snapshot:
+            return _index_cache[1]
+    index = TaskIndex(snapshot)
+    with _index_lock:
+        _index_cache = (snapshot, index)
+    return index
+
+
+class _Descending:
+    """降順ソート用のラッパー"""
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+
+class TaskQuery:
+    """フィルタ・ソート・ページングを組み合わせた検索"""
+
+    def __init__(self, filter_expression: str = "", sort_expression: str = "task_id",
+                 limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None):
+        self.terms = self._parse_filter(filter_expression)
+        self.sort_fields = self._parse_sort(sort_expression or "task_id")
+        self.limit = limit
+        self.cursor = cursor
+        self._after = self._decode_cursor(cursor) if cursor else None
+        self.next_cursor: Optional[str] = None
+
+    @staticmethod
+    def _parse_filter(expression: str) -> List[Tuple[str, str, List[str]]]:
+        terms = []
+        for raw in re.split(r'[\s,]+', expression.strip()):
+            if not raw:
+                continue
+            match = _TERM_PATTERN.match(raw)
+            if not match or match.group(1) not in FIELDS:
+                raise QueryError(f"Invalid filter term: {raw} (fields: {', '.join(FIELDS)})")
+            field, op, value = match.groups()
+            values = value.split("|")
+            if field == "age":
+                if op in ("=", "!=", "~"):
+                    raise QueryError(f"age supports only <, <=, >, >=: {raw}")
+                values = [_parse_age(v) for v in values]
+            elif op not in ("=", "!=", "~"):
+                raise QueryError(f"{field} supports only =, !=, ~: {raw}")
+            terms.append((field, op, values))
+        return terms
+
+    @staticmethod
+    def _parse_sort(expression: str) -> List[Tuple[str, bool]]:
+        fields = []
+        for raw in expression.split(","):
+            raw = raw.strip()
+            if not raw:
+                continue
+            descending = raw.startswith("-")
+            field = raw.lstrip("-+")
+            if field not in FIELDS:
+                raise QueryError(f"Invalid sort field: {field} (fields: {', '.join(FIELDS)})")
+            fields.append((field, descending))
+        if all(field != "task_id" for field, _ in fields):
+            fields.append(("task_id", False))  # 同順位の並びを安定させる
+        return fields
+
+    # --- 評価 ---
+
+    def _candidates(self, index: TaskIndex) -> Optional[set]:
+        """索引で絞り込める等価条件の候補集合（絞り込めなければ None）"""
+        candidates = None
+        for field, op, values in self.terms:
+            if field in INDEXED_FIELDS and op == "=":
+                ids = {tid for value in values for tid in index.by_field[field].get(value, ())}
+                candidates = ids if candidates is None else candidates & ids
+        return candidates
+
+    def _predicate(self, index: TaskIndex) -> Callable[[str], bool]:
+        checks = []
+        for field, op, values in self.terms:
+            if field in INDEXED_FIELDS and op == "=":
+                continue  # 候補集合で判定済み
+            if field == "age":
+                compare = {">": float.__gt__, "<": float.__lt__, ">=": float.__ge__, "<=": float.__le__}[op]
+                checks.append(lambda tid, c=compare, v=values: index.ages[tid] is not None
+                              and any(c(index.ages[tid], x) for x in v))
+            elif op == "=":
+                checks.append(lambda tid, f=field, v=values: index.value(tid, f) in v)
+            elif op == "!=":
+                checks.append(lambda tid, f=field, v=values: index.value(tid, f) not in v)
+            else:
+                checks.append(lambda tid, f=field, v=values: any(x in index.value(tid, f) for x in v))
+        return lambda tid: all(check(tid) for check in checks)
+
+    def _sort_key(self, index: TaskIndex, task_id: str) -> Tuple:
+        return self._key_from_values([index.sort_value(task_id, field) for field, _ in self.sort_fields])
+
+    def _key_from_values(self, values: Sequence[Any]) -> Tuple:
+        key = []
+        for (field, descending), value in zip(self.sort_fields, values):
+            if field == "task_id":
+                value = natural_key(value)
+            # 値のない項目は昇順・降順とも末尾
+            present = value if value is not None else 0
+            key.append((value is None, _Descending(present) if descending else present))
+        return tuple(key)
+
+    def _ordered(self, index: TaskIndex, candidates: Optional[set]) -> Iterator[str]:
+        """ソート順のタスクID（索引順で足りる場合は全件ソートしない）"""
+        primary = [field for field, _ in self.sort_fields]
+        if primary == ["task_id"] and not self.sort_fields[0][1]:
+            ordered: Sequence[str] = index.by_task_id
+        elif primary == ["age", "task_id"] and not self.sort_fields[0][1]:
+            ordered = index.by_age
+        else:
+            ids = candidates if candidates is not None else index.tasks
+            ordered = sorted(ids, key=lambda tid: self._sort_key(index, tid))
+            candidates = None
+        if candidates is None:
+            return iter(ordered)
+        return (tid for tid in ordered if tid in candidates)
+
+    def _encode_cursor(self, index: TaskIndex, task_id: str) -> str:
+        values = [index.sort_value(task_id, field) for field, _ in self.sort_fields]
+        payload = json.dumps({"s": self._sort_signature(), "v": values}, ensure_ascii=False)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def _sort_signature(self) -> List[str]:
+        return [f"-{field}" if descending else field for field, descending in self.sort_fields]
+
+    def _decode_cursor(self, cursor: str) -> Tuple:
+        """カーソル（前ページ末尾のソート値）を比較用のキーに戻す"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            signature, values = payload["s"], payload["v"]
+        except (ValueError, TypeError, KeyError) as e:
+            raise QueryError(f"Invalid cursor: {e}")
+        if signature != self._sort_signature() or len(values) != len(self.sort_fields):
+            raise QueryError("Cursor does not match the sort expression")
+        return self._key_from_values(values)
+
+    def iter_tasks(self, snapshot: ProgressSnapshot) -> Iterator[TaskSnapshot]:
+        """
+        条件に合うタスクを1ページ分ずつ逐次返す
+
+        取り出し終えると next_cursor に次ページのカーソル（最終ページなら None）が入る。
+        """
+        index = get_task_index(snapshot)
+        candidates = self._candidates(index)
+        predicate = self._predicate(index)
+        matches = (tid for tid in self._ordered(index, candidates) if predicate(tid))
+        if self._after is not None:
+            after = self._after
+            matches = (tid for tid in matches if after < self._sort_key(index, tid))
+
+        self.next_cursor = None
+        last = None
+        count = 0
+        for task_id in islice(matches, self.limit + 1):
+            if count == self.limit:
+                self.next_cursor = self._encode_cursor(index, last)
+                return
+            last = task_id
+            count += 1
+            yield index.tasks[task_id]
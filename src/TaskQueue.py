@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+リース方式のタスクキュー
+
+Dev-Agent へのタスク割り当てを、原子的な取得（claim）と期限付きリースで行う。
+リースはハートビートで延長され、期限切れのタスクは自動的にキューへ戻る。
+取得のたびに増えるフェンシングトークンにより、期限切れ後に別エージェントが
+取得したタスクを元の所有者が完了・延長することはできない（所有者は常に高々1つ）。
+
+バックエンドは TaskQueueBackend を実装すれば差し替えられる。
+- SQLiteTaskQueue: ローカル（同一ホストの複数プロセス）用、.claude/task_queue.db
+- InMemoryTaskQueue: リモート実装の代役・単体検証用（同一プロセス内）
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+# タスクの状態
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"        # 試行回数の上限に達した（BugFix-Agent 等の対応待ち）
+
+
+@dataclass(frozen=True)
+class Lease:
+    """取得したタスクの所有権"""
+    task_id: str
+    owner: str
+    fence: int               # フェンシングトークン（取得ごとに単調増加）
+    expires_at: float
+    attempts: int
+    payload: Dict
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class QueueEntry:
+    """キュー内のタスクの状態"""
+    task_id: str
+    state: str = QUEUED
+    priority: int = 0
+    payload: Optional[Dict] = None
+    owner: str = ""
+    fence: int = 0
+    lease_expires: float = 0.0
+    last_heartbeat: float = 0.0
+    attempts: int = 0
+    enqueued_at: float = 0.0
+    last_error: str = ""
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class TaskQueueBackend(ABC):
+    """タスクキューの共通インターフェース"""
+
+    @abstractmethod
+    def enqueue(self, task_id: str, payload: Optional[Dict] = None, priority: int = 0) -> bool:
+        """
+        タスクを追加（キュー待ち・リース中なら何もせず False）
+
+        完了済み・DEAD のタスクは差し戻し（再作業）として試行回数を戻して再投入する。
+        """
+
+    @abstractmethod
+    def claim(self, owner: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Lease]:
+        """優先度順に1件を原子的に取得（なければ None）"""
+
+    @abstractmethod
+    def heartbeat(self, lease: Lease, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Lease]:
+        """リースを延長（所有権を失っていれば None）"""
+
+    @abstractmethod
+    def complete(self, lease: Lease) -> bool:
+        """完了（所有権を失っていれば False）"""
+
+    @abstractmethod
+    def release(self, lease: Lease, error: str = "", requeue: bool = True) -> bool:
+        """リースを返却（requeue=False または試行上限で DEAD）"""
+
+    @abstractmethod
+    def requeue_expired(self) -> List[str]:
+        """期限切れリースをキューへ戻す（戻したタスクID）"""
+
+    @abstractmethod
+    def entries(self) -> List[QueueEntry]:
+        """全タスクの状態"""
+
+    def leased_task_ids(self) -> List[str]:
+        """リース中（期限内）のタスクID"""
+        return [e.task_id for e in self.entries() if e.state == LEASED]
+
+    def pending_task_ids(self) -> List[str]:
+        """キューに投入済み（取得待ち・リース中）のタスクID。他の経路で割り当ててはならない"""
+        return [e.task_id for e in self.entries() if e.state in (QUEUED, LEASED)]
+
+    def stats(self) -> Dict[str, int]:
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, DEAD: 0}
+        for entry in self.entries():
+            counts[entry.state] = counts.get(entry.state, 0) + 1
+        return counts
+
+
+class InMemoryTaskQueue(TaskQueueBackend):
+    """プロセス内のキュー（リモートバックエンドの代役）"""
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS, clock: Callable[[], float] = time.time):
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: Dict[str, QueueEntry] = {}
+        self._fence = 0
+
+    def _expire(self, now: float) -> List[str]:
+        expired = []
+        for entry in self._entries.values():
+            if entry.state == LEASED and entry.lease_expires <= now:
+                entry.state = DEAD if entry.attempts >= self.max_attempts else QUEUED
+                entry.last_error = "lease expired"
+                entry.owner = ""
+                expired.append(entry.task_id)
+        return expired
+
+    def _owned(self, lease: Lease, now: float) -> Optional[QueueEntry]:
+        entry = self._entries.get(lease.task_id)
+        if entry is None or entry.state != LEASED or entry.fence != lease.fence or entry.lease_expires <= now:
+            return None
+        return entry
+
+    def enqueue(self, task_id: str, payload: Optional[Dict] = None, priority: int = 0) -> bool:
+        with self._lock:
+            existing = self._entries.get(task_id)
+            if existing is not None and existing.state in (QUEUED, LEASED):
+                return False
+            self._entries[task_id] = QueueEntry(task_id, priority=priority, payload=dict(payload or {}),
+                                                enqueued_at=self.clock())
+            return True
+
+    def claim(self, owner: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Lease]:
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            queued = [e for e in self._entries.values() if e.state == QUEUED]
+            if not queued:
+                return None
+            entry = min(queued, key=lambda e: (-e.priority, e.enqueued_at, e.task_id))
+            self._fence += 1
+            entry.state, entry.owner, entry.fence = LEASED, owner, self._fence
+            entry.lease_expires = now + lease_seconds
+            entry.last_heartbeat = now
+            entry.attempts += 1
+            return Lease(entry.task_id, owner, entry.fence, entry.lease_expires, entry.attempts,
+                         dict(entry.payload or {}))
+
+    def heartbeat(self, lease: Lease, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Lease]:
+        with self._lock:
+            now = self.clock()
+            entry = self._owned(lease, now)
+            if entry is None:
+                return None
+            entry.lease_expires = now + lease_seconds
+            entry.last_heartbeat = now
+            return Lease(lease.task_id, lease.owner, lease.fence, entry.lease_expires, lease.attempts,
+                         lease.payload)
+
+    def complete(self, lease: Lease) -> bool:
+        with self._lock:
+            entry = self._owned(lease, self.clock())
+            if entry is None:
+                return False
+            entry.state, entry.owner = DONE, ""
+            return True
+
+    def release(self, lease: Lease, error: str = "", requeue: bool = True) -> bool:
+        with self._lock:
+            entry = self._owned(lease, self.clock())
+            if entry is None:
+                return False
+            entry.state = QUEUED if requeue and entry.attempts < self.max_attempts else DEAD
+            entry.owner, entry.last_error = "", error
+            return True
+
+    def requeue_expired(self) -> List[str]:
+        with self._lock:
+            return self._expire(self.clock())
+
+    def entries(self) -> List[QueueEntry]:
+        with self._lock:
+            self._expire(self.clock())
+            return [QueueEntry(**e.to_dict()) for e in self._entries.values()]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    payload TEXT NOT NULL DEFAULT '{}',
+    owner TEXT NOT NULL DEFAULT '',
+    fence INTEGER NOT NULL DEFAULT 0,
+    lease_expires REAL NOT NULL DEFAULT 0,
+    last_heartbeat REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    last_error TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (state, priority DESC, enqueued_at);
+CREATE TABLE IF NOT EXISTS fence (id INTEGER PRIMARY KEY CHECK (id = 1), value INTEGER NOT NULL);
+INSERT OR IGNORE INTO fence (id, value) VALUES (1, 0);
+"""
+
+
+class SQLiteTaskQueue(TaskQueueBackend):
+    """
+    SQLite によるローカルキュー（複数プロセスから共有）
+
+    取得・期限切れ回収は BEGIN IMMEDIATE の書き込みトランザクション内で行うため、
+    同じタスクを2つのプロセスが同時に取得することはない。WAL モードで読み取りは
+    書き込みを待たない。SQLite のロックはネットワークファイルシステム上では
+    信頼できないため、複数ホストでは TaskQueueBackend のリモート実装を使う。
+    """
+
+    def __init__(self, db_path: Path, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 clock: Callable[[], float] = time.time):
+        self.db_path = Path(db_path)
+        self.max_attempts = max_attempts
+        self.clock = clock
+        self._local = threading.local()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # executescript は独自にコミットするためトランザクション外で実行
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 自動トランザクションは使わず、BEGIN IMMEDIATE を明示する
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    class _Transaction:
+        def __init__(self, conn: sqlite3.Connection):
+            self.conn = conn
+
+        def __enter__(self) -> sqlite3.Connection:
+            self.conn.execute("BEGIN IMMEDIATE")
+            return self.conn
+
+        def __exit__(self, exc_type, exc, tb) -> None:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+    def _transaction(self) -> "_Transaction":
+        return self._Transaction(self._connection())
+
+    def _expire(self, conn: sqlite3.Connection, now: float) -> List[str]:
+        rows = conn.execute("SELECT task_id FROM tasks WHERE state = ? AND lease_expires <= ?",
+                            (LEASED, now)).fetchall()
+        if rows:
+            conn.execute(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, owner = '', "
+                "last_error = 'lease expired' WHERE state = ? AND lease_expires <= ?",
+                (self.max_attempts, DEAD, QUEUED, LEASED, now)
+            )
+        return [row["task_id"] for row in rows]
+
+    @staticmethod
+    def _owned_clause() -> str:
+        return "task_id = ? AND state = 'leased' AND fence = ? AND lease_expires > ?"
+
+    def enqueue(self, task_id: str, payload: Optional[Dict] = None, priority: int = 0) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO tasks (task_id, state, priority, payload, enqueued_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (task_id) DO UPDATE SET state = excluded.state, priority = excluded.priority, "
+                "payload = excluded.payload, enqueued_at = excluded.enqueued_at, attempts = 0, "
+                "last_error = '' WHERE tasks.state IN (?, ?)",
+                (task_id, QUEUED, priority, json.dumps(payload or {}, ensure_ascii=False), self.clock(),
+                 DONE, DEAD)
+            )
+            return cursor.rowcount == 1
+
+    def claim(self, owner: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Lease]:
+        with self._transaction() as conn:
+            now = self.clock()
+            self._expire(conn, now)
+            row = conn.execute(
+                "SELECT task_id, attempts, payload FROM tasks WHERE state = ? "
+                "ORDER BY priority DESC, enqueued_at, task_id LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE fence SET value = value + 1 WHERE id = 1")
+            fence = conn.execute("SELECT value FROM fence WHERE id = 1").fetchone()[0]
+            expires = now + lease_seconds
+            conn.execute(
+                "UPDATE tasks SET state = ?, owner = ?, fence = ?, lease_expires = ?, last_heartbeat = ?, "
+                "attempts = attempts + 1 WHERE task_id = ?",
+                (LEASED, owner, fence, expires, now, row["task_id"])
+            )
+            return Lease(row["task_id"], owner, fence, expires, row["attempts"] + 1, json.loads(row["payload"]))
+
+    def heartbeat(self, lease: Lease, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[Lease]:
+        with self._transaction() as conn:
+            now = self.clock()
+            expires = now + lease_seconds
+            cursor = conn.execute(
+                f"UPDATE tasks SET lease_expires = ?, last_heartbeat = ? WHERE {self._owned_clause()}",
+                (expires, now, lease.task_id, lease.fence, now)
+            )
+            if cursor.rowcount != 1:
+                return None
+            return Lease(lease.task_id, lease.owner, lease.fence, expires, lease.attempts, lease.payload)
+
+    def complete(self, lease: Lease) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE tasks SET state = ?, owner = '' WHERE {self._owned_clause()}",
+                (DONE, lease.task_id, lease.fence, self.clock())
+            )
+            return cursor.rowcount == 1
+
+    def release(self, lease: Lease, error: str = "", requeue: bool = True) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE tasks SET state = CASE WHEN ? AND attempts < ? THEN ? ELSE ? END, owner = '', "
+                f"last_error = ? WHERE {self._owned_clause()}",
+                (1 if requeue else 0, self.max_attempts, QUEUED, DEAD, error,
+                 lease.task_id, lease.fence, self.clock())
+            )
+            return cursor.rowcount == 1
+
+    def requeue_expired(self) -> List[str]:
+        with self._transaction() as conn:
+            return self._expire(conn, self.clock())
+
+    def entries(self) -> List[QueueEntry]:
+        with self._transaction() as conn:
+            self._expire(conn, self.clock())
+            rows = conn.execute("SELECT * FROM tasks ORDER BY enqueued_at, task_id").fetchall()
+        return [
+            QueueEntry(**{**dict(row), "payload": json.loads(row["payload"])})
+            for row in rows
+        ]
+
+
+def task_queue_path(project_root: Path) -> Path:
+    return Path(project_root) / ".claude" / "task_queue.db"
+
+
+def open_task_queue(project_root: Path) -> TaskQueueBackend:
+    """プロジェクトのローカルキュー（.claude/task_queue.db）"""
+    return SQLiteTaskQueue(task_queue_path(project_root))
+
+
+if __name__ == "__main__":
+    import sys
+
+    queue = open_task_queue(Path("."))
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    if command == "enqueue" and len(sys.argv) > 2:
+        for task_id in sys.argv[2:]:
+            print(f"{task_id}: {'queued' if queue.enqueue(task_id) else 'already known'}")
+    elif command == "claim" and len(sys.argv) > 2:
+        lease = queue.claim(sys.argv[2])
+        print(json.dumps(lease.to_dict() if lease else None, ensure_ascii=False))
+    elif command == "status":
+        print(json.dumps(queue.stats()))
+        for entry in queue.entries():
+            owner = f" owner={entry.owner}" if entry.owner else ""
+            print(f"  {entry.task_id}: {entry.state}{owner} attempts={entry.attempts}")
+    else:
+        print("Usage: python TaskQueue.py [status | enqueue <TaskID> ... | claim <AgentID>]")
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+テスト影響分析モジュール
+
+タスクブランチの main からの差分と、過去のテストクラス単位カバレッジ実行で
+学習したファイル→テスト対応表から、影響を受けるテストだけを実行する
+`dotnet test --filter` 式を組み立てる。定期的・統合前には全件実行に戻す。
+"""
+
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+try:
+    from .CoverageAnalyzer import CoverageIndex, get_changed_lines, get_structural_changes
+    from .FileMatcher import match_required_files
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from CoverageAnalyzer import CoverageIndex, get_changed_lines, get_structural_changes
+    from FileMatcher import match_required_files
+
+
+# 変更されると全テストが必要になるファイル（ビルド構成・依存関係）
+FULL_RUN_EXTENSIONS = {".csproj", ".sln", ".props", ".targets", ".runsettings", ".editorconfig"}
+
+# テストクラスファイルの検出パターン
+TEST_FILE_PATTERNS = ["**/*Tests.cs", "**/*Test.cs"]
+
+_NAMESPACE_PATTERN = re.compile(r'^\s*namespace\s+([\w.]+)', re.MULTILINE)
+
+
+def _qualified(name: str, qualified: Optional[Dict[str, str]]) -> str:
+    return (qualified or {}).get(name, name)
+
+
+def class_filter(test_classes: Iterable[str], qualified: Optional[Dict[str, str]] = None) -> str:
+    """
+    テストクラス名の一覧を dotnet test --filter 式に変換
+
+    qualified（クラス名→名前空間付きクラス名）があれば名前空間付きで照合する。
+    FullyQualifiedName にはメソッド名まで含まれるため = では一致させられず ~ を使うが、
+    名前空間から始まり末尾が . の部分文字列なので、FooTests が BarFooTests に一致する
+    ような誤爆は起きない。
+    """
+    return "|".join(f"FullyQualifiedName~{_qualified(name, qualified)}." for name in test_classes)
+
+
+def class_exclusion_filter(test_classes: Iterable[str], qualified: Optional[Dict[str, str]] = None) -> str:
+    """指定クラス以外の全テストを選ぶ --filter 式（照合方法は class_filter と同じ）"""
+    return "&".join(f"FullyQualifiedName!~{_qualified(name, qualified)}." for name in test_classes)
+
+
+@dataclass
+class TestSelection:
+    """テスト選択結果"""
+    mode: str                       # "full" / "impacted"
+    filter: str = ""                # dotnet test --filter 式（full の場合は空）
+    test_classes: List[str] = field(default_factory=list)
+    changed_files: List[str] = field(default_factory=list)
+    reasons: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class TestImpactMap:
+    """ソースファイル→テストクラスの対応表（JSONで永続化）"""
+
+    def __init__(self, map_file: Path):
+        self.map_file = Path(map_file)
+        self._lock = threading.Lock()
+        self.file_to_tests: Dict[str, Set[str]] = {}
+        self.runs_since_full: Dict[str, int] = {}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.map_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.file_to_tests = {path: set(tests) for path, tests in data.get("file_to_tests", {}).items()}
+            self.runs_since_full = dict(data.get("runs_since_full", {}))
+        except (OSError, ValueError):
+            pass
+
+    def save(self) -> None:
+        with self._lock:
+            try:
+                self.map_file.parent.mkdir(parents=True, exist_ok=True)
+                temp_file = self.map_file.with_suffix('.tmp')
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        "updated": datetime.now().isoformat(),
+                        "file_to_tests": {p: sorted(t) for p, t in self.file_to_tests.items()},
+                        "runs_since_full": self.runs_since_full,
+                    }, f, indent=2, ensure_ascii=False)
+                temp_file.replace(self.map_file)
+            except OSError as e:
+                print(f"Warning: test impact map save failed: {e}")
+
+    def record_coverage(self, test_class: str, coverage: CoverageIndex) -> None:
+        """テストクラス単独実行のカバレッジから、カバーされたファイルを対応付け"""
+        with self._lock:
+            for path, file_coverage in coverage.files.items():
+                if file_coverage.covered_count > 0:
+                    self.file_to_tests.setdefault(path, set()).add(test_class)
+
+    def tests_for(self, path: str) -> Set[str]:
+        return set(self.file_to_tests.get(path, ()))
+
+
+class TestImpactAnalyzer:
+    """変更差分から実行すべきテストを決定"""
+
+    def __init__(self, impact_map: TestImpactMap, base_branch: str = "main", full_run_interval: int = 5):
+        self.impact_map = impact_map
+        self.base_branch = base_branch
+        # 影響分析実行がこの回数続いたら全件実行
+        self.full_run_interval = full_run_interval
+
+    @staticmethod
+    def discover_test_classes(worktree_path: Path) -> Dict[str, str]:
+        """テストクラス名→ファイルパス（ファイル名＝クラス名の慣例に従う）"""
+        classes = {}
+        for files in match_required_files(worktree_path, TEST_FILE_PATTERNS).values():
+            for path in files:
+                classes[Path(path).stem] = path
+        return classes
+
+    @staticmethod
+    def qualify_test_classes(worktree_path: Path, test_classes: Dict[str, str]) -> Dict[str, str]:
+        """テストクラス名→名前空間付きクラス名（名前空間が読めないクラスは含めない）"""
+        qualified = {}
+        for name, path in test_classes.items():
+            full_path = Path(path) if os.path.isabs(path) else Path(worktree_path) / path
+            try:
+                with open(full_path, 'r', encoding='utf-8-sig', errors='replace') as f:
+                    match = _NAMESPACE_PATTERN.search(f.read())
+            except OSError:
+                continue
+            if match:
+                qualified[name] = f"{match.group(1)}.{name}"
+        return qualified
+
+    def select(self, task_id: str, worktree_path: Path, force_full: bool = False) -> TestSelection:
+        """タスクの変更に影響するテストを選択"""
+        if force_full:
+            return TestSelection("full", reasons=["full run requested"])
+
+        runs = self.impact_map.runs_since_full.get(task_id, 0)
+        if runs >= self.full_run_interval:
+            return TestSelection("full", reasons=[f"periodic full run ({runs} impacted runs since last full run)"])
+
+        changed = get_changed_lines(worktree_path, self.base_branch)
+        if changed is None:
+            return TestSelection("full", reasons=["git diff unavailable"])
+        structural = get_structural_changes(worktree_path, self.base_branch)
+        if structural is None:
+            return TestSelection("full", reasons=["git status unavailable"])
+        changed_files = sorted(set(changed) | {path for _, path in structural})
+        if not changed_files:
+            return TestSelection("full", reasons=["no changes against base branch"])
+
+        # 削除・リネーム・未追跡のソースは学習済みの対応表や命名規約で追えないため全件実行
+        labels = {"D": "deleted", "R": "renamed", "??": "untracked"}
+        for state, path in structural:
+            extension = os.path.splitext(path)[1].lower()
+            if extension == ".cs" or extension in FULL_RUN_EXTENSIONS:
+                return TestSelection("full", changed_files=changed_files,
+                                     reasons=[f"{labels[state]} file: {path}"])
+
+        test_classes = self.discover_test_classes(worktree_path)
+        test_files = {path: name for name, path in test_classes.items()}
+        selected: Set[str] = set()
+        reasons: List[str] = []
+
+        for path in changed_files:
+            extension = os.path.splitext(path)[1].lower()
+            if extension in FULL_RUN_EXTENSIONS:
+                return TestSelection("full", changed_files=changed_files,
+                                     reasons=[f"build configuration changed: {path}"])
+            if extension != ".cs":
+                continue  # ドキュメント等はテスト対象外
+            if path in test_files:
+                selected.add(test_files[path])
+                continue
+
+            learned = self.impact_map.tests_for(path)
+            heuristic = f"{Path(path).stem}Tests"
+            if learned:
+                selected.update(learned)
+            elif heuristic in test_classes:
+                selected.add(heuristic)
+                reasons.append(f"{path}: matched by naming convention ({heuristic})")
+            else:
+                return TestSelection("full", changed_files=changed_files,
+                                     reasons=[f"no known tests for changed file: {path}"])
+
+        if not selected:
+            return TestSelection("full", changed_files=changed_files,
+                                 reasons=["no source changes mapped to tests"])
+
+        classes = sorted(selected)
+        return TestSelection(
+            "impacted",
+            filter=class_filter(classes, self.qualify_test_classes(worktree_path, test_classes)),
+            test_classes=classes,
+            changed_files=changed_files,
+            reasons=reasons
+        )
+
+    def record_run(self, task_id: str, selection: TestSelection) -> None:
+        """実行結果を記録（全件実行でカウンタをリセット）"""
+        if selection.mode == "full":
+            self.impact_map.runs_since_full[task_id] = 0
+        else:
+            self.impact_map.runs_since_full[task_id] = self.impact_map.runs_since_full.get(task_id, 0) + 1
+        self.impact_map.save()
+
+
+def learn_test_impact(worktree_path: Path, impact_map: TestImpactMap, run_tests_with_coverage,
+                      test_classes: Optional[Iterable[str]] = None) -> int:
+    """
+    テストクラスごとにカバレッジ付きで実行し、対応表を学習
+
+    Args:
+        run_tests_with_coverage: filter式を受け取り CoverageIndex を返す関数
+    Returns:
+        学習したテストクラス数
+    """
+    discovered = TestImpactAnalyzer.discover_test_classes(worktree_path)
+    qualified = TestImpactAnalyzer.qualify_test_classes(worktree_path, discovered)
+    classes = list(test_classes or discovered)
+    learned = 0
+    for test_class in classes:
+        coverage = run_tests_with_coverage(class_filter([test_class], qualified))
+        if coverage is not None:
+            impact_map.record_coverage(test_class, coverage)
+            learned += 1
+    impact_map.save()
+    return learned
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+テストシャーディングモジュール
+
+テストクラスを過去の所要時間でバランスさせた N 個のシャードに分割する。
+各シャードはテストのビルド出力のコピーに対して別プロセス・別結果ディレクトリで
+並列実行し（coverlet が出力先のアセンブリを書き換えるため共有しない）、TRX とカバレッジは
+結果ディレクトリ配下をまとめて解析することで1つの test_results に統合する。
+"""
+
+import heapq
+import json
+import statistics
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+
+# 所要時間の履歴がないクラスに仮定する秒数
+DEFAULT_CLASS_DURATION = 1.0
+
+# 指数移動平均の重み（直近の実行を重視）
+DURATION_SMOOTHING = 0.5
+
+
+def test_class_of(test_name: str) -> str:
+    """完全修飾テスト名（Ns.Class.Method(args)）からクラス名を取得"""
+    base = test_name.split("(", 1)[0]
+    parts = base.rsplit(".", 2)
+    return parts[-2] if len(parts) >= 2 else base
+
+
+class TestDurationHistory:
+    """テストクラスごとの所要時間履歴（JSONで永続化）"""
+
+    def __init__(self, history_file: Path):
+        self.history_file = Path(history_file)
+        self._lock = threading.Lock()
+        self.class_durations: Dict[str, float] = {}
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                self.class_durations = dict(json.load(f).get("class_durations", {}))
+        except (OSError, ValueError):
+            pass
+
+    def record(self, test_timings: Dict[str, float]) -> None:
+        """TRX のテストごとの所要時間をクラス単位に集計して履歴を更新"""
+        totals: Dict[str, float] = {}
+        for name, duration in test_timings.items():
+            class_name = test_class_of(name)
+            totals[class_name] = totals.get(class_name, 0.0) + duration
+        if not totals:
+            return
+
+        with self._lock:
+            for class_name, duration in totals.items():
+                previous = self.class_durations.get(class_name)
+                self.class_durations[class_name] = round(
+                    duration if previous is None
+                    else DURATION_SMOOTHING * duration + (1 - DURATION_SMOOTHING) * previous, 4)
+            try:
+                self.history_file.parent.mkdir(parents=True, exist_ok=True)
+                temp_file = self.history_file.with_suffix('.tmp')
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        "updated": datetime.now().isoformat(),
+                        "class_durations": self.class_durations,
+                    }, f, indent=2, ensure_ascii=False)
+                temp_file.replace(self.history_file)
+            except OSError as e:
+                print(f"Warning: test duration history save failed: {e}")
+
+    def estimate(self, class_name: str, default: float = DEFAULT_CLASS_DURATION) -> float:
+        return self.class_durations.get(class_name, default)
+
+
+def plan_shards(test_classes: Iterable[str], history: TestDurationHistory, shard_count: int) -> List[List[str]]:
+    """
+    所要時間の長いクラスから順に、合計が最小のシャードへ割り当て（LPT法）
+
+    Returns:
+        空でないシャードのリスト（各シャードはクラス名のリスト）
+    """
+    classes = sorted(set(test_classes))
+    if not classes or shard_count <= 1:
+        return [classes] if classes else []
+
+    known = [history.class_durations[c] for c in classes if c in history.class_durations]
+    default = statistics.median(known) if known else DEFAULT_CLASS_DURATION
+    weighted = sorted(((history.estimate(c, default), c) for c in classes), key=lambda item: (-item[0], item[1]))
+
+    shards: List[List[str]] = [[] for _ in range(min(shard_count, len(classes)))]
+    loads = [(0.0, index) for index in range(len(shards))]
+    for duration, class_name in weighted:
+        load, index = heapq.heappop(loads)
+        shards[index].append(class_name)
+        heapq.heappush(loads, (load + duration, index))
+    return [sorted(shard) for shard in shards if shard]
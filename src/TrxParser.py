@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+TRX（Visual Studio テスト結果）ストリーミング解析モジュール
+
+dotnet test --logger trx の出力を iterparse で逐次読み込み、処理済み要素を
+破棄しながら件数・テストごとの結果/所要時間・失敗メッセージを抽出する。
+"""
+
+import heapq
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# 失敗メッセージ・スタックトレースの保持上限（文字数）
+MAX_MESSAGE_CHARS = 2000
+MAX_STACK_CHARS = 4000
+
+_DURATION_PATTERN = re.compile(r'^(?:(\d+)\.)?(\d+):(\d+):(\d+(?:\.\d+)?)$')
+
+# TRX outcome → test_results の区分
+_OUTCOME_BUCKETS = {
+    "Passed": "passed",
+    "Failed": "failed",
+    "Error": "failed",
+    "Timeout": "failed",
+    "Aborted": "failed",
+    "NotExecuted": "skipped",
+    "Inconclusive": "skipped",
+    "PassedButRunAborted": "passed",
+}
+
+
+def parse_duration(value: Optional[str]) -> float:
+    """TRX の duration（例: 00:00:01.2345678）を秒に変換"""
+    if not value:
+        return 0.0
+    match = _DURATION_PATTERN.match(value.strip())
+    if not match:
+        return 0.0
+    days, hours, minutes, seconds = match.groups()
+    return (int(days or 0) * 86400 + int(hours) * 3600 + int(minutes) * 60 + float(seconds))
+
+
+def _local(tag: str) -> str:
+    """名前空間を除いたタグ名"""
+    return tag.rsplit('}', 1)[-1]
+
+
+@dataclass
+class TrxSummary:
+    """1つ以上のTRXファイルの集計結果"""
+    total_count: int = 0
+    passed_count: int = 0
+    failed_count: int = 0
+    skipped_count: int = 0
+    total_duration: float = 0.0
+    test_timings: Dict[str, float] = field(default_factory=dict)
+    outcomes: Dict[str, str] = field(default_factory=dict)
+    failures: List[Dict] = field(default_factory=list)
+    source_files: List[str] = field(default_factory=list)
+
+    def slowest_tests(self, limit: int = 10) -> List[Dict]:
+        slowest = heapq.nlargest(limit, self.test_timings.items(), key=lambda item: item[1])
+        return [{"name": name, "duration": round(duration, 3)} for name, duration in slowest]
+
+    def merge(self, other: "TrxSummary") -> "TrxSummary":
+        """別プロジェクトのTRX結果を合算"""
+        self.total_count += other.total_count
+        self.passed_count += other.passed_count
+        self.failed_count += other.failed_count
+        self.skipped_count += other.skipped_count
+        self.total_duration += other.total_duration
+        self.test_timings.update(other.test_timings)
+        self.outcomes.update(other.outcomes)
+        self.failures.extend(other.failures)
+        self.source_files.extend(other.source_files)
+        return self
+
+    def to_test_results(self, slowest_limit: int = 10) -> Dict:
+        """ArtifactValidator の test_results 形式に変換"""
+        return {
+            "total_count": self.total_count,
+            "passed_count": self.passed_count,
+            "failed_count": self.failed_count,
+            "skipped_count": self.skipped_count,
+            "failed_tests": [f["name"] for f in self.failures],
+            "failures": self.failures,
+            "slowest_tests": self.slowest_tests(slowest_limit),
+            "test_timings": {name: round(d, 4) for name, d in self.test_timings.items()},
+            "trx_files": self.source_files,
+        }
+
+
+def _qualified_name(test_name: str, class_name: Optional[str]) -> str:
+    """UnitTest/TestMethod の className でテスト名を完全修飾（MSTest・NUnit の testName はメソッド名のみ）"""
+    if not class_name:
+        return test_name
+    # 旧形式の TRX は "Ns.Class, Assembly" の形で書き出す
+    class_name = class_name.split(",", 1)[0].strip()
+    if test_name == class_name or test_name.startswith(class_name + "."):
+        return test_name
+    return f"{class_name}.{test_name}"
+
+
+def _error_info(result: ET.Element) -> Tuple[str, str]:
+    """UnitTestResult 直下の Output/ErrorInfo から (message, stack_trace) を取得"""
+    for output in result:
+        if _local(output.tag) != "Output":
+            continue
+        for info in output:
+            if _local(info.tag) == "ErrorInfo":
+                texts = {_local(child.tag): child.text or "" for child in info}
+                return texts.get("Message", "")[:MAX_MESSAGE_CHARS], texts.get("StackTrace", "")[:MAX_STACK_CHARS]
+    return "", ""
+
+
+def parse_trx(trx_path: Path) -> TrxSummary:
+    """
+    TRXファイルを逐次解析
+
+    結果は testId ごとに集計し、名前は UnitTest 定義の className で完全修飾する。
+    処理済みの要素は親から取り外し、ツリーに残さない。
+
+    Raises:
+        ET.ParseError, OSError
+    """
+    summary = TrxSummary(source_files=[str(trx_path)])
+    counters: Optional[Dict[str, str]] = None
+    # testId -> (testName, outcome, duration, message, stack_trace)
+    results: Dict[str, Tuple[str, str, float, str, str]] = {}
+    class_names: Dict[str, str] = {}
+    path: List[ET.Element] = []
+
+    for event, elem in ET.iterparse(str(trx_path), events=("start", "end")):
+        if event == "start":
+            path.append(elem)
+            continue
+        path.pop()
+        parent = path[-1] if path else None
+        tag = _local(elem.tag)
+
+        if tag == "UnitTestResult":
+            # データ駆動テストの InnerResults は親の1件として数える（所要時間も親に含まれる）
+            if parent is not None and _local(parent.tag) == "InnerResults":
+                continue
+            test_name = elem.get("testName") or elem.get("testId") or "unknown"
+            key = elem.get("testId") or test_name
+            duration = parse_duration(elem.get("duration"))
+            message, stack_trace = _error_info(elem)
+            if key in results:
+                duration += results[key][2]
+            results[key] = (test_name, elem.get("outcome", "NotExecuted"), duration, message, stack_trace)
+        elif tag == "TestMethod":
+            if parent is not None and _local(parent.tag) == "UnitTest" and parent.get("id"):
+                class_names[parent.get("id")] = elem.get("className", "")
+            continue
+        elif tag == "Counters":
+            counters = dict(elem.attrib)
+            continue
+        elif tag not in ("UnitTest", "TestEntry", "TestList"):
+            continue
+
+        if parent is not None:
+            parent.remove(elem)
+
+    buckets = {"passed": 0, "failed": 0, "skipped": 0}
+    for key, (test_name, outcome, duration, message, stack_trace) in results.items():
+        name = _qualified_name(test_name, class_names.get(key))
+        bucket = _OUTCOME_BUCKETS.get(outcome, "failed")
+        buckets[bucket] += 1
+        summary.test_timings[name] = summary.test_timings.get(name, 0.0) + duration
+        summary.outcomes[name] = outcome
+        summary.total_duration += duration
+        if bucket == "failed":
+            summary.failures.append({
+                "name": name,
+                "outcome": outcome,
+                "message": message,
+                "stack_trace": stack_trace,
+            })
+
+    # 件数は結果要素から集計（Countersは実行エンジンの集計値として優先）
+    if counters:
+        summary.total_count = int(counters.get("total", len(results)))
+        summary.passed_count = int(counters.get("passed", buckets["passed"]))
+        summary.failed_count = sum(int(counters.get(k, 0)) for k in ("failed", "error", "timeout", "aborted"))
+        summary.skipped_count = max(0, summary.total_count - summary.passed_count - summary.failed_count)
+    else:
+        summary.total_count = len(results)
+        summary.passed_count = buckets["passed"]
+        summary.failed_count = buckets["failed"]
+        summary.skipped_count = buckets["skipped"]
+
+    return summary
+
+
+def parse_trx_files(trx_paths: Iterable[Path]) -> Tuple[Optional[TrxSummary], List[str]]:
+    """
+    複数テストプロジェクトのTRXを解析して合算
+
+    Returns:
+        (merged_summary_or_none, parse_errors)
+    """
+    merged: Optional[TrxSummary] = None
+    errors = []
+    for trx_path in trx_paths:
+        try:
+            summary = parse_trx(trx_path)
+        except (ET.ParseError, OSError) as e:
+            errors.append(f"TRX parse error ({trx_path}): {e}")
+            continue
+        merged = summary if merged is None else merged.merge(summary)
+    return merged, errors
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+成果物検証結果キャッシュモジュール
+
+worktree のソース・プロジェクトファイルのMerkleハッシュとツールバージョンを
+キーに、ビルド・テスト・カバレッジ結果を保存し、変更のない再検証を省略する。
+"""
+
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import threading
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+# ハッシュ対象とする拡張子（ビルド結果に影響するファイル）
+SOURCE_EXTENSIONS = {
+    ".cs", ".csproj", ".sln", ".props", ".targets", ".xaml", ".resx",
+    ".json", ".config", ".runsettings", ".editorconfig",
+}
+
+# 走査しないディレクトリ（ビルド出力・VCS・テスト結果）
+PRUNED_DIRS = {"bin", "obj", ".git", ".vs", "node_modules", "TestResults"}
+
+
+def validation_cache_dir(project_root: Path) -> Path:
+    """検証の派生データ（結果・ハッシュ・テスト影響・所要時間・最新結果）の置き場所（バージョン管理外）"""
+    return Path(project_root) / ".claude" / "cache" / "validation"
+
+
+@lru_cache(maxsize=8)
+def get_tool_version(dotnet_command: str = "dotnet") -> str:
+    """dotnet SDK バージョンを取得（プロセス内でキャッシュ）"""
+    try:
+        result = subprocess.run(
+            shlex.split(dotnet_command, posix=os.name != "nt") + ["--version"],
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        if result.returncode == 0:
+            return result.stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        pass
+    return "unknown"
+
+
+class WorktreeHasher:
+    """worktree のMerkleハッシュ計算（mtime/sizeによる差分ハッシュ）"""
+
+    def __init__(self, state_file: Path):
+        self.state_file = Path(state_file)
+        self._file_hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._load_state()
+
+    def _load_state(self) -> None:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                raw = json.load(f)
+            self._file_hashes = {path: tuple(entry) for path, entry in raw.items()}
+        except (OSError, ValueError):
+            self._file_hashes = {}
+
+    def _save_state(self) -> None:
+        try:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_file = self.state_file.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._file_hashes, f)
+            temp_file.replace(self.state_file)
+        except OSError as e:
+            print(f"Warning: hash state save failed: {e}")
+
+    def _hash_file(self, path: str, rel_path: str, mtime_ns: int, size: int,
+                   seen: Dict[str, Tuple[int, int, str]]) -> str:
+        cached = self._file_hashes.get(rel_path)
+        if cached and cached[0] == mtime_ns and cached[1] == size:
+            digest = cached[2]
+        else:
+            h = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    h.update(chunk)
+            digest = h.hexdigest()
+        seen[rel_path] = (mtime_ns, size, digest)
+        return digest
+
+    def _hash_dir(self, path: str, rel_path: str, seen: Dict) -> Optional[str]:
+        entries = []
+        with os.scandir(path) as it:
+            for entry in it:
+                child_rel = f"{rel_path}/{entry.name}" if rel_path else entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in PRUNED_DIRS:
+                        continue
+                    child = self._hash_dir(entry.path, child_rel, seen)
+                    if child:
+                        entries.append((entry.name, "d", child))
+                elif entry.is_file() and os.path.splitext(entry.name)[1].lower() in SOURCE_EXTENSIONS:
+                    st = entry.stat()
+                    digest = self._hash_file(entry.path, child_rel, st.st_mtime_ns, st.st_size, seen)
+                    entries.append((entry.name, "f", digest))
+
+        if not entries:
+            return None
+        entries.sort()
+        h = hashlib.sha256()
+        for name, kind, digest in entries:
+            h.update(f"{kind} {name} {digest}\n".encode('utf-8'))
+        return h.hexdigest()
+
+    def compute(self, worktree_path: Path) -> str:
+        """worktree のルートハッシュを計算"""
+        seen: Dict[str, Tuple[int, int, str]] = {}
+        root = self._hash_dir(str(worktree_path), "", seen) or hashlib.sha256(b"").hexdigest()
+        if seen != self._file_hashes:
+            self._file_hashes = seen
+            self._save_state()
+        return root
+
+
+class ValidationResultCache:
+    """検証結果のディスクキャッシュ（サイズ上限付きLRU）"""
+
+    def __init__(self, cache_dir: Path, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.results_dir = self.cache_dir / "results"
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def hasher_for(self, task_id: str) -> WorktreeHasher:
+        return WorktreeHasher(self.cache_dir / "hashes" / f"{task_id}.json")
+
+    def make_key(self, task_id: str, worktree_path: Path, extra: str = "",
+                 dotnet_command: str = "dotnet") -> str:
+        """
+        worktreeの実パス＋ハッシュ＋ツールバージョン＋追加条件からキーを生成
+
+        結果にはビルド出力やカバレッジレポートなど worktree 内のパスが含まれるため、
+        内容が同じでも別の worktree の結果は再利用しない。
+        """
+        tree_hash = self.hasher_for(task_id).compute(worktree_path)
+        resolved = os.path.normcase(str(Path(worktree_path).resolve()))
+        material = f"{resolved}|{tree_hash}|{get_tool_version(dotnet_command)}|{extra}"
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry_file = self.results_dir / f"{key}.json"
+        with self._lock:
+            try:
+                with open(entry_file, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                os.utime(entry_file)  # LRU: 最終利用時刻を更新
+                return entry
+            except (OSError, ValueError):
+                return None
+
+    def put(self, key: str, result: Dict) -> None:
+        entry = dict(result)
+        entry["cached_at"] = datetime.now().isoformat()
+        with self._lock:
+            try:
+                self.results_dir.mkdir(parents=True, exist_ok=True)
+                temp_file = self.results_dir / f"{key}.tmp"
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                temp_file.replace(self.results_dir / f"{key}.json")
+                self._evict()
+            except OSError as e:
+                print(f"Warning: validation cache write failed: {e}")
+
+    def _evict(self) -> None:
+        """件数・合計サイズの上限を超えた分を古い順に削除"""
+        entries = []
+        total = 0
+        with os.scandir(self.results_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".json"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+                    total += st.st_size
+        entries.sort()
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self) -> None:
+        with self._lock:
+            if self.results_dir.exists():
+                for entry in self.results_dir.iterdir():
+                    entry.unlink()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+検証ステージDAGモジュール
+
+検証処理を入力（上流ステージ）を宣言したステージの DAG として表現し、
+依存関係のないステージを並行実行する。各ステージの結果は入力から導出した
+キーでキャッシュし、変更の影響を受けたステージだけを再実行する。
+"""
+
+import hashlib
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+# ステージ関数: 上流ステージの結果を受け取り (ok, value, message) を返す
+StageFunction = Callable[[Dict[str, "StageResult"]], Tuple[bool, Any, str]]
+
+
+@dataclass
+class Stage:
+    """検証ステージの定義"""
+    name: str
+    run: StageFunction
+    inputs: List[str] = field(default_factory=list)
+    # キャッシュキーの材料（上流の key を含めること。None ならキャッシュしない）
+    cache_key: Optional[Callable[[Dict[str, "StageResult"]], Optional[str]]] = None
+    # 結果をキャッシュしてよいか（環境要因の失敗を除外する）
+    cacheable: Callable[[bool, Any, str], bool] = lambda ok, value, message: True
+    # キャッシュ済みの結果を今使えるか（ビルド出力が消えていないか等。False なら再実行）
+    cache_valid: Callable[[Dict[str, "StageResult"], Any], bool] = lambda inputs, value: True
+
+
+@dataclass
+class StageResult:
+    """ステージの実行結果"""
+    name: str
+    status: str                     # "passed" / "failed" / "skipped"
+    value: Any = None
+    message: str = ""
+    duration: float = 0.0
+    cached: bool = False
+    key: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "passed"
+
+    def summary(self) -> Dict:
+        return {"status": self.status, "duration": round(self.duration, 3), "cached": self.cached,
+                "message": self.message}
+
+
+class StageGraph:
+    """ステージDAGの実行器（結果キャッシュは get/put を持つオブジェクト）"""
+
+    def __init__(self, stages: List[Stage], cache=None, max_workers: int = 4):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache = cache
+        self.max_workers = max_workers
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in self.stages]
+            if missing:
+                raise ValueError(f"Stage {stage.name} has unknown inputs: {missing}")
+
+    def _stage_key(self, stage: Stage, results: Dict[str, StageResult]) -> Optional[str]:
+        if stage.cache_key is None or self.cache is None:
+            return None
+        material = stage.cache_key(results)
+        if material is None:
+            return None
+        return hashlib.sha256(f"stage:{stage.name}|{material}".encode('utf-8')).hexdigest()
+
+    def _execute(self, stage: Stage, results: Dict[str, StageResult]) -> StageResult:
+        start = time.perf_counter()
+        inputs = {name: results[name] for name in stage.inputs}
+        key = self._stage_key(stage, results)
+
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None and stage.cache_valid(inputs, cached["value"]):
+                return StageResult(stage.name, "passed" if cached["ok"] else "failed", cached["value"],
+                                   cached["message"], time.perf_counter() - start, True, key)
+
+        try:
+            ok, value, message = stage.run(inputs)
+        except Exception as e:
+            ok, value, message = False, None, f"{stage.name} stage error: {e}"
+            key = None
+
+        if key is not None and stage.cacheable(ok, value, message):
+            self.cache.put(key, {"ok": ok, "value": value, "message": message})
+        return StageResult(stage.name, "passed" if ok else "failed", value, message,
+                           time.perf_counter() - start, False, key)
+
+    def run(self) -> Dict[str, StageResult]:
+        """
+        全ステージを依存順に実行（準備のできたステージは並行実行）
+
+        上流が失敗・スキップしたステージは skipped になる。
+        """
+        results: Dict[str, StageResult] = {}
+        pending = dict(self.stages)
+        running: Dict[Future, str] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                progressed = False
+                for name, stage in list(pending.items()):
+                    if not all(dep in results for dep in stage.inputs):
+                        continue
+                    del pending[name]
+                    progressed = True
+                    failed = [dep for dep in stage.inputs if not results[dep].ok]
+                    if failed:
+                        results[name] = StageResult(name, "skipped", message=f"upstream failed: {', '.join(failed)}")
+                    else:
+                        # 上流の結果は確定済みのため、スナップショットを渡す
+                        running[executor.submit(self._execute, stage, dict(results))] = name
+
+                if progressed and not running:
+                    continue  # スキップにより新たに準備できたステージがある
+                if not running:
+                    raise ValueError(f"Stage graph has a cycle: {sorted(pending)}")
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    results[name] = future.result()
+
+        return results
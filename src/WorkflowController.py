@@ -6,9 +6,21 @@ GameMacroAssistant AI開発ワークフロー管理
 
 import json
 import os
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from enum import Enum
 from datetime import datetime
+try:
+    from .ProgressSnapshot import ProgressSnapshot, load_progress_snapshot, invalidate_snapshot
+    from .TaskCatalog import get_task_catalog
+    from .QualityGates import QualityGateEngine
+    from .TaskQueue import TaskQueueBackend, open_task_queue, task_queue_path
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from ProgressSnapshot import ProgressSnapshot, load_progress_snapshot, invalidate_snapshot
+    from TaskCatalog import get_task_catalog
+    from QualityGates import QualityGateEngine
+    from TaskQueue import TaskQueueBackend, open_task_queue, task_queue_path
 
 class ProjectPhase(Enum):
     PLANNING = "planning"
@@ -26,10 +38,28 @@ class TaskStatus(Enum):
 class WorkflowController:
     """メインエージェント統括機能 - ワークフロー自動制御"""
     
-    def __init__(self, project_root: str = "."):
+    def __init__(self, project_root: str = ".", task_queue: Optional[TaskQueueBackend] = None):
         self.project_root = project_root
         self.progress_file = os.path.join(project_root, ".claude", "progress.json")
         self.max_concurrent_devs = 2
+        # ArtifactValidator と共有するタスク仕様カタログ
+        self.task_catalog = get_task_catalog(os.path.join(project_root, "docs", "pm", "tasks"))
+        # 宣言的品質ゲート（.claude/quality_gates.json、タスク単位で増分評価）
+        self.quality_gates = QualityGateEngine(project_root)
+        # Dev-Agent へのタスク割り当てキュー（未指定なら初回使用時に .claude/task_queue.db を開く）
+        self._task_queue = task_queue
+    
+    @property
+    def task_queue(self) -> TaskQueueBackend:
+        if self._task_queue is None:
+            self._task_queue = open_task_queue(self.project_root)
+        return self._task_queue
+
+    def _existing_task_queue(self) -> Optional[TaskQueueBackend]:
+        """参照専用の処理向けのキュー（未作成なら None、DB ファイルを作らない）"""
+        if self._task_queue is None and not task_queue_path(self.project_root).exists():
+            return None
+        return self.task_queue
         
     def load_progress(self) -> Dict:
         """進捗状況をJSONから読み込み"""
@@ -39,10 +69,25 @@ class WorkflowController:
         except FileNotFoundError:
             return self._init_progress()
     
+    def load_snapshot(self) -> ProgressSnapshot:
+        """読み取り専用の共有スナップショットを取得"""
+        try:
+            return load_progress_snapshot(self.progress_file)[1]
+        except FileNotFoundError:
+            return ProgressSnapshot(self._init_progress())
+    
     def save_progress(self, progress: Dict) -> None:
         """進捗状況をJSONに保存"""
         with open(self.progress_file, 'w', encoding='utf-8') as f:
             json.dump(progress, f, indent=2, ensure_ascii=False)
+        invalidate_snapshot(self.progress_file)
+    
+    @staticmethod
+    def _snapshot_of(progress: Union[Dict, ProgressSnapshot]) -> ProgressSnapshot:
+        """dict / スナップショットのどちらでも受け付ける"""
+        if isinstance(progress, ProgressSnapshot):
+            return progress
+        return ProgressSnapshot(progress)
     
     def _init_progress(self) -> Dict:
         """初期進捗状況を生成"""
@@ -69,22 +114,20 @@ class WorkflowController:
             }
         }
     
-    def determine_current_phase(self, progress: Dict) -> ProjectPhase:
+    def determine_current_phase(self, progress: Union[Dict, ProgressSnapshot]) -> ProjectPhase:
         """現在のプロジェクト状態を分析してフェーズを自動判定"""
-        active_tasks = progress.get("active_tasks", {})
-        next_available = progress.get("next_available_tasks", [])
-        workflow_state = progress.get("workflow_state", {})
+        snapshot = self._snapshot_of(progress)
+        next_available = snapshot.next_available_tasks
+        workflow_state = snapshot.workflow_state
         
         # 統合準備完了チェック
-        integration_completed = workflow_state.get("integration_completed", [])
-        ready_for_next_sprint = workflow_state.get("ready_for_next_sprint", False)
+        integration_completed = workflow_state.integration_completed
+        ready_for_next_sprint = workflow_state.ready_for_next_sprint
         
         # 進行中タスクの状態分析
-        in_progress_count = sum(1 for task in active_tasks.values() 
-                               if task.get("status") == "in_progress")
-        completed_count = sum(1 for task in active_tasks.values() 
-                             if task.get("status") == "completed")
-        pending_tests = workflow_state.get("user_test_pending", [])
+        in_progress_count = snapshot.count_by_status("in_progress")
+        completed_count = snapshot.count_by_status("completed")
+        pending_tests = workflow_state.user_test_pending
         
         # フェーズ判定ロジック
         if ready_for_next_sprint and next_available:
@@ -100,28 +143,29 @@ class WorkflowController:
         else:
             return ProjectPhase.PLANNING
     
-    def get_next_actions(self, progress: Dict) -> List[Tuple[str, Dict]]:
+    def get_next_actions(self, progress: Union[Dict, ProgressSnapshot]) -> List[Tuple[str, Dict]]:
         """現在フェーズに基づいて次に実行すべきアクションを決定"""
-        current_phase = self.determine_current_phase(progress)
+        snapshot = self._snapshot_of(progress)
+        current_phase = self.determine_current_phase(snapshot)
         actions = []
         
         if current_phase == ProjectPhase.PLANNING:
             # 新規スプリント計画が必要
-            if progress.get("next_available_tasks"):
+            if snapshot.next_available_tasks:
                 actions.append(("planner-agent", {
                     "action": "create_next_sprint",
-                    "available_tasks": progress["next_available_tasks"]
+                    "available_tasks": list(snapshot.next_available_tasks)
                 }))
         
         elif current_phase == ProjectPhase.DEVELOPMENT:
             # 開発タスクの並行実行管理
-            actions.extend(self._get_development_actions(progress))
+            actions.extend(self._get_development_actions(snapshot))
         
         elif current_phase == ProjectPhase.REVIEW:
             # コードレビュー実行
             completed_tasks = [
-                task_id for task_id, task in progress["active_tasks"].items()
-                if task.get("status") == "completed" and task.get("review_status") != "approved"
+                task.task_id for task in snapshot.tasks_by_status("completed")
+                if task.review_status != "approved"
             ]
             for task_id in completed_tasks:
                 actions.append(("review-agent", {
@@ -133,14 +177,14 @@ class WorkflowController:
             # ユーザーテスト準備・実行
             actions.append(("testdoc-agent", {
                 "action": "prepare_user_tests",
-                "completed_tasks": progress.get("workflow_state", {}).get("integration_completed", [])
+                "completed_tasks": list(snapshot.workflow_state.integration_completed)
             }))
         
         elif current_phase == ProjectPhase.INTEGRATION:
             # ブランチ統合実行
             ready_tasks = [
-                task_id for task_id, task in progress["active_tasks"].items()
-                if task.get("review_status") == "approved"
+                task_id for task_id, task in snapshot.active_tasks.items()
+                if task.review_status == "approved"
             ]
             if ready_tasks:
                 actions.append(("integrator-agent", {
@@ -150,22 +194,21 @@ class WorkflowController:
         
         return actions
     
-    def _get_development_actions(self, progress: Dict) -> List[Tuple[str, Dict]]:
+    def _get_development_actions(self, snapshot: ProgressSnapshot) -> List[Tuple[str, Dict]]:
         """開発フェーズでの並行タスク管理"""
         actions = []
-        active_tasks = progress.get("active_tasks", {})
         
-        # 現在の進行中タスク数をカウント
-        in_progress_tasks = [
-            task_id for task_id, task in active_tasks.items()
-            if task.get("status") == "in_progress"
-        ]
+        # 現在の進行中タスク数をカウント（キューに投入済みのタスクは取得待ちも含めて数える）
+        task_queue = self._existing_task_queue()
+        queued_tasks = set(task_queue.pending_task_ids()) if task_queue is not None else set()
+        in_progress_tasks = set(snapshot.task_ids_by_status("in_progress")) | queued_tasks
         
         # 新規タスクアサイン可能かチェック
         if len(in_progress_tasks) < self.max_concurrent_devs:
+            # 依存タスクが統合済みで、キューに投入されていない（claim() で割り当てられない）ものだけを候補にする
             pending_tasks = [
-                task_id for task_id, task in active_tasks.items()
-                if task.get("status") == "pending"
+                task_id for task_id in snapshot.task_ids_by_status("pending")
+                if task_id not in queued_tasks and self._dependencies_satisfied(snapshot, task_id)
             ]
             
             # 利用可能なDev-Agentスロット分だけタスクをアサイン
@@ -180,6 +223,52 @@ class WorkflowController:
         
         return actions
     
+    def dispatch_ready_tasks(self, snapshot: Optional[ProgressSnapshot] = None) -> List[str]:
+        """
+        依存関係を満たした pending タスクをキューに投入
+        
+        Dev-Agent は task_queue.claim() で取得し、ハートビートでリースを延長する。
+        
+        Returns:
+            新たに投入したタスクID
+        """
+        snapshot = snapshot or self.load_snapshot()
+        queued = []
+        for task_id in snapshot.task_ids_by_status("pending"):
+            if not self._dependencies_satisfied(snapshot, task_id):
+                continue
+            task = snapshot.task(task_id)
+            payload = {"task_id": task_id, "worktree_path": task.worktree_path, "branch_name": task.branch_name}
+            if self.task_queue.enqueue(task_id, payload):
+                queued.append(task_id)
+        return queued
+    
+    def _dependencies_satisfied(self, snapshot: ProgressSnapshot, task_id: str) -> bool:
+        """
+        progress.json とタスク仕様の両方の依存関係が統合済みか
+        
+        タスクブランチは基準ブランチから作成されるため、依存タスクのコードが
+        統合されるまで着手できない（status の completed は開発完了・レビュー待ちで、
+        まだ統合されていない）。integration_completed に含まれる依存タスクは
+        状態によらず満たされているものとし、active_tasks に無い依存タスク
+        （以前のスプリントでアーカイブ済み）は所属スプリントが completed_sprints に
+        含まれていれば満たされているものとする。
+        """
+        task = snapshot.task(task_id)
+        dependencies = set(task.dependencies if task else ())
+        dependencies.update(self.task_catalog.dependencies_of(task_id))
+        integrated = set(snapshot.workflow_state.integration_completed)
+        completed_sprints = set(snapshot.completed_sprints)
+        for dependency in dependencies:
+            if dependency in integrated:
+                continue
+            if dependency in snapshot.active_tasks:
+                return False
+            entry = self.task_catalog.get_entry(dependency)
+            if entry is None or entry.sprint is None or str(entry.sprint) not in completed_sprints:
+                return False
+        return True
+    
     def update_task_status(self, task_id: str, new_status: str, 
                           assignee: Optional[str] = None) -> None:
         """タスク状態の更新"""
@@ -210,40 +299,32 @@ class WorkflowController:
         progress["project_metrics"]["in_progress_tasks"] = in_progress_count
         progress["project_metrics"]["total_tasks_planned"] = len(active_tasks)
     
-    def check_quality_gates(self, progress: Dict) -> Dict[str, bool]:
-        """品質ゲートの自動チェック"""
-        metrics = progress.get("project_metrics", {})
-        coverage_str = metrics.get("test_coverage", "0%")
-        
-        # カバレッジ数値抽出
-        try:
-            coverage = float(coverage_str.replace("%", ""))
-        except:
-            coverage = 0.0
-        
-        return {
-            "test_coverage_ok": coverage >= 80.0,
-            "no_critical_bugs": True,  # TODO: バグトラッキング統合
-            "all_tests_passing": True,  # TODO: CI/CD統合
-            "ready_for_integration": coverage >= 80.0
-        }
+    def check_quality_gates(self, progress: Union[Dict, ProgressSnapshot]) -> Dict[str, bool]:
+        """品質ゲートの自動チェック（ゲート名 → 成立可否）"""
+        return self.quality_gates.check(self._snapshot_of(progress))
+    
+    def get_quality_gate_report(self, progress: Union[Dict, ProgressSnapshot, None] = None) -> Dict[str, Dict]:
+        """品質ゲートの詳細（不成立タスク・プロジェクト指標値を含む）"""
+        snapshot = self.load_snapshot() if progress is None else self._snapshot_of(progress)
+        return self.quality_gates.evaluate(snapshot)
     
     def get_workflow_summary(self) -> Dict:
         """現在のワークフロー状態サマリー"""
-        progress = self.load_progress()
-        current_phase = self.determine_current_phase(progress)
-        next_actions = self.get_next_actions(progress)
-        quality_gates = self.check_quality_gates(progress)
+        snapshot = self.load_snapshot()
+        current_phase = self.determine_current_phase(snapshot)
+        next_actions = self.get_next_actions(snapshot)
+        quality_gates = self.check_quality_gates(snapshot)
+        metrics = snapshot.metrics
         
         return {
             "current_phase": current_phase.value,
             "next_actions": next_actions,
             "quality_status": quality_gates,
             "progress_summary": {
-                "completed_tasks": progress["project_metrics"]["completed_tasks"],
-                "total_tasks": progress["project_metrics"]["total_tasks_planned"],
-                "test_coverage": progress["project_metrics"]["test_coverage"],
-                "sprint_velocity": progress["project_metrics"]["sprint_velocity"]
+                "completed_tasks": metrics.completed_tasks,
+                "total_tasks": metrics.total_tasks_planned,
+                "test_coverage": metrics.test_coverage,
+                "sprint_velocity": metrics.sprint_velocity
             }
         }
 
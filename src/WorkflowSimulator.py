@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+エージェントワークフローの離散事象シミュレーター
+
+タスク集合（progress.json と仕様の依存関係、または合成データ）を
+開発 → レビュー → ユーザーテスト（バッチ）→ 完了 の流れで多数回シミュレーションし、
+max_concurrent_devs・レビュー担当数・ユーザーテストのバッチサイズが
+スプリント所要時間（makespan）・スループット・フェーズ別待ち行列長・
+エージェント稼働率に与える影響を見積もる。
+
+- 割り当て規則は WorkflowController._get_development_actions と同じ
+  （依存タスクがユーザーテストまで終えた pending タスクを順に、同時開発数の上限まで）
+- レビュー却下・開発失敗は WorkflowStateMachine と同じく Dev-Agent へ差し戻す
+- 各フェーズの所要時間（対数正規分布）と失敗率は status_history から推定する
+- 全シナリオ分の乱数は事前に一括生成する（NumPy があればベクトル化）
+
+時間の単位は時間（hours）。
+"""
+
+import heapq
+import math
+import random
+import statistics
+from bisect import insort
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # 任意依存（乱数の一括生成）
+except ImportError:
+    np = None
+
+try:
+    from .ProgressSnapshot import ProgressSnapshot, TaskSnapshot
+except ImportError:
+    import os
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from ProgressSnapshot import ProgressSnapshot, TaskSnapshot
+
+
+# フェーズとその間タスクが置かれるステータス
+STAGE_STATUSES = {"dev": "in_progress", "review": "review_pending", "user_test": "user_test_pending"}
+# 差し戻し（失敗）とみなす遷移先
+FAILURE_STATUSES = {"pending", "in_progress", "failed", "blocked", "bug_fixing"}
+# 分布推定に必要な最小サンプル数（未満は既定値）
+MIN_SAMPLES = 3
+
+
+@dataclass
+class StageDistribution:
+    """フェーズ所要時間の対数正規分布"""
+    mu: float
+    sigma: float
+    samples: int = 0
+
+    @property
+    def median_hours(self) -> float:
+        return math.exp(self.mu)
+
+    @classmethod
+    def from_median(cls, median_hours: float, sigma: float) -> "StageDistribution":
+        return cls(math.log(median_hours), sigma)
+
+    @classmethod
+    def fit(cls, durations: Sequence[float], default: "StageDistribution") -> "StageDistribution":
+        logs = [math.log(d) for d in durations if d > 0]
+        if len(logs) < MIN_SAMPLES:
+            return default
+        return cls(statistics.fmean(logs), max(statistics.stdev(logs), 0.1), len(logs))
+
+
+@dataclass
+class WorkflowDistributions:
+    """シミュレーションに使う所要時間・失敗率"""
+    dev: StageDistribution = field(default_factory=lambda: StageDistribution.from_median(4.0, 0.6))
+    review: StageDistribution = field(default_factory=lambda: StageDistribution.from_median(1.0, 0.5))
+    user_test: StageDistribution = field(default_factory=lambda: StageDistribution.from_median(0.5, 0.5))
+    dev_fail_prob: float = 0.05
+    review_fail_prob: float = 0.2
+
+    @classmethod
+    def from_history(cls, tasks: Iterable[TaskSnapshot]) -> "WorkflowDistributions":
+        """status_history の滞在時間と遷移先から推定"""
+        defaults = cls()
+        durations: Dict[str, List[float]] = {stage: [] for stage in STAGE_STATUSES}
+        outcomes: Dict[str, List[bool]] = {"dev": [], "review": []}
+        stage_of = {status: stage for stage, status in STAGE_STATUSES.items()}
+        for task in tasks:
+            transitions = []
+            for transition in task.status_history:
+                try:
+                    transitions.append((datetime.fromisoformat(transition.timestamp), transition))
+                except ValueError:
+                    continue
+            transitions.sort(key=lambda item: item[0])
+            for (start, entered), (end, left) in zip(transitions, transitions[1:]):
+                stage = stage_of.get(entered.to_status)
+                if stage is None:
+                    continue
+                durations[stage].append((end - start).total_seconds() / 3600)
+                if stage in outcomes:
+                    outcomes[stage].append(left.to_status in FAILURE_STATUSES)
+
+        def rate(values: List[bool], default: float) -> float:
+            return sum(values) / len(values) if len(values) >= MIN_SAMPLES else default
+
+        return cls(
+            dev=StageDistribution.fit(durations["dev"], defaults.dev),
+            review=StageDistribution.fit(durations["review"], defaults.review),
+            user_test=StageDistribution.fit(durations["user_test"], defaults.user_test),
+            dev_fail_prob=rate(outcomes["dev"], defaults.dev_fail_prob),
+            review_fail_prob=rate(outcomes["review"], defaults.review_fail_prob),
+        )
+
+
+@dataclass
+class SimulationTasks:
+    """シミュレーション対象のタスク（依存関係はインデックスで保持）"""
+    task_ids: List[str]
+    dependencies: List[List[int]]
+
+    def __len__(self) -> int:
+        return len(self.task_ids)
+
+
+def tasks_from_controller(controller, snapshot: ProgressSnapshot) -> SimulationTasks:
+    """未完了タスクと依存関係（progress.json とタスク仕様）を WorkflowController から取得"""
+    task_ids = [tid for tid, task in snapshot.active_tasks.items() if task.status != "completed"]
+    index = {tid: i for i, tid in enumerate(task_ids)}
+    dependencies = []
+    for task_id in task_ids:
+        deps = set(snapshot.active_tasks[task_id].dependencies)
+        deps.update(controller.task_catalog.dependencies_of(task_id))
+        # 完了済み・未知のタスクへの依存は満たされているものとする
+        dependencies.append(sorted(index[d] for d in deps if d in index))
+    return SimulationTasks(task_ids, dependencies)
+
+
+def synthetic_tasks(count: int, dependency_prob: float = 0.1, seed: Optional[int] = None) -> SimulationTasks:
+    """前方のタスクにのみ依存するランダムな DAG"""
+    rng = random.Random(seed)
+    dependencies = [[j for j in range(i) if rng.random() < dependency_prob] for i in range(count)]
+    return SimulationTasks([f"S-{i + 1:03d}" for i in range(count)], dependencies)
+
+
+@dataclass
+class SimulationConfig:
+    """シミュレーションする運用パラメータ"""
+    max_concurrent_devs: int = 2
+    review_agents: int = 1
+    user_test_batch: int = 1        # この件数たまったらユーザーテストを実施（上流が空なら即実施）
+    max_attempts: int = 5           # 上限回目の開発・レビューは成功とみなす
+
+
+def _draw(rng, dist: StageDistribution, shape: Tuple[int, ...]):
+    if np is not None:
+        return rng.lognormal(dist.mu, dist.sigma, shape)
+    count = math.prod(shape)
+    flat = [rng.lognormvariate(dist.mu, dist.sigma) for _ in range(count)]
+    return _reshape(flat, shape)
+
+
+def _bernoulli(rng, prob: float, shape: Tuple[int, ...]):
+    if np is not None:
+        return rng.random(shape) < prob
+    return _reshape([rng.random() < prob for _ in range(math.prod(shape))], shape)
+
+
+def _reshape(flat: List, shape: Tuple[int, ...]) -> List:
+    for size in reversed(shape[1:]):
+        flat = [flat[i:i + size] for i in range(0, len(flat), size)]
+    return flat
+
+
+def sample_scenarios(dists: WorkflowDistributions, task_count: int, scenarios: int, max_attempts: int,
+                     seed: Optional[int] = None) -> Dict[str, List]:
+    """全シナリオ分の所要時間・失敗フラグを一括生成（[シナリオ][タスク][試行]）"""
+    rng = np.random.default_rng(seed) if np is not None else random.Random(seed)
+    attempts_shape = (scenarios, task_count, max_attempts)
+    samples = {
+        "dev": _draw(rng, dists.dev, attempts_shape),
+        "review": _draw(rng, dists.review, attempts_shape),
+        "user_test": _draw(rng, dists.user_test, (scenarios, task_count)),
+        "dev_fail": _bernoulli(rng, dists.dev_fail_prob, attempts_shape),
+        "review_fail": _bernoulli(rng, dists.review_fail_prob, attempts_shape),
+    }
+    if np is not None:
+        samples = {name: values.tolist() for name, values in samples.items()}
+    return samples
+
+
+def _run_scenario(tasks: SimulationTasks, config: SimulationConfig, dev_time, review_time, test_time,
+                  dev_fail, review_fail) -> Tuple[float, Dict[str, float], Dict[str, float], int]:
+    """
+    1シナリオの離散事象シミュレーション
+
+    Returns:
+        (makespan, フェーズ別待ち行列の時間積分, プール別稼働の時間積分, 差し戻し回数)
+    """
+    count = len(tasks)
+    dependents: List[List[int]] = [[] for _ in range(count)]
+    remaining = [len(deps) for deps in tasks.dependencies]
+    for i, deps in enumerate(tasks.dependencies):
+        for dep in deps:
+            dependents[dep].append(i)
+
+    ready = [i for i in range(count) if remaining[i] == 0]   # タスク順（_get_development_actions と同じ）
+    review_queue: deque = deque()
+    test_queue: List[int] = []
+    attempts = [0] * count
+    busy = {"dev": 0, "review": 0, "user_test": 0}
+    queue_area = {"dev": 0.0, "review": 0.0, "user_test": 0.0}
+    busy_area = {"dev": 0.0, "review": 0.0, "user_test": 0.0}
+    events: List[Tuple[float, int, str, object]] = []
+    sequence = 0
+    now = 0.0
+    last = 0.0
+    reworks = 0
+    last_attempt = config.max_attempts - 1
+
+    while True:
+        # 空きのあるプールに割り当て
+        while busy["dev"] < config.max_concurrent_devs and ready:
+            task = ready.pop(0)
+            attempt = min(attempts[task], last_attempt)
+            failed = dev_fail[task][attempt] and attempt < last_attempt
+            busy["dev"] += 1
+            sequence += 1
+            heapq.heappush(events, (now + dev_time[task][attempt], sequence, "dev", (task, failed)))
+        while busy["review"] < config.review_agents and review_queue:
+            task = review_queue.popleft()
+            attempt = min(attempts[task], last_attempt)
+            failed = review_fail[task][attempt] and attempt < last_attempt
+            busy["review"] += 1
+            sequence += 1
+            heapq.heappush(events, (now + review_time[task][attempt], sequence, "review", (task, failed)))
+        upstream_idle = not ready and not review_queue and busy["dev"] == 0 and busy["review"] == 0
+        if test_queue and busy["user_test"] == 0 and (len(test_queue) >= config.user_test_batch or upstream_idle):
+            batch, test_queue = test_queue, []
+            busy["user_test"] = 1
+            sequence += 1
+            heapq.heappush(events, (now + sum(test_time[t] for t in batch), sequence, "user_test", batch))
+
+        if not events:
+            break
+        now, _, kind, value = heapq.heappop(events)
+        elapsed = now - last
+        queue_area["dev"] += len(ready) * elapsed
+        queue_area["review"] += len(review_queue) * elapsed
+        queue_area["user_test"] += len(test_queue) * elapsed
+        for pool, in_use in busy.items():
+            busy_area[pool] += in_use * elapsed
+        last = now
+        busy[kind] -= 1
+
+        if kind == "user_test":
+            for task in value:
+                for dependent in dependents[task]:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        insort(ready, dependent)
+            continue
+        task, failed = value
+        if failed:
+            # 差し戻し（Dev-Agent の再作業）
+            attempts[task] += 1
+            reworks += 1
+            insort(ready, task)
+        elif kind == "dev":
+            review_queue.append(task)
+        else:
+            test_queue.append(task)
+    return now, queue_area, busy_area, reworks
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+@dataclass
+class SimulationReport:
+    """設定1つ分のシミュレーション結果（全シナリオの集計）"""
+    config: SimulationConfig
+    scenarios: int
+    task_count: int
+    makespan_hours: Dict[str, float]
+    throughput_per_day: float
+    mean_queue_length: Dict[str, float]
+    utilization: Dict[str, float]
+    mean_reworks: float
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    def summary(self) -> str:
+        makespan = self.makespan_hours
+        queues = " ".join(f"{k}={v:.2f}" for k, v in self.mean_queue_length.items())
+        usage = " ".join(f"{k}={v:.0%}" for k, v in self.utilization.items())
+        return (f"devs={self.config.max_concurrent_devs} reviewers={self.config.review_agents} "
+                f"batch={self.config.user_test_batch}: makespan P50 {makespan['p50']:.1f}h "
+                f"P85 {makespan['p85']:.1f}h P95 {makespan['p95']:.1f}h, "
+                f"{self.throughput_per_day:.2f} tasks/day, queues [{queues}], utilization [{usage}]")
+
+
+def simulate(tasks: SimulationTasks, dists: WorkflowDistributions, config: SimulationConfig,
+             scenarios: int = 1000, seed: Optional[int] = None) -> SimulationReport:
+    """同じ設定で scenarios 回シミュレーションして集計"""
+    samples = sample_scenarios(dists, len(tasks), scenarios, config.max_attempts, seed)
+    makespans = []
+    queue_totals = {"dev": 0.0, "review": 0.0, "user_test": 0.0}
+    busy_totals = {"dev": 0.0, "review": 0.0, "user_test": 0.0}
+    total_time = 0.0
+    reworks = 0
+    for s in range(scenarios):
+        makespan, queue_area, busy_area, rework = _run_scenario(
+            tasks, config, samples["dev"][s], samples["review"][s], samples["user_test"][s],
+            samples["dev_fail"][s], samples["review_fail"][s]
+        )
+        makespans.append(makespan)
+        total_time += makespan
+        reworks += rework
+        for name in queue_totals:
+            queue_totals[name] += queue_area[name]
+            busy_totals[name] += busy_area[name]
+
+    makespans.sort()
+    capacity = {"dev": config.max_concurrent_devs, "review": config.review_agents, "user_test": 1}
+    return SimulationReport(
+        config=config,
+        scenarios=scenarios,
+        task_count=len(tasks),
+        makespan_hours={
+            "mean": round(statistics.fmean(makespans), 2) if makespans else 0.0,
+            "p50": round(_percentile(makespans, 50), 2),
+            "p85": round(_percentile(makespans, 85), 2),
+            "p95": round(_percentile(makespans, 95), 2),
+        },
+        throughput_per_day=round(len(tasks) * scenarios / total_time * 24, 3) if total_time else 0.0,
+        mean_queue_length={k: round(v / total_time, 3) if total_time else 0.0 for k, v in queue_totals.items()},
+        utilization={k: round(v / (capacity[k] * total_time), 3) if total_time else 0.0
+                     for k, v in busy_totals.items()},
+        mean_reworks=round(reworks / scenarios, 2) if scenarios else 0.0,
+    )
+
+
+def sweep(tasks: SimulationTasks, dists: WorkflowDistributions, configs: Iterable[SimulationConfig],
+          scenarios: int = 1000, seed: Optional[int] = None) -> List[SimulationReport]:
+    """複数の設定を同じ乱数系列で比較（共通乱数法で差の分散を抑える）"""
+    return [simulate(tasks, dists, config, scenarios, seed) for config in configs]
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="ワークフローの離散事象シミュレーション")
+    parser.add_argument("--scenarios", type=int, default=1000)
+    parser.add_argument("--devs", type=_int_list, default=None, help="同時開発数（例: 1,2,3,4）")
+    parser.add_argument("--reviewers", type=_int_list, default=[1])
+    parser.add_argument("--batch", type=_int_list, default=[1], help="ユーザーテストのバッチサイズ")
+    parser.add_argument("--synthetic", type=int, default=0, help="合成タスク数（指定時は progress.json を使わない）")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        from .WorkflowController import WorkflowController
+    except ImportError:
+        from WorkflowController import WorkflowController
+
+    controller = WorkflowController()
+    snapshot = controller.load_snapshot()
+    dists = WorkflowDistributions.from_history(snapshot.active_tasks.values())
+    tasks = synthetic_tasks(args.synthetic, seed=args.seed) if args.synthetic else \
+        tasks_from_controller(controller, snapshot)
+    if not len(tasks):
+        print("No unfinished tasks to simulate (use --synthetic N)")
+        raise SystemExit(0)
+
+    print(f"Tasks: {len(tasks)}, dev median {dists.dev.median_hours:.1f}h ({dists.dev.samples} samples), "
+          f"review median {dists.review.median_hours:.1f}h, review fail {dists.review_fail_prob:.0%}"
+          f"{'' if np is not None else ' (NumPy not available)'}")
+    configs = [
+        SimulationConfig(devs, reviewers, batch)
+        for devs in (args.devs or [controller.max_concurrent_devs])
+        for reviewers in args.reviewers
+        for batch in args.batch
+    ]
+    start = time.perf_counter()
+    for report in sweep(tasks, dists, configs, args.scenarios, args.seed):
+        print(report.summary())
+    print(f"Simulated {len(configs) * args.scenarios} scenarios in {time.perf_counter() - start:.2f}s")
@@ -7,11 +7,14 @@ GameMacroAssistant Workflow State Machine
 import json
 import os
 from datetime import datetime, timezone
+from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 try:
     from .SignalParser import validate_completion_signal, SignalParser
     from .ArtifactValidator import ArtifactValidator
     from .ProgressManager import ProgressManager
+    from .ProgressSnapshot import load_progress_snapshot, SnapshotValidationError
+    from .PerformanceTracker import PerformanceTracker, load_tracker, summarize_regressions
 except ImportError:
     # 直接実行時のフォールバック
     import sys
@@ -20,20 +23,33 @@ except ImportError:
     from SignalParser import validate_completion_signal, SignalParser
     from ArtifactValidator import ArtifactValidator
     from ProgressManager import ProgressManager
+    from ProgressSnapshot import load_progress_snapshot, SnapshotValidationError
+    from PerformanceTracker import PerformanceTracker, load_tracker, summarize_regressions
 
 class WorkflowStateMachine:
-    def __init__(self, progress_file_path: str = ".claude/progress.json"):
+    # get_workflow_summary（および main 表示）に必要なトップレベルセクション
+    SUMMARY_SECTIONS = (
+        "project_id", "current_phase", "current_sprint", "active_tasks",
+        "current_working_tasks", "next_available_tasks", "workflow_state",
+        "project_metrics", "session_context",
+    )
+    
+    def __init__(self, progress_file_path: str = ".claude/progress.json",
+                 sections: Optional[Tuple[str, ...]] = None):
         self.progress_file = progress_file_path
+        self.sections = sections
         self.progress_data = None
+        self.snapshot = None
         self.progress_manager = ProgressManager(progress_file_path)
+        # 検証メトリクスの時系列と性能回帰の検出（検証対象プロジェクトごとに生成）
+        self.performance_trackers: Dict[Path, PerformanceTracker] = {}
         self.load_progress()
     
     def load_progress(self) -> bool:
         """progress.jsonファイルを読み込む"""
         try:
             if os.path.exists(self.progress_file):
-                with open(self.progress_file, 'r', encoding='utf-8') as f:
-                    self.progress_data = json.load(f)
+                self.progress_data, self.snapshot = load_progress_snapshot(self.progress_file, self.sections)
                 return True
             else:
                 print(f"ERROR: {self.progress_file} が見つかりません")
@@ -41,47 +57,43 @@ class WorkflowStateMachine:
         except json.JSONDecodeError as e:
             print(f"ERROR: JSON形式が不正です: {e}")
             return False
+        except SnapshotValidationError as e:
+            print(f"ERROR: progress.jsonの構造が不正です: {e}")
+            return False
         except Exception as e:
             print(f"ERROR: ファイル読み込みエラー: {e}")
             return False
     
     def get_current_phase(self) -> str:
         """現在のフェーズを判定"""
-        if not self.progress_data:
+        if not self.snapshot:
             return "unknown"
         
         # 中断された作業がある場合
         if self.has_interrupted_work():
             return "resuming_work"
         
-        current_phase = self.progress_data.get("current_phase", "unknown")
-        
         # 詳細フェーズ判定
-        workflow_state = self.progress_data.get("workflow_state", {})
-        active_tasks = self.progress_data.get("active_tasks", {})
-        working_tasks = self.progress_data.get("current_working_tasks", {})
+        snapshot = self.snapshot
         
-        if working_tasks:
+        if snapshot.current_working_tasks:
             return "development_in_progress"
-        elif workflow_state.get("user_test_pending"):
+        elif snapshot.workflow_state.user_test_pending:
             return "user_testing"
-        elif any(task.get("review_status") == "pending" for task in active_tasks.values()):
+        elif snapshot.has_review_pending():
             return "code_review"
-        elif workflow_state.get("ready_for_next_sprint"):
+        elif snapshot.workflow_state.ready_for_next_sprint:
             return "planning_next_sprint"
         else:
-            return current_phase
+            return snapshot.current_phase
     
     def has_interrupted_work(self) -> bool:
         """中断された作業があるかチェック"""
-        if not self.progress_data:
+        if not self.snapshot:
             return False
         
-        working_tasks = self.progress_data.get("current_working_tasks", {})
-        session_context = self.progress_data.get("session_context", {})
-        
         # 作業中タスクがある、または前回中断の記録がある
-        return bool(working_tasks) or session_context.get("interruption_cause") is not None
+        return bool(self.snapshot.current_working_tasks) or self.snapshot.interruption_cause is not None
     
     def get_interrupted_tasks(self) -> Dict:
         """中断されたタスクの詳細を取得"""
@@ -97,17 +109,15 @@ class WorkflowStateMachine:
         
         if phase == "resuming_work":
             # 中断復帰アクション
-            interrupted_tasks = self.get_interrupted_tasks()
-            for task_id, task_data in interrupted_tasks.items():
-                current_step = task_data.get("current_step", "implementation")
-                assignee = task_data.get("assignee", "dev-agent")
+            for task_id, task in self.snapshot.current_working_tasks.items():
+                current_step = task.current_step or "implementation"
+                assignee = task.assignee or "dev-agent"
                 actions.append((assignee, f"resume {task_id} at {current_step}"))
         
         elif phase == "development_in_progress":
             # 開発継続アクション
-            working_tasks = self.progress_data.get("current_working_tasks", {})
-            for task_id, task_data in working_tasks.items():
-                assignee = task_data.get("assignee", "dev-agent")
+            for task_id, task in self.snapshot.current_working_tasks.items():
+                assignee = task.assignee or "dev-agent"
                 actions.append((assignee, f"continue {task_id}"))
         
         elif phase == "planning" or phase == "planning_next_sprint":
@@ -115,11 +125,8 @@ class WorkflowStateMachine:
         
         elif phase == "development":
             # 利用可能タスクの開発
-            next_tasks = self.progress_data.get("next_available_tasks", [])
-            active_agents = self.progress_data.get("workflow_state", {}).get("active_agents", {})
-            
-            idle_agents = [agent for agent, data in active_agents.items() 
-                          if data.get("status") == "idle"]
+            next_tasks = self.snapshot.next_available_tasks
+            idle_agents = self.snapshot.workflow_state.idle_agents()
             
             for i, task in enumerate(next_tasks[:len(idle_agents)]):
                 agent = idle_agents[i] if i < len(idle_agents) else "dev-agent"
@@ -138,21 +145,22 @@ class WorkflowStateMachine:
     
     def get_workflow_summary(self) -> Dict:
         """ワークフロー状況の要約を取得"""
-        if not self.progress_data:
+        if not self.snapshot:
             return {"error": "progress data not loaded"}
         
         phase = self.get_current_phase()
         next_actions = self.get_next_actions()
+        metrics = self.snapshot.metrics
         
         summary = {
             "current_phase": phase,
             "next_actions": next_actions,
             "has_interrupted_work": self.has_interrupted_work(),
             "project_status": {
-                "total_tasks": self.progress_data.get("project_metrics", {}).get("total_tasks_planned", 0),
-                "completed_tasks": self.progress_data.get("project_metrics", {}).get("completed_tasks", 0),
-                "in_progress_tasks": self.progress_data.get("project_metrics", {}).get("in_progress_tasks", 0),
-                "current_sprint": self.progress_data.get("current_sprint", "unknown")
+                "total_tasks": metrics.total_tasks_planned,
+                "completed_tasks": metrics.completed_tasks,
+                "in_progress_tasks": metrics.in_progress_tasks,
+                "current_sprint": self.snapshot.current_sprint
             }
         }
         
@@ -241,7 +249,20 @@ class WorkflowStateMachine:
             # Dev-Agentに詳細な再作業指示を送信
             return False, f"Artifact validation failed: {validation_message}. Please verify actual implementation exists and builds successfully."
         
-        # 3. Progress更新（中央管理）
+        # 3. 性能回帰チェック（ビルド・テスト時間、テスト別時間、カバレッジ）
+        performance = self._performance_tracker(validator.project_root).evaluate(
+            task_id, validator.project_root / "worktrees" / task_id, validation_details,
+            project=validator.project_root.name, base_branch=validator.base_branch
+        )
+        validation_details["performance"] = performance.to_dict()
+        validator.save_latest_result(task_id, validation_details)
+        if performance.status == "fail":
+            print(f"[DEV_DONE_REJECTED] Task {task_id} performance regression (baseline {performance.baseline}):")
+            for line in summarize_regressions(performance.regressions):
+                print(f"  - {line}")
+            return False, f"Performance regression detected: {'; '.join(summarize_regressions(performance.regressions, 3))}"
+        
+        # 4. Progress更新（中央管理）
         try:
             evidence_for_progress = {
                 "completion_evidence": validation_details,
@@ -260,19 +281,46 @@ class WorkflowStateMachine:
         except Exception as e:
             print(f"Warning: Progress update failed: {e}")
         
-        # 4. 成果物検証成功 - Review-Agentに移行
+        # 5. 成果物検証成功 - Review-Agentに移行
         print(f"[DEV_DONE] Task {task_id} fully validated. Moving to review phase.")
         print(f"  Build: ✅ Success")
         print(f"  Tests: ✅ {validation_details.get('test_results', {}).get('passed_count', 0)} passed")
         print(f"  Files: ✅ All required files present")
+        if performance.status == "warning":
+            print(f"  Performance: ⚠️  regression vs {performance.baseline} ({performance.baseline_samples} samples)")
+            for line in summarize_regressions(performance.regressions):
+                print(f"    {line}")
+        slowest = validation_details.get('test_results', {}).get('slowest_tests', [])
+        if slowest:
+            print(f"  Slowest tests:")
+            for test in slowest[:5]:
+                print(f"    {test['duration']:.2f}s {test['name']}")
         
         return True, f"Task {task_id} ready for review - all artifacts verified"
     
+    def _performance_tracker(self, project_root: Path) -> PerformanceTracker:
+        """検証器の project_root に対応するトラッカー（カレントディレクトリには依存しない）"""
+        if project_root not in self.performance_trackers:
+            self.performance_trackers[project_root] = load_tracker(project_root)
+        return self.performance_trackers[project_root]
+    
     def _handle_review_pass(self, task_id: str, evidence: Dict) -> Tuple[bool, str]:
-        """Review-Agent承認シグナル処理"""
+        """Review-Agent承認シグナル処理（統合に進む前に全テストを実行）"""
         coverage = evidence.get("coverage_percent")
         issues = evidence.get("issues_found", "0")
         
+        # DEV_DONE は影響テストだけで通過しうるため、統合前は影響分析なしで全件検証する
+        validator = ArtifactValidator()
+        artifacts_valid, validation_message, validation_details = validator.validate_task_completion(
+            task_id, full_test_run=True
+        )
+        if not artifacts_valid:
+            print(f"[REVIEW_PASS_REJECTED] Task {task_id} full test run failed:")
+            print(f"  Reason: {validation_message}")
+            for error in validation_details.get("errors", []):
+                print(f"  - {error}")
+            return False, f"Full test run before integration failed: {validation_message}"
+        
         print(f"[REVIEW_PASS] Task {task_id} approved. Coverage: {coverage}%, Issues: {issues}")
         
         # TestDoc-Agentに移行
@@ -325,10 +373,10 @@ def main():
     print("GameMacroAssistant Workflow State Machine")
     print("=" * 50)
     
-    # WorkflowStateMachineを初期化
-    workflow = WorkflowStateMachine()
+    # WorkflowStateMachineを初期化（サマリーに必要なセクションのみ読み込む）
+    workflow = WorkflowStateMachine(sections=WorkflowStateMachine.SUMMARY_SECTIONS)
     
-    if not workflow.progress_data:
+    if not workflow.snapshot:
         print("ERROR: progress.jsonの読み込みに失敗しました")
         return
     
@@ -336,7 +384,7 @@ def main():
     summary = workflow.get_workflow_summary()
     
     print(f"[Current Phase] {summary['current_phase']}")
-    print(f"[Project] {workflow.progress_data.get('project_id', 'Unknown')}")
+    print(f"[Project] {workflow.snapshot.project_id}")
     print(f"[Sprint] {summary['project_status']['current_sprint']}")
     print()
     
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+タスク worktree のプロビジョニングモジュール
+
+worktrees/<TaskID>（ブランチ task-<TaskID>）を並列に作成・回収する。
+git worktree はリポジトリ本体のオブジェクトストアを共有するため、タスクごとの
+clone・fetch は発生しない。ブランチ作成と worktree 登録（.git 配下のメタデータ
+更新）はロック競合を避けるため直列に行い、作業ツリーの展開・ビルド出力の
+事前配置をタスク並列で行う。
+
+- タスク仕様に sparse_paths（または sparse_checkout: true）があれば、必要な
+  パスだけを展開する（ソリューション・ビルド設定ファイルは常に含める）
+- 既存の worktree から bin を複製し、依存アセンブリのコピーを省く
+  （obj は復元・中間ファイルに複製元の絶対パスを含むため複製しない）
+- 統合済み（基準ブランチにマージ済み・統合完了済み）タスクの worktree を回収する
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    from .TaskCatalog import get_task_catalog
+except ImportError:
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    from TaskCatalog import get_task_catalog
+
+
+# 疎な展開でも常に必要なファイル（ソリューション・ビルド設定・タスク仕様）
+ALWAYS_SPARSE_PATTERNS = [
+    "/*.sln", "/Directory.*", "/global.json", "/nuget.config", "/NuGet.config", "/.gitignore",
+    "/docs/pm/tasks/",
+]
+
+BUILD_OUTPUT_DIRS = {"bin", "obj"}
+# 事前配置で複製する出力（obj は worktree の絶対パスを含むため各 worktree で作り直す）
+PREWARM_DIRS = {"bin"}
+# 回収時に無視してよい未追跡ファイルの置き場所
+DISPOSABLE_DIRS = BUILD_OUTPUT_DIRS | {"TestResults"}
+
+
+class WorktreeError(RuntimeError):
+    """git 操作の失敗"""
+
+
+@dataclass
+class ProvisionResult:
+    """1タスク分のプロビジョニング結果"""
+    task_id: str
+    path: str
+    branch: str
+    created: bool = False
+    sparse_patterns: Optional[List[str]] = None
+    prewarmed_from: str = ""
+    prewarmed_files: int = 0
+    timings: Dict[str, float] = field(default_factory=dict)
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return not self.error
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _glob_prefix(pattern: str) -> str:
+    """glob パターンの先頭からワイルドカードを含まないディレクトリ部分"""
+    parts = []
+    for part in pattern.replace("\\", "/").split("/")[:-1]:
+        if any(c in part for c in "*?["):
+            break
+        parts.append(part)
+    return "/".join(parts)
+
+
+def sparse_patterns_for(spec: Dict) -> Optional[List[str]]:
+    """
+    タスク仕様から疎な展開のパターンを決定（None は全展開）
+
+    sparse_paths が明示されていればそれを、sparse_checkout: true なら
+    required_files の固定部分（最低でもプロジェクトディレクトリ単位）を使う。
+    """
+    paths = spec.get("sparse_paths")
+    if not paths and spec.get("sparse_checkout"):
+        paths = []
+        for pattern in spec.get("required_files", []):
+            prefix = _glob_prefix(pattern)
+            if not prefix:
+                return None  # ルート直下の glob は全展開が必要
+            paths.append(prefix)
+    if not paths:
+        return None
+    patterns = list(ALWAYS_SPARSE_PATTERNS)
+    for path in paths:
+        path = "/" + path.strip("/")
+        if not os.path.splitext(path)[1] and not path.endswith("/"):
+            path += "/"
+        if path not in patterns:
+            patterns.append(path)
+    return patterns
+
+
+def _is_disposable(relative_path: str) -> bool:
+    return any(part in DISPOSABLE_DIRS for part in relative_path.split("/")[:-1])
+
+
+class WorktreeProvisioner:
+    """タスク worktree の作成・事前ビルド出力配置・回収"""
+
+    def __init__(self, project_root: str = ".", base_branch: str = "main", max_workers: int = 4):
+        self.project_root = Path(project_root).resolve()
+        self.base_branch = base_branch
+        self.max_workers = max_workers
+        self.worktrees_dir = self.project_root / "worktrees"
+        self.task_catalog = get_task_catalog(self.project_root / "docs" / "pm" / "tasks")
+        # .git 配下のメタデータ（refs・worktrees・config）を更新する操作の直列化
+        self._git_lock = threading.Lock()
+
+    def _git(self, *args: str, cwd: Optional[Path] = None, check: bool = True) -> subprocess.CompletedProcess:
+        result = subprocess.run(
+            ["git", *args], cwd=cwd or self.project_root, capture_output=True, text=True,
+            encoding="utf-8", errors="replace", timeout=300
+        )
+        if check and result.returncode != 0:
+            raise WorktreeError(f"git {' '.join(args)}: {result.stderr.strip() or result.stdout.strip()}")
+        return result
+
+    def worktree_path(self, task_id: str) -> Path:
+        return self.worktrees_dir / task_id
+
+    @staticmethod
+    def branch_name(task_id: str) -> str:
+        return f"task-{task_id}"
+
+    def list_worktrees(self) -> Dict[Path, str]:
+        """登録済み worktree のパス → ブランチ名（worktrees/ 配下のみ）"""
+        output = self._git("worktree", "list", "--porcelain").stdout
+        worktrees: Dict[Path, str] = {}
+        path: Optional[Path] = None
+        for line in output.splitlines():
+            if line.startswith("worktree "):
+                path = Path(line[len("worktree "):]).resolve()
+            elif line.startswith("branch ") and path is not None:
+                worktrees[path] = line[len("branch "):].replace("refs/heads/", "", 1)
+        return {p: b for p, b in worktrees.items() if p.parent == self.worktrees_dir.resolve()}
+
+    # --- 作成 ---
+
+    def provision(self, task_ids: Iterable[str], prewarm: bool = True) -> List[ProvisionResult]:
+        """
+        タスク worktree を作成（作成済みのものはそのまま）
+
+        Returns:
+            タスクごとの ProvisionResult（入力順）
+        """
+        task_ids = list(dict.fromkeys(task_ids))
+        existing = self.list_worktrees()
+        results = [
+            ProvisionResult(task_id, str(self.worktree_path(task_id)), self.branch_name(task_id))
+            for task_id in task_ids
+        ]
+        pending = [r for r in results if self.worktree_path(r.task_id).resolve() not in existing]
+        for result in pending:
+            spec = self.task_catalog.get(result.task_id) or {}
+            result.sparse_patterns = sparse_patterns_for(spec)
+
+        # 1. ブランチ・worktree の登録（直列、展開はしない）
+        with self._git_lock:
+            if any(r.sparse_patterns for r in pending):
+                self._git("config", "extensions.worktreeConfig", "true")
+            branches = set(self._git("for-each-ref", "--format=%(refname:short)", "refs/heads/task-*")
+                           .stdout.split())
+            for result in pending:
+                start = time.perf_counter()
+                try:
+                    if result.branch not in branches:
+                        self._git("branch", result.branch, self.base_branch)
+                    self.worktrees_dir.mkdir(parents=True, exist_ok=True)
+                    self._git("worktree", "add", "--no-checkout", result.path, result.branch)
+                    result.created = True
+                except WorktreeError as e:
+                    result.error = str(e)
+                result.timings["register"] = round(time.perf_counter() - start, 3)
+
+        # 2. 作業ツリーの展開とビルド出力の事前配置（並列）
+        sibling = self._select_prewarm_source(existing) if prewarm else None
+        created = [r for r in pending if r.created]
+        if created:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(created)))) as executor:
+                list(executor.map(lambda r: self._populate(r, sibling), created))
+        return results
+
+    def _populate(self, result: ProvisionResult, sibling: Optional[Path]) -> None:
+        worktree = Path(result.path)
+        try:
+            start = time.perf_counter()
+            if result.sparse_patterns:
+                self._git("sparse-checkout", "set", "--no-cone", *result.sparse_patterns, cwd=worktree)
+            self._git("reset", "--hard", "--quiet", cwd=worktree)
+            result.timings["checkout"] = round(time.perf_counter() - start, 3)
+
+            if sibling is not None:
+                start = time.perf_counter()
+                result.prewarmed_files = self._prewarm(worktree, sibling)
+                if result.prewarmed_files:
+                    result.prewarmed_from = str(sibling)
+                result.timings["prewarm"] = round(time.perf_counter() - start, 3)
+        except (WorktreeError, OSError) as e:
+            result.error = str(e)
+
+    # --- ビルド出力の事前配置 ---
+
+    def _select_prewarm_source(self, worktrees: Dict[Path, str]) -> Optional[Path]:
+        """ビルド出力（bin）が最も新しい既存 worktree"""
+        best: Tuple[int, Optional[Path]] = (0, None)
+        for path in worktrees:
+            for output_dir in self._output_dirs(path, names=PREWARM_DIRS):
+                try:
+                    mtime = os.stat(path / output_dir).st_mtime_ns
+                except OSError:
+                    continue
+                if mtime > best[0]:
+                    best = (mtime, path)
+        return best[1]
+
+    @staticmethod
+    def _output_dirs(root: Path, names: Set[str] = BUILD_OUTPUT_DIRS) -> List[str]:
+        """root からの相対パスで bin/obj ディレクトリを列挙（その配下は走査しない）"""
+        found = []
+        stack = [""]
+        while stack:
+            relative = stack.pop()
+            try:
+                with os.scandir(root / relative) as it:
+                    entries = [e for e in it if e.is_dir(follow_symlinks=False)]
+            except OSError:
+                continue
+            for entry in entries:
+                child = f"{relative}/{entry.name}" if relative else entry.name
+                if entry.name in names:
+                    found.append(child)
+                elif entry.name not in DISPOSABLE_DIRS and entry.name != ".git":
+                    stack.append(child)
+        return found
+
+    def _prewarm(self, worktree: Path, sibling: Path) -> int:
+        """
+        兄弟 worktree の bin を複製する
+
+        obj（project.assets.json・FileListAbsolute.txt 等）は複製元の絶対パスを含み、
+        復元やインクリメンタルクリーンが兄弟 worktree を参照してしまうため複製しない。
+        obj がないためコンパイルは必ず実行されるが、変更のない依存アセンブリの
+        出力先へのコピーは省かれる。
+
+        Returns:
+            複製したファイル数
+        """
+        copied = 0
+        for relative in self._output_dirs(sibling, names=PREWARM_DIRS):
+            # 疎な展開で存在しないプロジェクトの出力は不要
+            if not (worktree / relative).parent.is_dir():
+                continue
+            source = sibling / relative
+            for _, _, filenames in os.walk(source):
+                copied += len(filenames)
+            shutil.copytree(source, worktree / relative, dirs_exist_ok=True)
+        return copied
+
+    # --- 回収 ---
+
+    def _removable(self, worktree: Path) -> Tuple[bool, str]:
+        """未コミットの変更・ビルド出力以外の未追跡ファイルがなければ回収可能"""
+        status = self._git("status", "--porcelain", "-z", cwd=worktree, check=False)
+        if status.returncode != 0:
+            return True, ""  # 壊れた worktree は回収対象
+        for entry in status.stdout.split("\0"):
+            if len(entry) <= 3:
+                continue
+            code, path = entry[:2], entry[3:]
+            if code != "??" or not _is_disposable(path.rstrip("/") + "/x"):
+                return False, f"uncommitted changes ({path})"
+        return True, ""
+
+    def _has_own_commits(self, branch: str) -> bool:
+        """作成時点（reflog の最初の記録）以降にコミットがあるか"""
+        reflog = self._git("reflog", "show", "--format=%H", branch, "--", check=False).stdout.split()
+        if not reflog:
+            return False
+        count = self._git("rev-list", "--count", f"{reflog[-1]}..{branch}", check=False).stdout.strip()
+        return count.isdigit() and int(count) > 0
+
+    def collect_garbage(self, integrated_task_ids: Iterable[str] = (), dry_run: bool = False) -> Dict[str, str]:
+        """
+        統合済みタスクの worktree を削除
+
+        基準ブランチにマージ済みで作成後のコミットを持つブランチ、または
+        integrated_task_ids に含まれるタスクの worktree が対象。マージ済みブランチは削除し、未マージ（squash 等）の
+        ブランチは残す。未コミットの変更がある worktree は残す。
+
+        Returns:
+            {task_id: "removed" / "kept: <理由>"}
+        """
+        integrated = set(integrated_task_ids)
+        merged = set(self._git("branch", "--merged", self.base_branch, "--format=%(refname:short)")
+                     .stdout.split())
+        outcome: Dict[str, str] = {}
+        with self._git_lock:
+            for path, branch in self.list_worktrees().items():
+                task_id = path.name
+                # 作成直後のブランチも「マージ済み」になるため、独自のコミットを要求する
+                if task_id not in integrated and not (branch in merged and self._has_own_commits(branch)):
+                    continue
+                removable, reason = self._removable(path)
+                if not removable:
+                    outcome[task_id] = f"kept: {reason}"
+                    continue
+                if not dry_run:
+                    self._git("worktree", "remove", "--force", str(path))
+                    if branch in merged and branch != self.base_branch:
+                        self._git("branch", "-d", branch, check=False)
+                outcome[task_id] = "removed"
+            if not dry_run:
+                self._git("worktree", "prune")
+        return outcome
+
+    def disk_usage(self) -> Dict[str, int]:
+        """worktree ごとの使用量（バイト、.git 管理ファイルを除く）"""
+        usage = {}
+        for path in self.list_worktrees():
+            total = 0
+            for directory, dirnames, filenames in os.walk(path):
+                dirnames[:] = [d for d in dirnames if d != ".git"]
+                for name in filenames:
+                    try:
+                        total += os.lstat(os.path.join(directory, name)).st_size
+                    except OSError:
+                        continue
+            usage[path.name] = total
+        return usage
+
+
+def _integrated_task_ids(project_root: Path) -> List[str]:
+    """統合完了済みのタスク（status の completed は開発完了・レビュー待ちのため使わない）"""
+    try:
+        from .ProgressSnapshot import load_progress_snapshot
+    except ImportError:
+        from ProgressSnapshot import load_progress_snapshot
+    try:
+        snapshot = load_progress_snapshot(str(project_root / ".claude" / "progress.json"),
+                                          ("workflow_state",))[1]
+    except (OSError, ValueError):
+        return []
+    return list(snapshot.workflow_state.integration_completed)
+
+
+if __name__ == "__main__":
+    import sys
+
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    args = [a for a in sys.argv[2:] if not a.startswith("--")]
+    provisioner = WorktreeProvisioner()
+
+    if command in ("provision", "sprint") and args:
+        task_ids = provisioner.task_catalog.by_sprint(args[0]) if command == "sprint" else args
+        start = time.perf_counter()
+        for result in provisioner.provision(task_ids, prewarm="--no-prewarm" not in sys.argv):
+            state = "❌ " + result.error if result.error else ("✅ created" if result.created else "✅ exists")
+            extra = f" (sparse: {len(result.sparse_patterns)} patterns)" if result.sparse_patterns else ""
+            if result.prewarmed_files:
+                extra += f" (prewarmed {result.prewarmed_files} files)"
+            print(f"{result.task_id}: {state}{extra}")
+        print(f"Provisioned {len(task_ids)} worktrees in {time.perf_counter() - start:.2f}s")
+    elif command == "gc":
+        integrated = args or _integrated_task_ids(provisioner.project_root)
+        for task_id, state in provisioner.collect_garbage(integrated, dry_run="--dry-run" in sys.argv).items():
+            print(f"{task_id}: {state}")
+    elif command == "status":
+        worktrees = provisioner.list_worktrees()
+        usage = provisioner.disk_usage()
+        for path, branch in worktrees.items():
+            print(f"{path.name}: {branch} ({usage.get(path.name, 0) / 1048576:.1f} MB)")
+    else:
+        print("Usage: python WorktreeProvisioner.py provision <TaskID> [<TaskID> ...] [--no-prewarm]")
+        print("       python WorktreeProvisioner.py sprint <Sprint>  (スプリントの全タスク)")
+        print("       python WorktreeProvisioner.py gc [<TaskID> ...] [--dry-run]  (統合済み worktree の回収)")
+        print("       python WorktreeProvisioner.py status")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+検証パイプライン試験用の偽 dotnet
+
+GMA_DOTNET="python tests/FakeDotnet.py" と指定すると ArtifactValidator が本物の
+SDK の代わりに使う。restore / build / test / build-server shutdown / --version を
+模擬し、TRX・Cobertura を出力する。常駐ビルドサーバーは状態ファイルで模擬し、
+コールド／ウォームで異なる遅延を入れる。
+
+環境変数:
+    FAKE_DOTNET_COLD_DELAY / FAKE_DOTNET_WARM_DELAY: ビルド遅延秒（既定 1.0 / 0.1）
+    FAKE_DOTNET_TEST_DELAY: テストクラス1件あたりの遅延秒（既定 0.05）
+    FAKE_DOTNET_BUILD_FAIL: 1 ならビルドエラー
+    FAKE_DOTNET_FAIL_TESTS: 失敗させるテストクラス名（カンマ区切り）
+    FAKE_DOTNET_STATE_DIR: サーバー状態ファイルの置き場所（既定は一時ディレクトリ）
+"""
+
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from xml.sax.saxutils import quoteattr
+
+PRUNE_DIRS = {"bin", "obj", ".git", "TestResults"}
+_NAMESPACE_PATTERN = re.compile(r'^\s*namespace\s+([\w.]+)', re.MULTILINE)
+
+
+def _files(root: Path, suffix: str) -> List[Path]:
+    found = []
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in PRUNE_DIRS]
+        found.extend(Path(directory) / name for name in filenames if name.endswith(suffix))
+    return sorted(found)
+
+
+def _server_marker() -> Path:
+    return Path(os.environ.get("FAKE_DOTNET_STATE_DIR") or tempfile.gettempdir()) / "fake-dotnet-build-server"
+
+
+def _option(args: List[str], name: str) -> str:
+    return args[args.index(name) + 1] if name in args else ""
+
+
+def _matches(filter_expression: str, full_name: str) -> bool:
+    """--filter の FullyQualifiedName~ / !~ を | と & で組み合わせた式のみ対応"""
+    if not filter_expression:
+        return True
+    for alternative in filter_expression.split("|"):
+        ok = True
+        for term in alternative.split("&"):
+            if "!~" in term:
+                ok = ok and term.split("!~", 1)[1] not in full_name
+            elif "~" in term:
+                ok = ok and term.split("~", 1)[1] in full_name
+        if ok:
+            return True
+    return False
+
+
+def restore(cwd: Path) -> int:
+    time.sleep(0.2)
+    for project in _files(cwd, ".csproj"):
+        obj = project.parent / "obj"
+        obj.mkdir(exist_ok=True)
+        (obj / "project.assets.json").write_text("{}", encoding="utf-8")
+    print("  Restored fake packages.")
+    return 0
+
+
+def _configuration(args: List[str]) -> str:
+    return _option(args, "--configuration") or "Debug"
+
+
+def _full_name(test_file: Path) -> str:
+    """テストファイルの代表テスト名（名前空間.クラス.Runs）"""
+    match = _NAMESPACE_PATTERN.search(test_file.read_text(encoding="utf-8", errors="replace"))
+    namespace = match.group(1) if match else "Fake"
+    return f"{namespace}.{test_file.stem}.Runs"
+
+
+def build(cwd: Path, args: List[str]) -> int:
+    marker = _server_marker()
+    warm = marker.exists()
+    time.sleep(float(os.environ.get("FAKE_DOTNET_WARM_DELAY" if warm else "FAKE_DOTNET_COLD_DELAY",
+                                    "0.1" if warm else "1.0")))
+    if "-nodeReuse:true" in args:
+        marker.touch()
+    if os.environ.get("FAKE_DOTNET_BUILD_FAIL") == "1":
+        print("Program.cs(1,1): error CS0001: fake build failure")
+        print("Build FAILED.")
+        return 1
+    for project in _files(cwd, ".csproj"):
+        output = project.parent / "bin" / _configuration(args) / "net8.0"
+        output.mkdir(parents=True, exist_ok=True)
+        (output / f"{project.stem}.dll").write_text("fake assembly", encoding="utf-8")
+    print("Build succeeded.")
+    return 0
+
+
+def test(cwd: Path, args: List[str]) -> int:
+    results_dir = Path(_option(args, "--results-directory") or cwd / "TestResults")
+    filter_expression = _option(args, "--filter")
+    failing = set(filter(None, os.environ.get("FAKE_DOTNET_FAIL_TESTS", "").split(",")))
+    delay = float(os.environ.get("FAKE_DOTNET_TEST_DELAY", "0.05"))
+
+    if "--no-build" in args:
+        # --no-build は既存のビルド出力（--output 指定時はその場所）が必要
+        output = _option(args, "--output")
+        outputs = [Path(output)] if output else [
+            project.parent / "bin" / _configuration(args) for project in _files(cwd, "Tests.csproj")
+        ]
+        if not outputs or not all(path.is_dir() and any(path.rglob("*.dll")) for path in outputs):
+            print("error: The test source file was not found. Build the project or remove --no-build.")
+            return 1
+
+    results = []
+    for test_file in _files(cwd, "Tests.cs"):
+        full_name = _full_name(test_file)
+        if not _matches(filter_expression, full_name):
+            continue
+        time.sleep(delay)
+        outcome = "Failed" if test_file.stem in failing else "Passed"
+        results.append((full_name, outcome))
+        if outcome == "Failed":
+            print(f"  Failed {full_name} [1 ms]")
+
+    run_dir = results_dir / f"fake-{os.getpid()}"
+    run_dir.mkdir(parents=True, exist_ok=True)
+    trx = "".join(
+        f"<UnitTestResult testName={quoteattr(name)} outcome=\"{outcome}\" duration=\"00:00:00.0500000\"/>"
+        for name, outcome in results
+    )
+    (results_dir / f"fake-{os.getpid()}.trx").write_text(
+        f"<TestRun><Results>{trx}</Results></TestRun>", encoding="utf-8")
+
+    classes = "".join(
+        f"<class filename={quoteattr(str(source.relative_to(cwd)).replace(os.sep, '/'))}><lines>"
+        + "".join(f"<line number=\"{n}\" hits=\"1\"/>" for n in range(1, 11))
+        + "</lines></class>"
+        for source in _files(cwd, ".cs") if not source.stem.endswith("Tests")
+    )
+    (run_dir / "coverage.cobertura.xml").write_text(
+        f"<coverage><packages><package><classes>{classes}</classes></package></packages></coverage>",
+        encoding="utf-8")
+
+    failed = sum(1 for _, outcome in results if outcome == "Failed")
+    passed = len(results) - failed
+    print(f"{'Failed' if failed else 'Passed'}!  - Failed: {failed:5d}, Passed: {passed:5d}, "
+          f"Skipped:     0, Total: {len(results):5d}, Duration: 1 s")
+    return 1 if failed else 0
+
+
+def main(args: List[str]) -> int:
+    cwd = Path.cwd()
+    if not args or args[0] == "--version":
+        print(os.environ.get("FAKE_DOTNET_VERSION", "8.0.100-fake"))
+        return 0
+    if args[0] == "restore":
+        return restore(cwd)
+    if args[0] == "build":
+        return build(cwd, args)
+    if args[0] == "test":
+        return test(cwd, args)
+    if args[:2] == ["build-server", "shutdown"]:
+        _server_marker().unlink(missing_ok=True)
+        print("Shut down fake build servers.")
+        return 0
+    print(f"FakeDotnet: unsupported command: {' '.join(args)}", file=sys.stderr)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,86 @@
+"""テスト共通設定（src/ のモジュールを直接 import できるようにする）"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+FAKE_DOTNET = Path(__file__).resolve().parent / "FakeDotnet.py"
+
+
+@pytest.fixture
+def write_progress(tmp_path):
+    """tmp_path/.claude/progress.json にデータを書き込み、そのパスを返す"""
+    def _write(data, path=None):
+        progress_file = Path(path) if path else tmp_path / ".claude" / "progress.json"
+        progress_file.parent.mkdir(parents=True, exist_ok=True)
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+        progress_file.write_text(text, encoding="utf-8")
+        # 同じ tick 内の書き換えでも stat が変わるよう mtime を進める
+        st = progress_file.stat()
+        os.utime(progress_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        return str(progress_file)
+    return _write
+
+
+TEST_CLASS_TEMPLATE = """using Xunit;
+
+namespace GameMacroAssistant.Tests.Core;
+
+public class {name}
+{{
+    [Fact]
+    public void Runs() {{ }}
+}}
+"""
+
+TASK_SPEC_TEMPLATE = """---
+id: {task_id}
+sprint: sprint-01
+---
+# {task_id}
+
+```json
+{{"required_files": ["src/Core/*.cs"], "min_coverage": 50}}
+```
+"""
+
+
+@pytest.fixture
+def fake_dotnet(tmp_path, monkeypatch):
+    """偽 dotnet のコマンド行（ビルドサーバー状態はテストごとに分離）"""
+    state_dir = tmp_path / "fake-dotnet-state"
+    state_dir.mkdir()
+    monkeypatch.setenv("FAKE_DOTNET_STATE_DIR", str(state_dir))
+    monkeypatch.setenv("FAKE_DOTNET_COLD_DELAY", "0")
+    monkeypatch.setenv("FAKE_DOTNET_WARM_DELAY", "0")
+    monkeypatch.setenv("FAKE_DOTNET_TEST_DELAY", "0")
+    return f'"{sys.executable}" "{FAKE_DOTNET}"'
+
+
+@pytest.fixture
+def sample_project(tmp_path):
+    """docs/pm/tasks の仕様と worktrees/<task_id> を持つ検証用プロジェクトを作る"""
+    root = tmp_path / "project"
+
+    def _make(task_id="T-001", test_classes=("MacroTests",)):
+        spec_dir = root / "docs" / "pm" / "tasks"
+        spec_dir.mkdir(parents=True, exist_ok=True)
+        (spec_dir / f"{task_id}.md").write_text(TASK_SPEC_TEMPLATE.format(task_id=task_id), encoding="utf-8")
+        worktree = root / "worktrees" / task_id
+        (worktree / "src" / "Core").mkdir(parents=True, exist_ok=True)
+        (worktree / "src" / "Core" / "Core.csproj").write_text("<Project />\n", encoding="utf-8")
+        (worktree / "src" / "Core" / "Macro.cs").write_text(
+            "namespace GameMacroAssistant.Core;\npublic class Macro { }\n", encoding="utf-8")
+        tests_dir = worktree / "src" / "Tests"
+        tests_dir.mkdir(parents=True, exist_ok=True)
+        (tests_dir / "GameMacroAssistant.Tests.csproj").write_text("<Project />\n", encoding="utf-8")
+        for name in test_classes:
+            (tests_dir / f"{name}.cs").write_text(TEST_CLASS_TEMPLATE.format(name=name), encoding="utf-8")
+        return root, worktree
+    return _make
@@ -0,0 +1,47 @@
+"""ArtifactIndex の差分更新のテスト"""
+
+import os
+import shutil
+
+from ArtifactIndex import ArtifactIndex
+
+
+def _touch(path, mtime_ns=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("x", encoding="utf-8")
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def _bump(directory):
+    # 同じ tick 内の変更でもディレクトリの mtime が変わるよう進める
+    st = directory.stat()
+    os.utime(directory, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_refresh_rescans_only_changed_directories(tmp_path):
+    results = tmp_path / "TestResults"
+    _touch(results / "run1" / "coverage.cobertura.xml", 1_000_000_000)
+    _touch(results / "old.trx", 1_000_000_000)
+    _touch(tmp_path / "src" / "App" / "App.cs")
+    _touch(tmp_path / "src" / "App" / "bin" / "Debug" / "build.log")   # bin は走査しない
+    index = ArtifactIndex(tmp_path)
+
+    assert index.refresh() == 5   # root, TestResults, run1, src, App
+    assert index.refresh() == 0
+    assert index.find("build_log") == []
+
+    _touch(results / "run2" / "coverage.cobertura.xml", 2_000_000_000)
+    _touch(results / "new.trx", 2_000_000_000)
+    _bump(results)
+    assert index.refresh() == 2   # TestResults, run2
+    assert index.newest("coverage").path == str(results / "run2" / "coverage.cobertura.xml")
+    assert [os.path.basename(a.path) for a in index.find("trx")] == ["new.trx", "old.trx"]
+    assert [a.path for a in index.find("coverage", under=results / "run1")] == \
+        [str(results / "run1" / "coverage.cobertura.xml")]
+
+    shutil.rmtree(results / "run2")
+    _bump(results)
+    assert index.refresh() == 1
+    assert index.newest("coverage").path == str(results / "run1" / "coverage.cobertura.xml")
+    assert index.summary() == {"coverage": (1, 1_000_000_000), "trx": (2, 2_000_000_000)}
@@ -0,0 +1,67 @@
+"""ArtifactValidator の検証パイプラインのテスト（偽 dotnet を使用）"""
+
+import shutil
+from pathlib import Path
+
+from ArtifactValidator import ArtifactValidator
+
+
+def test_sharded_run_executes_each_class_once(sample_project, fake_dotnet):
+    # GFooTests は最後（除外式で残りを拾う）シャードに入り、名前に FooTests を含む
+    root, _ = sample_project(test_classes=("FooTests", "GFooTests", "MacroTests"))
+    validator = ArtifactValidator(str(root), use_cache=False, use_test_impact=False,
+                                  test_shards=2, dotnet_command=fake_dotnet)
+
+    is_valid, message, details = validator.validate_task_completion("T-001")
+
+    assert is_valid, message
+    test_results = details["test_results"]
+    assert len(test_results["shards"]) == 2
+    assert test_results["total_count"] == 3
+    assert [shard["total_count"] for shard in test_results["shards"]] == [2, 1]
+    # シャードごとのビルド出力のコピーは実行後に片付ける
+    assert test_results["shards"][-1]["test_classes"] == ["GFooTests"]
+    assert not list(Path(test_results["results_directory"]).glob("shard-*-bin"))
+
+
+def test_sharding_is_opt_in(sample_project, fake_dotnet):
+    root, _ = sample_project(test_classes=("FooTests", "BarFooTests"))
+    validator = ArtifactValidator(str(root), use_cache=False, use_test_impact=False,
+                                  dotnet_command=fake_dotnet)
+
+    is_valid, message, details = validator.validate_task_completion("T-001")
+
+    assert is_valid, message
+    assert validator.test_shards == 1
+    assert "shards" not in details["test_results"]
+    assert details["test_results"]["total_count"] == 2
+
+
+def test_cached_build_is_not_reused_without_outputs(sample_project, fake_dotnet):
+    root, worktree = sample_project()
+    first = ArtifactValidator(str(root), use_test_impact=False, dotnet_command=fake_dotnet)
+    assert first.validate_task_completion("T-001")[0]
+    again = ArtifactValidator(str(root), use_test_impact=False, dotnet_command=fake_dotnet)
+    assert again.validate_task_completion("T-001")[2]["stages"]["build"]["cached"] is True
+
+    # ビルド出力が消えた worktree（git clean 等）ではビルドをやり直す
+    for output_dir in list(worktree.rglob("bin")):
+        shutil.rmtree(output_dir)
+    second = ArtifactValidator(str(root), use_test_impact=False, dotnet_command=fake_dotnet)
+    is_valid, message, details = second.validate_task_completion("T-001")
+
+    assert is_valid, message
+    assert details["stages"]["build"]["cached"] is False
+    assert list(worktree.rglob("bin/Release/*/*.dll"))
+
+
+def test_validation_state_is_kept_under_cache_dir(sample_project, fake_dotnet):
+    root, _ = sample_project()
+    validator = ArtifactValidator(str(root), dotnet_command=fake_dotnet)
+
+    assert validator.validate_task_completion("T-001")[0]
+
+    cache = root / ".claude" / "cache" / "validation"
+    assert (cache / "latest" / "T-001.json").exists()
+    assert list((cache / "results").glob("*.json"))
+    assert not (root / ".claude" / "validation_cache").exists()
@@ -0,0 +1,31 @@
+"""複数タスクの並列検証（プロセスプール）のテスト"""
+
+import ArtifactValidator
+from DotnetToolchain import DOTNET_COMMAND_ENV
+
+
+def test_batch_yields_every_task(sample_project, fake_dotnet, monkeypatch):
+    root, _ = sample_project("T-001")
+    sample_project("T-002", test_classes=("MacroTests", "PlaybackTests"))
+    monkeypatch.setenv(DOTNET_COMMAND_ENV, fake_dotnet)
+
+    results = {task_id: (is_valid, message, details) for task_id, is_valid, message, details
+               in ArtifactValidator.validate_tasks_batch(["T-001", "T-002", "T-404", "T-001"], str(root),
+                                                         max_workers=2)}
+
+    assert sorted(results) == ["T-001", "T-002", "T-404"]
+    assert results["T-001"][0] and results["T-002"][0]
+    assert results["T-002"][2]["test_results"]["total_count"] == 2
+    assert not results["T-404"][0]
+    assert "Task specification not found: T-404" in results["T-404"][2]["errors"]
+
+
+def test_batch_workers_follow_cpu_and_memory(monkeypatch):
+    monkeypatch.setattr(ArtifactValidator.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(ArtifactValidator, "_available_memory_mb", lambda: 5000)
+    assert ArtifactValidator.default_batch_workers(10) == 2      # 2GB/ワーカー
+
+    monkeypatch.setattr(ArtifactValidator, "_available_memory_mb", lambda: None)
+    assert ArtifactValidator.default_batch_workers(10) == 8
+    assert ArtifactValidator.default_batch_workers(3) == 3
+    assert ArtifactValidator.default_batch_workers(0) == 1
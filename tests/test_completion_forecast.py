@@ -0,0 +1,44 @@
+"""CompletionForecaster のモンテカルロ予測とキャッシュのテスト"""
+
+from pathlib import Path
+
+from CompletionForecast import CompletionForecaster
+
+
+def _task(status, started, completed=None):
+    history = [{"from_status": "pending", "to_status": "in_progress", "timestamp": started}]
+    if completed:
+        history.append({"from_status": "in_progress", "to_status": "completed", "timestamp": completed})
+    return {"status": status, "status_history": history}
+
+
+TASKS = {
+    "T-001": _task("completed", "2026-01-01T09:00:00", "2026-01-02T09:00:00"),
+    "T-002": _task("completed", "2026-01-01T09:00:00", "2026-01-04T09:00:00"),
+    "T-003": _task("completed", "2026-01-03T09:00:00", "2026-01-05T09:00:00"),
+    "T-004": _task("completed", "2026-01-04T09:00:00", "2026-01-06T09:00:00"),
+    "T-005": _task("in_progress", "2026-01-06T09:00:00"),
+}
+
+
+def test_forecast_is_cached_outside_tracked_state(write_progress):
+    progress_file = write_progress({"active_tasks": TASKS})
+    forecaster = CompletionForecaster(progress_file, trials=2000)
+
+    forecast = forecaster.forecast(remaining_tasks=6)
+
+    assert forecast is not None
+    assert forecast.cycle_time_samples == 4
+    assert 0 < forecast.p50_days <= forecast.p85_days <= forecast.p95_days
+    # 予測結果は再生成可能なキャッシュとして .claude/cache/ にだけ書く
+    claude_dir = Path(progress_file).parent
+    assert sorted(p.name for p in claude_dir.iterdir()) == ["cache", "progress.json"]
+    assert (claude_dir / "cache" / "forecast_cache.json").exists()
+    # 同じ履歴なら別インスタンスでも同じ予測になる
+    assert CompletionForecaster(progress_file, trials=2000).forecast(remaining_tasks=6) == forecast
+
+
+def test_forecast_needs_enough_history(write_progress):
+    progress_file = write_progress({"active_tasks": {"T-001": TASKS["T-001"], "T-005": TASKS["T-005"]}})
+
+    assert CompletionForecaster(progress_file).forecast(remaining_tasks=3) is None
@@ -0,0 +1,43 @@
+"""CoverageAnalyzer のレポート統合と差分カバレッジのテスト"""
+
+from CoverageAnalyzer import CoverageAnalyzer
+
+
+def _write_report(path, lines):
+    line_xml = "".join(f'<line number="{n}" hits="{h}" />' for n, h in lines.items())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        '<?xml version="1.0"?><coverage><sources><source>/repo</source></sources>'
+        '<packages><package name="Core"><classes>'
+        f'<class name="Macro" filename="src/Macro.cs"><methods>'
+        '<method name="Run"><lines><line number="1" hits="99" /></lines></method>'
+        f'</methods><lines>{line_xml}</lines></class>'
+        '</classes></package></packages></coverage>',
+        encoding="utf-8",
+    )
+    return path
+
+
+def test_merge_sums_hits_across_shards(tmp_path):
+    shard0 = _write_report(tmp_path / "shard-0" / "coverage.cobertura.xml", {1: 1, 2: 0, 3: 0})
+    shard1 = _write_report(tmp_path / "shard-1" / "coverage.cobertura.xml", {1: 0, 2: 2, 3: 0})
+
+    merged, errors = CoverageAnalyzer().load_reports([shard0, shard1])
+
+    assert errors == []
+    assert merged.files["src/Macro.cs"].to_dict() == {1: 1, 2: 2, 3: 0}
+    assert merged.totals() == (2, 3)
+    diff = merged.diff_coverage({"src/Macro.cs": {2, 3}})
+    assert diff["diff_covered_lines"] == 1
+    assert diff["uncovered_changed_lines"] == {"src/Macro.cs": [3]}
+
+
+def test_identical_reports_keep_their_own_paths(tmp_path):
+    analyzer = CoverageAnalyzer()
+    shard0 = _write_report(tmp_path / "shard-0" / "coverage.cobertura.xml", {1: 1})
+    shard1 = _write_report(tmp_path / "shard-1" / "coverage.cobertura.xml", {1: 1})
+
+    merged, _ = analyzer.load_reports([shard0, shard1])
+
+    assert merged.report_paths == [str(shard0), str(shard1)]
+    assert analyzer.load_report(shard1).report_paths == [str(shard1)]
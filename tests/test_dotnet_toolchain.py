@@ -0,0 +1,58 @@
+"""DotnetToolchain のビルドサーバー再利用のテスト（偽 dotnet を使用）"""
+
+import subprocess
+from pathlib import Path
+
+from ArtifactValidator import _isolated_env, validate_tasks_batch
+from DotnetToolchain import DOTNET_COMMAND_ENV, DotnetToolchain, get_toolchain
+
+
+def _server_marker(tmp_path: Path) -> Path:
+    return tmp_path / "fake-dotnet-state" / "fake-dotnet-build-server"
+
+
+def test_build_arguments_follow_node_reuse(tmp_path):
+    toolchain = DotnetToolchain(tmp_path, "dotnet")
+
+    assert toolchain.build_arguments({}) == ["-nodeReuse:true", "-p:UseSharedCompilation=true"]
+    assert toolchain.build_arguments({"MSBUILDDISABLENODEREUSE": "1"}) == \
+        ["-nodeReuse:false", "-p:UseSharedCompilation=false"]
+
+
+def test_restore_lock_is_kept_under_cache_dir(tmp_path):
+    # .claude/cache/ は git の追跡対象外
+    assert DotnetToolchain(tmp_path, "dotnet").restore_lock.lock_file == \
+        tmp_path / ".claude" / "cache" / "locks" / "nuget-restore.lock"
+
+
+def test_second_build_is_warm_until_shutdown(tmp_path, sample_project, fake_dotnet):
+    root, worktree = sample_project()
+    toolchain = DotnetToolchain(root, fake_dotnet)
+    env = toolchain.environment()
+
+    states = []
+    for _ in range(2):
+        states.append(toolchain.begin_build(env))
+        result = subprocess.run(toolchain.command("build", *toolchain.build_arguments(env)),
+                                cwd=worktree, env=env, capture_output=True, text=True)
+        assert result.returncode == 0, result.stdout
+    assert states == ["cold", "warm"]
+    assert _server_marker(tmp_path).exists()
+
+    toolchain.shutdown()
+    assert not _server_marker(tmp_path).exists()
+    assert toolchain.begin_build(env) == "cold"
+
+
+def test_batch_workers_keep_build_servers(tmp_path, sample_project, fake_dotnet, monkeypatch):
+    assert DotnetToolchain.node_reuse(_isolated_env(str(tmp_path)))
+    root, _ = sample_project()
+    monkeypatch.setenv(DOTNET_COMMAND_ENV, fake_dotnet)
+
+    results = list(validate_tasks_batch(["T-001"], str(root), max_workers=1))
+
+    assert [(task_id, is_valid) for task_id, is_valid, _, _ in results] == [("T-001", True)], results
+    assert _server_marker(tmp_path).exists()
+    # ワーカーが起動したサーバーは呼び出し側のツールチェーンが停止する
+    get_toolchain(root, fake_dotnet).shutdown()
+    assert not _server_marker(tmp_path).exists()
@@ -0,0 +1,102 @@
+"""FileMatcher の required_files 照合のテスト（glob.glob(recursive=True) の結果と比較）"""
+
+import glob
+import os
+
+import pytest
+
+import FileMatcher
+from FileMatcher import RequiredFilesMatcher, match_required_files
+
+FILES = [
+    "Program.cs",
+    "README.md",
+    "src/Core/Macro.cs",
+    "src/Core/MacroRunner.cs",
+    "src/Core/Parser.cs",
+    "src/Core/Deep/Nested/Timer.cs",
+    "src/UI/MainWindow.xaml",
+    "src/UI/MainWindow.xaml.cs",
+    "tests/Core/MacroTests.cs",
+    "tests/Core/ParserTests.cs",
+    "tests/UI/T1Tests.cs",
+]
+
+PATTERNS = [
+    "**/*.cs",
+    "src/**/*.cs",
+    "src/**",
+    "src/Core/*.cs",
+    "src/*/Macro?.cs",
+    "src/Core/Macro*.cs",
+    "tests/**/[MP]*Tests.cs",
+    "tests/**/[!M]*Tests.cs",
+    "src/**/Deep/**/*.cs",
+    "**/*.xaml",
+    "docs/**/*.md",
+]
+
+
+@pytest.fixture
+def worktree(tmp_path):
+    for relative in FILES:
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("// test\n", encoding="utf-8")
+    return tmp_path
+
+
+def _glob_files(worktree, pattern):
+    """旧実装の glob.glob による照合（ファイルのみ、/ 区切りの相対パス）"""
+    matches = glob.glob(os.path.join(str(worktree), pattern), recursive=True)
+    return sorted(os.path.relpath(m, worktree).replace(os.sep, "/") for m in matches if os.path.isfile(m))
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_matches_glob_behaviour(worktree, pattern):
+    assert match_required_files(worktree, [pattern])[pattern] == _glob_files(worktree, pattern)
+
+
+def test_all_patterns_in_one_pass_match_glob(worktree):
+    results = match_required_files(worktree, PATTERNS + ["src/Core/Parser.cs", "src/Missing.cs", "./README.md"])
+
+    for pattern in PATTERNS:
+        assert results[pattern] == _glob_files(worktree, pattern), pattern
+    # 固定パスは存在確認のみ
+    assert results["src/Core/Parser.cs"] == ["src/Core/Parser.cs"]
+    assert results["src/Missing.cs"] == []
+    assert results["./README.md"] == ["README.md"]
+
+
+def test_pruned_directories_are_not_walked(worktree):
+    for relative in ("src/Core/bin/Release/Generated.cs", "src/Core/obj/Macro.g.cs", ".git/hooks/x.cs"):
+        path = worktree / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("// build output\n", encoding="utf-8")
+
+    matched = match_required_files(worktree, ["src/**/*.cs"])["src/**/*.cs"]
+
+    # glob はビルド出力まで拾うが、照合器は bin/obj 等を走査しない
+    assert "src/Core/obj/Macro.g.cs" in _glob_files(worktree, "src/**/*.cs")
+    assert matched == [path for path in _glob_files(worktree, "src/**/*.cs") if "/bin/" not in path and "/obj/" not in path]
+
+
+def test_walk_starts_at_literal_prefix(worktree, monkeypatch):
+    scanned = []
+    scandir = os.scandir
+
+    def recording_scandir(path):
+        scanned.append(os.path.relpath(path, worktree).replace(os.sep, "/"))
+        return scandir(path)
+
+    monkeypatch.setattr(FileMatcher.os, "scandir", recording_scandir)
+    matcher = RequiredFilesMatcher(["src/Core/*.cs", "src/Core/Deep/**/*.cs", "tests/UI/*Tests.cs", "missing/*.cs"])
+
+    results = matcher.match(worktree)
+
+    # 配下にある開始点はまとめ、固定の先頭ディレクトリより上は走査しない
+    assert matcher._walk_roots() == ["missing", "src/Core", "tests/UI"]
+    assert sorted(scanned) == ["missing", "src/Core", "src/Core/Deep", "src/Core/Deep/Nested", "tests/UI"]
+    assert results["src/Core/Deep/**/*.cs"] == ["src/Core/Deep/Nested/Timer.cs"]
+    assert results["tests/UI/*Tests.cs"] == ["tests/UI/T1Tests.cs"]
+    assert results["missing/*.cs"] == []
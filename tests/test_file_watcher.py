@@ -0,0 +1,54 @@
+"""FileChangeWatcher の変更待ちのテスト（inotify とポーリングの両方）"""
+
+import os
+import threading
+
+import pytest
+
+from FileWatcher import FileChangeWatcher
+
+
+def _replace(path, text):
+    # progress.json と同じく一時ファイルからの rename で置き換える
+    temp = path.with_suffix(".tmp")
+    temp.write_text(text, encoding="utf-8")
+    os.replace(temp, path)
+
+
+@pytest.fixture(params=[False, True], ids=["poll", "inotify"])
+def watcher(request, tmp_path):
+    target = tmp_path / "progress.json"
+    target.write_text("{}", encoding="utf-8")
+    with FileChangeWatcher(str(target), poll_interval=0.02, use_inotify=request.param) as watcher:
+        if request.param and watcher.backend != "inotify":
+            pytest.skip("inotify is not available")
+        yield watcher
+
+
+def test_poll_fallback_when_inotify_disabled(tmp_path):
+    target = tmp_path / "progress.json"
+    with FileChangeWatcher(str(target), use_inotify=False) as watcher:
+        assert watcher.backend == "poll"
+
+
+def test_wait_returns_on_atomic_replace(watcher, tmp_path):
+    target = tmp_path / "progress.json"
+    assert watcher.wait(timeout=0.1) is False
+
+    timer = threading.Timer(0.05, _replace, args=(target, '{"changed": true}'))
+    timer.start()
+    try:
+        assert watcher.wait(timeout=5) is True
+    finally:
+        timer.join()
+    # 変更は1度だけ報告される
+    assert watcher.wait(timeout=0.1) is False
+
+
+def test_other_files_in_directory_are_ignored(watcher, tmp_path):
+    timer = threading.Timer(0.02, (tmp_path / "other.json").write_text, args=("{}",))
+    timer.start()
+    try:
+        assert watcher.wait(timeout=0.2) is False
+    finally:
+        timer.join()
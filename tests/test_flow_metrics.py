@@ -0,0 +1,79 @@
+"""FlowMetricsStore の増分集計のテスト"""
+
+from dataclasses import asdict
+from pathlib import Path
+
+from FlowMetrics import FlowMetricsStore
+
+
+def _history(*transitions):
+    history, previous = [], "pending"
+    for status, timestamp in transitions:
+        history.append({"from_status": previous, "to_status": status, "timestamp": timestamp})
+        previous = status
+    return history
+
+
+TASKS = {
+    "T-001": {"status_history": _history(("pending", "2026-03-02T09:00:00Z"), ("in_progress", "2026-03-02T10:00:00Z"),
+                                         ("completed", "2026-03-04T10:00:00Z"))},
+    "T-002": {"status_history": _history(("pending", "2026-03-02T09:00:00Z"), ("in_progress", "2026-03-05T09:00:00Z"),
+                                         ("review", "2026-03-06T09:00:00Z"), ("completed", "2026-03-09T09:00:00Z"))},
+    "T-003": {"status_history": _history(("pending", "2026-03-03T09:00:00Z"), ("in_progress", "2026-03-10T09:00:00Z"))},
+    "T-004": {"status_history": []},
+}
+
+
+def _truncated(tasks, count):
+    return {task_id: {"status_history": task["status_history"][:count]} for task_id, task in tasks.items()}
+
+
+def _series(store, bucket="day"):
+    series = asdict(store.series(bucket))
+    series["lead_times"].sort()
+    series["cycle_times"].sort()
+    return series
+
+
+def test_incremental_update_matches_full_recount(write_progress):
+    progress_file = write_progress({"active_tasks": TASKS})
+    incremental = FlowMetricsStore(progress_file)
+    assert incremental.update(_truncated(TASKS, 2)) == 6
+    assert incremental.update(TASKS) == 3
+    assert incremental.update(TASKS) == 0
+
+    fresh = FlowMetricsStore(progress_file, store_file=str(Path(progress_file).parent / "fresh.json"))
+    fresh.update(TASKS)
+
+    for bucket in ("day", "week"):
+        assert _series(incremental, bucket) == _series(fresh, bucket)
+    series = incremental.series("day")
+    assert series.labels[0] == "2026-03-02" and series.labels[-1] == "2026-03-10"
+    assert series.completed[-1] == 2 and series.wip[-1] == 1
+    assert series.remaining[-1] == 2       # T-003 と遷移記録のない T-004
+    assert series.lead_times == [2.0417, 7.0]
+    assert (Path(progress_file).parent / "cache" / "flow_metrics.json").exists()
+
+
+def test_rewritten_history_is_recounted(write_progress):
+    progress_file = write_progress({"active_tasks": TASKS})
+    store = FlowMetricsStore(progress_file)
+    store.update(TASKS)
+
+    rewritten = dict(TASKS, **{"T-002": {"status_history": TASKS["T-002"]["status_history"][:1]}})
+    store.update(rewritten)
+
+    fresh = FlowMetricsStore(progress_file, store_file=str(Path(progress_file).parent / "fresh.json"))
+    fresh.update(rewritten)
+    assert _series(store) == _series(fresh)
+    assert store.series().completed[-1] == 1
+
+
+def test_update_reads_progress_only_when_changed(write_progress):
+    progress_file = write_progress({"active_tasks": TASKS})
+    store = FlowMetricsStore(progress_file)
+
+    assert store.update() == 9
+    assert store.update() == 0
+    write_progress({"active_tasks": _truncated(TASKS, 1)})
+    assert FlowMetricsStore(progress_file).update() == 3
@@ -0,0 +1,83 @@
+"""PerformanceTracker のベースライン選択と回帰検出のテスト"""
+
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from PerformanceTracker import PerformanceTracker, RegressionPolicy, extract_metrics
+
+
+def _tracker(tmp_path, **policy):
+    return PerformanceTracker(tmp_path / "metrics" / "validation_metrics.jsonl", RegressionPolicy(**policy))
+
+
+def _seed(tracker, branch="main", count=6):
+    for i in range(count):
+        tracker.record(f"T-{i:03d}", "Core", branch,
+                       {"build_seconds": 10.0 + (i % 3) * 0.2, "coverage_percent": 80.0 + i % 2},
+                       {"Tests.Core.MacroTests.Runs": 0.5})
+
+
+def test_no_baseline_until_enough_samples(tmp_path):
+    tracker = _tracker(tmp_path)
+    _seed(tracker, count=4)
+
+    report = tracker.detect("Core", "task-T-010", {"build_seconds": 50.0}, {})
+
+    assert report.status == "no_baseline"
+    assert report.baseline_samples == 4
+
+
+def test_build_slowdown_and_coverage_drop_are_detected(tmp_path):
+    tracker = _tracker(tmp_path, mode="fail")
+    _seed(tracker)
+
+    steady = tracker.detect("Core", "task-T-010", {"build_seconds": 10.5, "coverage_percent": 80.0},
+                            {"Tests.Core.MacroTests.Runs": 0.6})
+    regressed = tracker.detect("Core", "task-T-010", {"build_seconds": 25.0, "coverage_percent": 70.0},
+                               {"Tests.Core.NewTests.Slow": 3.0})
+
+    assert steady.status == "ok" and steady.baseline == "Core@main"
+    assert regressed.status == "fail"
+    by_metric = {r.get("test", r["metric"]): r for r in regressed.regressions}
+    assert by_metric["build_seconds"]["severity"] == "fail"          # 2倍以上の悪化
+    assert by_metric["coverage_percent"]["severity"] == "warning"
+    assert by_metric["Tests.Core.NewTests.Slow"]["new_test"] is True
+
+
+def test_records_survive_reload_and_cached_stages_are_skipped(tmp_path):
+    tracker = _tracker(tmp_path)
+    _seed(tracker, branch="task-T-001", count=5)
+
+    reloaded = _tracker(tmp_path)
+    label, samples = reloaded.baseline("Core", "task-T-001")
+    assert label == "Core@task-T-001" and len(samples) == 5
+
+    # キャッシュから再利用したステージの時間は実測ではないため記録しない
+    metrics, timings = extract_metrics({
+        "stages": {"build": {"cached": True}, "test": {"cached": False}},
+        "toolchain": {"build_duration": 3.0},
+        "resource_usage": {"test": {"wall_seconds": 4.0}},
+        "test_results": {"test_timings": {"A.B.C": 0.1}},
+        "coverage": {"coverage_percent": 75.0},
+    })
+    assert metrics == {"test_seconds": 4.0, "coverage_percent": 75.0}
+    assert timings == {"A.B.C": 0.1}
+
+
+def _record_from_worker(store_file, worker):
+    tracker = PerformanceTracker(store_file, max_records=20)
+    for i in range(15):
+        tracker.record(f"T-{worker}{i:02d}", "Core", "main", {"build_seconds": 10.0}, {})
+
+
+def test_parallel_workers_do_not_corrupt_store(tmp_path):
+    store_file = tmp_path / "metrics" / "validation_metrics.jsonl"
+
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        list(pool.map(_record_from_worker, [store_file] * 4, range(4)))
+
+    # 追記と切り詰めの書き直しが交錯しないので、全行が完全なレコードで上限内に収まる
+    lines = store_file.read_text(encoding="utf-8").splitlines()
+    assert 20 <= len(lines) <= 24
+    assert all(json.loads(line)["project"] == "Core" for line in lines)
+    assert store_file.with_suffix(".lock").exists()
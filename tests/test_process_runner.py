@@ -0,0 +1,82 @@
+"""StreamingRunner の逐次解析・早期中断のテスト"""
+
+import subprocess
+import sys
+import time
+
+import ProcessRunner
+# Test* の名前のままだと pytest がテストクラスとして収集しようとする
+from ProcessRunner import BuildOutputParser, StreamingRunner, TestOutputParser as DotnetTestParser
+
+
+def _script(*lines, sleep=0.0):
+    """lines を出力し、sleep 秒待ってから終了する Python コマンド"""
+    body = "".join(f"print({line!r}, flush=True)\n" for line in lines)
+    return [sys.executable, "-c", f"import time\n{body}time.sleep({sleep})\n"]
+
+
+def test_test_output_is_parsed_while_streaming():
+    events = []
+    parser = DotnetTestParser()
+    runner = StreamingRunner(max_log_lines=3, progress_callback=events.append)
+
+    result = runner.run(_script(
+        "Starting test execution",
+        "  Failed GameMacroAssistant.Tests.MacroTests.Runs [3 ms]",
+        "Failed!  - Failed:     1, Passed:     4, Skipped:     0, Total:     5, Duration: 1 s",
+        "Passed!  - Failed:     0, Passed:     2, Skipped:     1, Total:     3, Duration: 1 s",
+    ), parser=parser)
+
+    assert result.returncode == 0 and not result.aborted
+    assert parser.failed_tests == ["GameMacroAssistant.Tests.MacroTests.Runs"]
+    # テストプロジェクトごとのサマリーを合算する
+    assert parser.counts == {"total_count": 8, "passed_count": 6, "failed_count": 1, "skipped_count": 1}
+    assert result.line_count == 4 and len(result.log_tail) == 3
+    assert [e["event"] for e in events if e["event"] != "progress"] == \
+        ["started", "test_failed", "test_summary", "test_summary", "finished"]
+    assert result.usage is not None and result.usage.output_bytes == result.output_bytes
+
+
+def test_first_build_error_aborts_the_process():
+    parser = BuildOutputParser(abort_on_first_error=True)
+    started = time.perf_counter()
+
+    result = StreamingRunner().run(_script(
+        "Build started.",
+        "src/Foo.cs(10,5): error CS1002: ; expected [src/Foo.csproj]",
+        sleep=30,
+    ), parser=parser)
+
+    assert time.perf_counter() - started < 15
+    assert result.aborted
+    assert result.abort_reason.startswith("Build error: src/Foo.cs(10,5): error CS1002")
+    assert parser.errors == ["src/Foo.cs(10,5): error CS1002: ; expected [src/Foo.csproj]"]
+
+
+def test_timeout_kills_the_process():
+    result = StreamingRunner().run(_script("waiting", sleep=30), timeout=0.5)
+
+    assert result.timed_out
+    assert result.duration < 15
+    assert result.log_tail == ["waiting"]
+
+
+def test_windows_kill_terminates_the_process_tree(monkeypatch):
+    calls = []
+
+    class FakeProcess:
+        pid = 4321
+
+        def kill(self):
+            calls.append("kill")
+
+    def fake_run(args, **kwargs):
+        calls.append(args)
+        return subprocess.CompletedProcess(args, 0)
+
+    monkeypatch.setattr(ProcessRunner.os, "name", "nt")
+    monkeypatch.setattr(ProcessRunner.subprocess, "run", fake_run)
+    StreamingRunner._kill(FakeProcess())
+
+    # 子の MSBuild ノード・testhost まで /T で終了し、親だけの kill には頼らない
+    assert calls == [["taskkill", "/T", "/F", "/PID", "4321"]]
@@ -0,0 +1,78 @@
+"""ProgressSnapshot の共有キャッシュとセクション読み込みのテスト"""
+
+import json
+import os
+import re
+
+import pytest
+
+from ProgressSnapshot import (_MAX_SKIP_DEPTH, _container_pattern, _string_pattern, cache_dir,
+                              load_progress_sections, load_progress_snapshot)
+
+
+SAMPLE = {
+    "project_id": "sample",
+    "current_sprint": "sprint-01",
+    "active_tasks": {
+        "T-001": {"status": "completed", "assignee": "dev-agent-1", "description": "初期化"},
+        "T-002": {"status": "pending", "dependencies": ["T-001"]},
+    },
+    "workflow_state": {"integration_completed": []},
+}
+
+
+def test_returned_data_is_independent_of_cache(write_progress):
+    progress_file = write_progress(SAMPLE)
+
+    data, snapshot = load_progress_snapshot(progress_file)
+    data["active_tasks"]["T-001"]["status"] = "corrupted"
+    data["active_tasks"].pop("T-002")
+
+    again, cached_snapshot = load_progress_snapshot(progress_file)
+    assert cached_snapshot is snapshot
+    assert again["active_tasks"]["T-001"]["status"] == "completed"
+    assert "T-002" in again["active_tasks"]
+    assert snapshot.task("T-001").status == "completed"
+
+
+def test_sections_index_lives_in_cache_dir(write_progress, tmp_path):
+    progress_file = write_progress(SAMPLE)
+
+    sections = load_progress_sections(progress_file, ("current_sprint", "active_tasks"))
+
+    assert sections["current_sprint"] == "sprint-01"
+    assert set(sections["active_tasks"]) == {"T-001", "T-002"}
+    assert not os.path.exists(progress_file + ".sections")
+    assert os.path.exists(os.path.join(cache_dir(progress_file), "progress.json.sections"))
+
+
+def test_stale_offsets_with_same_stat_fall_back_to_scan(write_progress):
+    progress_file = write_progress(SAMPLE)
+    load_progress_sections(progress_file, ("current_sprint", "workflow_state"))
+    st = os.stat(progress_file)
+
+    # キーの順序だけを変えた書き換え（サイズは同じ、各セクションの位置は変わる）
+    reordered = dict(reversed(list(SAMPLE.items())))
+    with open(progress_file, "w", encoding="utf-8") as f:
+        json.dump(reordered, f, ensure_ascii=False, indent=2)
+    assert os.stat(progress_file).st_size == st.st_size
+    os.utime(progress_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    sections = load_progress_sections(progress_file, ("current_sprint", "workflow_state"))
+
+    assert sections == {"current_sprint": "sprint-01", "workflow_state": {"integration_completed": []}}
+
+
+@pytest.mark.parametrize("possessive", [False, True])
+def test_skip_patterns_work_without_possessive_quantifiers(possessive):
+    # possessive=False は Python 3.10 で使われる形（3.11 以降でも同じ結果になる）
+    container = _container_pattern(_MAX_SKIP_DEPTH, possessive=possessive)
+    string = re.compile(_string_pattern(possessive))
+    value = json.dumps(SAMPLE["active_tasks"] | {"note": "quote \" and [brackets] {braces}"}).encode()
+
+    assert container.match(value).end() == len(value)
+    assert container.match(b'[' * 33 + b']' * 33).end() == 66
+    assert string.match(b'"a\\"b" tail').end() == 6
+    # 途中で切れたコンテナ・深すぎるネストは一致しない（読み飛ばせない）
+    assert container.match(value[:-1]) is None
+    assert container.match(b'[' * 34 + b']' * 34) is None
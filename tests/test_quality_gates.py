@@ -0,0 +1,59 @@
+"""QualityGateEngine の宣言的評価と増分再計算のテスト"""
+
+import json
+
+from ProgressSnapshot import load_progress_snapshot
+from QualityGates import QualityGateEngine, save_latest_result
+
+
+def _details(failed=0, diff_coverage=90.0, warnings=3):
+    return {
+        "test_results": {"failed_count": failed, "total_count": 10},
+        "coverage": {"coverage_percent": 85.0, "diff_coverage_percent": diff_coverage},
+        "build_warnings": warnings,
+        "build_success": True,
+    }
+
+
+def _snapshot(write_progress, tasks, coverage="85%"):
+    return load_progress_snapshot(write_progress({"active_tasks": tasks,
+                                                  "project_metrics": {"test_coverage": coverage}}))[1]
+
+
+def test_default_gates_and_incremental_recompute(tmp_path, write_progress):
+    tasks = {"T-001": {"status": "completed"}, "T-002": {"status": "completed"}, "T-003": {"status": "pending"}}
+    save_latest_result(tmp_path, "T-001", _details())
+    save_latest_result(tmp_path, "T-002", _details(failed=2, diff_coverage=50.0))
+    engine = QualityGateEngine(tmp_path)
+
+    report = engine.evaluate(_snapshot(write_progress, tasks))
+
+    assert report["test_coverage_ok"]["passed"] and report["test_coverage_ok"]["value"] == 85.0
+    assert report["all_tests_passing"]["failing_tasks"] == ["T-002"]
+    assert report["diff_coverage_ok"]["failing_tasks"] == ["T-002"]
+    assert report["build_warnings_ok"]["passed"]
+    assert not report["ready_for_integration"]["passed"]
+    assert engine.recomputed == 3
+
+    # 検証結果が変わったタスクだけを再計算する
+    # （同じ tick 内の書き換えでも検出できるようサイズも変える）
+    save_latest_result(tmp_path, "T-002", _details(warnings=10))
+    report = engine.evaluate(_snapshot(write_progress, tasks))
+    assert engine.recomputed == 4
+    assert report["ready_for_integration"]["passed"]
+
+
+def test_configured_gates_replace_defaults(tmp_path, write_progress):
+    tasks = {"T-001": {"status": "completed"}, "T-002": {"status": "bug_fixing"}}
+    save_latest_result(tmp_path, "T-001", _details(warnings=120))
+    config = tmp_path / ".claude" / "quality_gates.json"
+    config.write_text(json.dumps({"gates": [
+        {"name": "warnings", "metric": "build_warnings", "op": "<=", "value": 100},
+        {"name": "no_defects", "scope": "project", "metric": "open_defects", "op": "==", "value": 0,
+         "blocking": False},
+    ]}), encoding="utf-8")
+    engine = QualityGateEngine(tmp_path)
+
+    checks = engine.check(_snapshot(write_progress, tasks))
+
+    assert checks == {"warnings": False, "no_defects": False, "ready_for_integration": False}
@@ -0,0 +1,51 @@
+"""サブプロセスの資源計測・予算超過停止のテスト"""
+
+import sys
+import time
+
+from ArtifactValidator import ArtifactValidator
+from ProcessRunner import StreamingRunner
+from ResourceAccounting import ResourceBudget, ResourceUsage
+
+
+def test_budget_check_and_usage_combination():
+    budget = ResourceBudget.from_dict({"cpu_seconds": 10, "output_mb": 1, "unknown": 5})
+
+    assert ResourceBudget.from_dict({}) is None
+    assert budget.check(5.0, 10 * 1048576, 1024) is None
+    assert budget.check(12.0, 0, 0) == "CPU time 12.0s > 10s"
+    assert budget.check(0.0, 0, 2 * 1048576) == "output 2.0MB > 1MB"
+
+    build = ResourceUsage(wall_seconds=4, user_cpu_seconds=3, peak_rss_mb=200, output_bytes=10, source="rusage")
+    test = ResourceUsage(wall_seconds=2, user_cpu_seconds=1, peak_rss_mb=300, output_bytes=5, source="proc")
+    sequential = build.combine(test)
+    concurrent = build.combine(test, concurrent=True)
+    assert (sequential.wall_seconds, sequential.peak_rss_mb, sequential.source) == (6, 300, "mixed")
+    assert (concurrent.wall_seconds, concurrent.peak_rss_mb) == (4, 500)
+    assert sequential.cpu_usage_percent == 66.7
+    assert ResourceUsage.from_dict(sequential.to_dict()) == sequential
+
+
+def test_runner_stops_process_over_output_budget():
+    command = [sys.executable, "-c",
+               "import time\nfor _ in range(2000): print('x' * 100, flush=True)\ntime.sleep(30)\n"]
+    started = time.perf_counter()
+
+    result = StreamingRunner(sample_interval=0.05).run(command, budget=ResourceBudget(output_mb=0.01))
+
+    assert time.perf_counter() - started < 15
+    assert result.aborted
+    assert result.usage.budget_exceeded.startswith("Resource budget exceeded: output")
+
+
+def test_validation_records_stage_usage(sample_project, fake_dotnet):
+    root, _ = sample_project()
+    validator = ArtifactValidator(str(root), use_cache=False, use_test_impact=False, dotnet_command=fake_dotnet)
+
+    is_valid, message, details = validator.validate_task_completion("T-001")
+
+    assert is_valid, message
+    usage = details["resource_usage"]
+    assert {"build", "test", "total"} <= set(usage)
+    assert usage["total"]["output_bytes"] >= usage["build"]["output_bytes"] + usage["test"]["output_bytes"]
+    assert usage["total"]["execution_time_seconds"] > 0
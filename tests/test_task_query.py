@@ -0,0 +1,64 @@
+"""TaskQuery のフィルタ・カーソルページングと tasks コマンドの引数解釈のテスト"""
+
+import pytest
+
+from ProgressSnapshot import load_progress_snapshot
+from ProgressVisualizer import parse_task_query
+from TaskQuery import QueryError, TaskQuery
+
+
+TASKS = {
+    f"T-{n}": {
+        "status": "pending" if n % 3 else "in_progress",
+        "assigned_to": f"dev-agent-{n % 2 + 1}",
+        "last_updated": f"2026-05-{n:02d}T12:00:00Z",
+    }
+    for n in (1, 2, 3, 4, 5, 6, 7, 10, 11)
+}
+
+
+@pytest.fixture
+def snapshot(write_progress):
+    return load_progress_snapshot(write_progress({"active_tasks": TASKS}))[1]
+
+
+def _pages(snapshot, **options):
+    pages, cursor = [], None
+    while True:
+        query = TaskQuery(limit=2, cursor=cursor, **options)
+        pages.append([task.task_id for task in query.iter_tasks(snapshot)])
+        cursor = query.next_cursor
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_results_once(snapshot):
+    pages = _pages(snapshot, filter_expression="status=pending")
+
+    assert pages == [["T-1", "T-2"], ["T-4", "T-5"], ["T-7", "T-10"], ["T-11"]]
+
+
+def test_cursor_pages_with_descending_sort(snapshot):
+    pages = _pages(snapshot, sort_expression="-age,task_id")
+
+    # 経過時間の降順 = 更新が古い順
+    assert [tid for page in pages for tid in page] == \
+        ["T-1", "T-2", "T-3", "T-4", "T-5", "T-6", "T-7", "T-10", "T-11"]
+    assert all(len(page) == 2 for page in pages[:-1])
+
+
+def test_cursor_must_match_sort(snapshot):
+    query = TaskQuery(limit=2)
+    list(query.iter_tasks(snapshot))
+
+    with pytest.raises(QueryError):
+        TaskQuery(sort_expression="-age", cursor=query.next_cursor)
+
+
+def test_tasks_command_accepts_descending_sort():
+    query = parse_task_query(["--sort", "-age,task_id", "--status", "pending", "--limit", "5"])
+
+    assert query.sort_fields == [("age", True), ("task_id", False)]
+    assert query.terms == [("status", "=", ["pending"])]
+    assert query.limit == 5
+    assert parse_task_query(["--sort=-age"]).sort_fields == [("age", True), ("task_id", False)]
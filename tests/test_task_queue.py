@@ -0,0 +1,64 @@
+"""TaskQueue のリース期限・フェンシングのテスト（時計を差し替えて検証）"""
+
+import pytest
+
+from TaskQueue import DEAD, LEASED, QUEUED, InMemoryTaskQueue, SQLiteTaskQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def queue_factory(request, tmp_path):
+    def _make(clock, max_attempts=3):
+        if request.param == "memory":
+            return InMemoryTaskQueue(max_attempts=max_attempts, clock=clock)
+        return SQLiteTaskQueue(tmp_path / "task_queue.db", max_attempts=max_attempts, clock=clock)
+    return _make
+
+
+def test_expired_lease_is_fenced_off(queue_factory):
+    clock = FakeClock()
+    queue = queue_factory(clock)
+    assert queue.enqueue("T-001", {"branch_name": "task-T-001"})
+    assert not queue.enqueue("T-001")
+
+    first = queue.claim("dev-agent-1", lease_seconds=10)
+    assert first.task_id == "T-001" and first.payload == {"branch_name": "task-T-001"}
+    assert queue.claim("dev-agent-2", lease_seconds=10) is None
+    clock.now += 5
+    first = queue.heartbeat(first, lease_seconds=10)
+    assert first is not None and first.expires_at == clock.now + 10
+
+    # 期限切れでキューに戻り、別のエージェントがより大きいフェンスで取得する
+    clock.now += 11
+    assert queue.requeue_expired() == ["T-001"]
+    second = queue.claim("dev-agent-2", lease_seconds=10)
+    assert second.fence > first.fence
+    assert second.attempts == 2
+    assert queue.heartbeat(first) is None
+    assert not queue.complete(first)
+    assert queue.leased_task_ids() == ["T-001"]
+    assert queue.complete(second)
+    assert queue.leased_task_ids() == []
+
+
+def test_lease_expiry_moves_task_to_dead_after_max_attempts(queue_factory):
+    clock = FakeClock()
+    queue = queue_factory(clock, max_attempts=2)
+    queue.enqueue("T-001")
+
+    states = []
+    for _ in range(2):
+        assert queue.claim("dev-agent-1", lease_seconds=10) is not None
+        states.append(queue.entries()[0].state)
+        clock.now += 10
+        states.append(queue.entries()[0].state)
+
+    assert states == [LEASED, QUEUED, LEASED, DEAD]
+    assert queue.claim("dev-agent-1") is None
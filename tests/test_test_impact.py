@@ -0,0 +1,88 @@
+"""TestImpactAnalyzer.select のテスト選択のテスト（一時 git リポジトリを使用）"""
+
+import subprocess
+
+import pytest
+
+# Test* の名前のまま取り込むと pytest がテストクラスとして収集しようとする
+from TestImpact import TestImpactAnalyzer as ImpactAnalyzer, TestImpactMap as ImpactMap
+
+
+def _git(cwd, *args):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=cwd, check=True, capture_output=True)
+
+
+def _write(root, relative, content):
+    path = root / relative
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """main に Macro/Parser とそのテストを持ち、タスクブランチをチェックアウトしたリポジトリ"""
+    root = tmp_path / "repo"
+    for name in ("Macro", "Parser"):
+        _write(root, f"src/Core/{name}.cs", f"namespace App.Core;\npublic class {name} {{}}\n")
+        _write(root, f"tests/Core/{name}Tests.cs", f"namespace App.Tests.Core;\npublic class {name}Tests {{}}\n")
+    _git(root, "init", "--quiet", "--initial-branch=main")
+    _git(root, "add", ".")
+    _git(root, "commit", "--quiet", "-m", "initial")
+    _git(root, "checkout", "--quiet", "-b", "feature/T-001")
+    return root
+
+
+@pytest.fixture
+def analyzer(tmp_path):
+    return ImpactAnalyzer(ImpactMap(tmp_path / "test_impact.json"))
+
+
+def test_modified_source_selects_matching_tests(repo, analyzer):
+    _write(repo, "src/Core/Macro.cs", "namespace App.Core;\npublic class Macro { int x; }\n")
+    _git(repo, "commit", "--quiet", "-am", "change macro")
+
+    selection = analyzer.select("T-001", repo)
+
+    assert selection.mode == "impacted"
+    assert selection.test_classes == ["MacroTests"]
+    assert selection.filter == "FullyQualifiedName~App.Tests.Core.MacroTests."
+
+
+def test_force_full_and_no_changes_run_everything(repo, analyzer):
+    assert analyzer.select("T-001", repo, force_full=True).reasons == ["full run requested"]
+    assert analyzer.select("T-001", repo).reasons == ["no changes against base branch"]
+
+
+@pytest.mark.parametrize("change, reason", [
+    (lambda root: _git(root, "rm", "--quiet", "src/Core/Parser.cs"), "deleted file: src/Core/Parser.cs"),
+    (lambda root: _git(root, "mv", "src/Core/Parser.cs", "src/Core/Tokenizer.cs"), "renamed file: src/Core/Parser.cs"),
+    (lambda root: _write(root, "src/Core/Recorder.cs", "public class Recorder {}\n"), "untracked file: src/Core/Recorder.cs"),
+])
+def test_structural_changes_fall_back_to_full_run(repo, analyzer, change, reason):
+    # 行差分で追える変更と組み合わせても、削除・リネーム・未追跡があれば全件実行
+    _write(repo, "src/Core/Macro.cs", "namespace App.Core;\npublic class Macro { int x; }\n")
+    change(repo)
+
+    selection = analyzer.select("T-001", repo)
+
+    assert selection.mode == "full"
+    assert selection.reasons == [reason]
+
+
+def test_committed_deletion_falls_back_to_full_run(repo, analyzer):
+    _git(repo, "rm", "--quiet", "src/Core/Parser.cs")
+    _git(repo, "commit", "--quiet", "-m", "remove parser")
+
+    selection = analyzer.select("T-001", repo)
+
+    assert (selection.mode, selection.reasons) == ("full", ["deleted file: src/Core/Parser.cs"])
+
+
+def test_untracked_documents_do_not_force_full_run(repo, analyzer):
+    _write(repo, "src/Core/Parser.cs", "namespace App.Core;\npublic class Parser { int y; }\n")
+    _write(repo, "docs/notes.md", "memo\n")
+
+    selection = analyzer.select("T-001", repo)
+
+    assert (selection.mode, selection.test_classes) == ("impacted", ["ParserTests"])
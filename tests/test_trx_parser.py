@@ -0,0 +1,114 @@
+"""TrxParser のストリーミング解析のテスト（MSTest・xUnit 形式の TRX フィクスチャを使用）"""
+
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from TrxParser import parse_trx, parse_trx_files
+
+_NS = "http://microsoft.com/schemas/VisualStudio/TeamTest/2010"
+
+# MSTest: testName はメソッド名のみ。データ駆動テストは InnerResults に行ごとの結果を持つ
+MSTEST_TRX = f"""<?xml version="1.0" encoding="utf-8"?>
+<TestRun id="run-1" xmlns="{_NS}">
+  <Results>
+    <UnitTestResult executionId="e1" testId="id-run" testName="Run" outcome="Passed" duration="00:00:01.5000000" />
+    <UnitTestResult executionId="e2" testId="id-parse" testName="Run" outcome="Failed" duration="00:00:00.2500000">
+      <Output><ErrorInfo><Message>Assert.AreEqual failed</Message><StackTrace>at ParserTests.Run()</StackTrace></ErrorInfo></Output>
+    </UnitTestResult>
+    <UnitTestResult executionId="e3" testId="id-rows" testName="Rows" outcome="Passed" duration="00:00:02.0000000" resultType="DataDrivenTest">
+      <InnerResults>
+        <UnitTestResult executionId="e3a" parentExecutionId="e3" testId="id-rows" testName="Rows (1)" outcome="Passed" duration="00:00:01.0000000" resultType="DataDrivenDataRow" />
+        <UnitTestResult executionId="e3b" parentExecutionId="e3" testId="id-rows" testName="Rows (2)" outcome="Passed" duration="00:00:01.0000000" resultType="DataDrivenDataRow" />
+      </InnerResults>
+    </UnitTestResult>
+  </Results>
+  <TestDefinitions>
+    <UnitTest name="Run" id="id-run"><TestMethod className="GameMacroAssistant.Tests.Core.MacroTests, GameMacroAssistant.Tests" name="Run" /></UnitTest>
+    <UnitTest name="Run" id="id-parse"><TestMethod className="GameMacroAssistant.Tests.Core.ParserTests" name="Run" /></UnitTest>
+    <UnitTest name="Rows" id="id-rows"><TestMethod className="GameMacroAssistant.Tests.Core.MacroTests" name="Rows" /></UnitTest>
+  </TestDefinitions>
+  <TestEntries>
+    <TestEntry testId="id-run" executionId="e1" />
+    <TestEntry testId="id-parse" executionId="e2" />
+    <TestEntry testId="id-rows" executionId="e3" />
+  </TestEntries>
+  <ResultSummary outcome="Failed">
+    <Counters total="3" executed="3" passed="2" failed="1" error="0" timeout="0" aborted="0" />
+  </ResultSummary>
+</TestRun>
+"""
+
+# xUnit: testName は完全修飾済み。理論テストは行ごとに別の testId を持つ
+XUNIT_TRX = f"""<?xml version="1.0" encoding="utf-8"?>
+<TestRun id="run-2" xmlns="{_NS}">
+  <Results>
+    <UnitTestResult testId="x1" testName="App.Tests.CalcTests.Add(a: 1)" outcome="Passed" duration="00:00:00.1000000" />
+    <UnitTestResult testId="x2" testName="App.Tests.CalcTests.Add(a: 2)" outcome="NotExecuted" duration="00:00:00.3000000" />
+  </Results>
+  <TestDefinitions>
+    <UnitTest name="App.Tests.CalcTests.Add(a: 1)" id="x1"><TestMethod className="App.Tests.CalcTests" name="Add" /></UnitTest>
+    <UnitTest name="App.Tests.CalcTests.Add(a: 2)" id="x2"><TestMethod className="App.Tests.CalcTests" name="Add" /></UnitTest>
+  </TestDefinitions>
+</TestRun>
+"""
+
+
+def _write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    return path
+
+
+def test_mstest_results_are_keyed_by_test_id(tmp_path):
+    summary = parse_trx(_write(tmp_path, "mstest.trx", MSTEST_TRX))
+
+    # 同名メソッドでも testId ごとに別のテストとして、クラス名で完全修飾する
+    assert summary.test_timings == {
+        "GameMacroAssistant.Tests.Core.MacroTests.Run": 1.5,
+        "GameMacroAssistant.Tests.Core.ParserTests.Run": 0.25,
+        "GameMacroAssistant.Tests.Core.MacroTests.Rows": 2.0,
+    }
+    assert (summary.total_count, summary.passed_count, summary.failed_count, summary.skipped_count) == (3, 2, 1, 0)
+    assert summary.failures == [{
+        "name": "GameMacroAssistant.Tests.Core.ParserTests.Run",
+        "outcome": "Failed",
+        "message": "Assert.AreEqual failed",
+        "stack_trace": "at ParserTests.Run()",
+    }]
+
+
+def test_inner_results_are_not_double_counted(tmp_path):
+    summary = parse_trx(_write(tmp_path, "mstest.trx", MSTEST_TRX))
+
+    assert summary.total_duration == pytest.approx(3.75)
+    assert summary.to_test_results()["slowest_tests"][0] == {
+        "name": "GameMacroAssistant.Tests.Core.MacroTests.Rows", "duration": 2.0}
+
+
+def test_xunit_names_are_kept_and_merged(tmp_path):
+    paths = [_write(tmp_path, "mstest.trx", MSTEST_TRX), _write(tmp_path, "xunit.trx", XUNIT_TRX)]
+
+    summary, errors = parse_trx_files(paths + [_write(tmp_path, "broken.trx", "<TestRun><Results>")])
+
+    assert len(errors) == 1 and "broken.trx" in errors[0]
+    assert summary.outcomes["App.Tests.CalcTests.Add(a: 1)"] == "Passed"
+    assert summary.outcomes["App.Tests.CalcTests.Add(a: 2)"] == "NotExecuted"
+    assert (summary.total_count, summary.passed_count, summary.failed_count, summary.skipped_count) == (5, 3, 1, 1)
+
+
+def test_processed_elements_are_detached(tmp_path, monkeypatch):
+    parsers = []
+    iterparse = ET.iterparse
+
+    def recording_iterparse(*args, **kwargs):
+        parser = iterparse(*args, **kwargs)
+        parsers.append(parser)
+        return parser
+
+    monkeypatch.setattr(ET, "iterparse", recording_iterparse)
+    parse_trx(_write(tmp_path, "mstest.trx", MSTEST_TRX))
+
+    # 結果・定義・エントリは親から外れ、空のコンテナだけが残る
+    remaining = [element.tag.rsplit("}", 1)[-1] for element in parsers[0].root.iter()]
+    assert remaining == ["TestRun", "Results", "TestDefinitions", "TestEntries", "ResultSummary", "Counters"]
@@ -0,0 +1,38 @@
+"""ValidationCache のキー生成とキャッシュのテスト"""
+
+from ValidationCache import ValidationResultCache
+
+
+def _make_worktree(root, name):
+    worktree = root / "worktrees" / name
+    (worktree / "src").mkdir(parents=True)
+    (worktree / "src" / "Macro.cs").write_text("public class Macro {}\n", encoding="utf-8")
+    (worktree / "src" / "Core.csproj").write_text("<Project />\n", encoding="utf-8")
+    return worktree
+
+
+def test_key_is_stable_for_unchanged_worktree(tmp_path):
+    cache = ValidationResultCache(tmp_path / "cache")
+    worktree = _make_worktree(tmp_path, "T-001")
+
+    first = cache.make_key("T-001", worktree, dotnet_command="missing-dotnet")
+    second = cache.make_key("T-001", worktree, dotnet_command="missing-dotnet")
+    (worktree / "src" / "Macro.cs").write_text("public class Macro { int x; }\n", encoding="utf-8")
+    changed = cache.make_key("T-001", worktree, dotnet_command="missing-dotnet")
+
+    assert first == second
+    assert changed != first
+
+
+def test_identical_worktrees_do_not_share_results(tmp_path):
+    cache = ValidationResultCache(tmp_path / "cache")
+    first = _make_worktree(tmp_path, "T-001")
+    second = _make_worktree(tmp_path, "T-002")
+
+    key_first = cache.make_key("T-001", first, dotnet_command="missing-dotnet")
+    cache.put(key_first, {"success": True, "report_paths": [str(first / "coverage.xml")]})
+    key_second = cache.make_key("T-002", second, dotnet_command="missing-dotnet")
+
+    assert key_second != key_first
+    assert cache.get(key_second) is None
+    assert cache.get(key_first)["success"] is True
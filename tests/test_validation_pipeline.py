@@ -0,0 +1,61 @@
+"""StageGraph のキャッシュと依存関係のテスト"""
+
+from ValidationPipeline import Stage, StageGraph
+
+
+class DictCache:
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, value):
+        self.entries[key] = value
+
+
+def _graph(cache, calls, source="v1", output_present=lambda inputs, value: True):
+    def run(name, result):
+        def _run(inputs):
+            calls.append(name)
+            return result(inputs)
+        return _run
+
+    return StageGraph([
+        Stage("source", run("source", lambda i: (True, source, "")), cache_key=None),
+        Stage("build", run("build", lambda i: (True, f"built-{i['source'].value}", "")), ["source"],
+              cache_key=lambda r: r["source"].value, cache_valid=output_present),
+        Stage("test", run("test", lambda i: (False, None, "boom")), ["build"],
+              cache_key=lambda r: r["build"].key),
+        Stage("report", run("report", lambda i: (True, None, "")), ["test"]),
+    ], cache=cache)
+
+
+def test_cached_stages_are_not_rerun_until_inputs_change():
+    cache, calls = DictCache(), []
+    first = _graph(cache, calls).run()
+    assert calls == ["source", "build", "test"]
+    assert first["report"].status == "skipped"
+    assert first["test"].status == "failed"
+
+    calls.clear()
+    second = _graph(cache, calls).run()
+    assert calls == ["source"]
+    assert second["build"].cached and second["test"].cached
+    assert second["build"].value == "built-v1"
+
+    calls.clear()
+    _graph(cache, calls, source="v2").run()
+    assert calls == ["source", "build", "test"]
+
+
+def test_invalid_cached_result_is_recomputed():
+    cache, calls = DictCache(), []
+    _graph(cache, calls).run()
+
+    calls.clear()
+    result = _graph(cache, calls, output_present=lambda inputs, value: False).run()
+
+    assert calls == ["source", "build"]
+    assert result["build"].cached is False
+    assert result["test"].cached is True
@@ -0,0 +1,79 @@
+"""WorkflowController の依存関係判定とタスク投入のテスト"""
+
+from TaskQueue import InMemoryTaskQueue
+from WorkflowController import WorkflowController
+
+
+def _write_spec(root, task_id, sprint):
+    spec_dir = root / "docs" / "pm" / "tasks"
+    spec_dir.mkdir(parents=True, exist_ok=True)
+    (spec_dir / f"{task_id}.md").write_text(
+        f"---\nid: {task_id}\nsprint: {sprint}\n---\n# {task_id}\n", encoding="utf-8"
+    )
+
+
+def _progress(active_tasks, integrated=(), completed_sprints=()):
+    return {
+        "project_id": "sample",
+        "current_phase": "development",
+        "completed_sprints": list(completed_sprints),
+        "active_tasks": active_tasks,
+        "workflow_state": {"integration_completed": list(integrated)},
+    }
+
+
+def test_dependencies_are_satisfied_only_when_integrated(tmp_path, write_progress):
+    _write_spec(tmp_path, "T-002", "sprint-01")
+    _write_spec(tmp_path, "T-005", "sprint-02")
+    write_progress(_progress(
+        {
+            "T-010": {"status": "pending", "dependencies": ["T-001"]},   # 統合済み
+            "T-011": {"status": "pending", "dependencies": ["T-002"]},   # 完了スプリント
+            "T-012": {"status": "pending", "dependencies": ["T-005"]},   # 未完了スプリント
+            "T-013": {"status": "pending", "dependencies": ["T-999"]},   # 不明
+            "T-014": {"status": "pending", "dependencies": ["T-015"]},
+            "T-015": {"status": "in_progress"},
+            "T-016": {"status": "pending", "dependencies": ["T-017"]},   # 開発完了・未統合
+            "T-017": {"status": "completed"},
+            "T-018": {"status": "pending", "dependencies": ["T-019"]},   # 統合済み（状態は未更新）
+            "T-019": {"status": "user_test_pending"},
+        },
+        integrated=["T-001", "T-019"],
+        completed_sprints=["sprint-01"],
+    ))
+    controller = WorkflowController(str(tmp_path), task_queue=InMemoryTaskQueue())
+
+    queued = controller.dispatch_ready_tasks()
+
+    assert sorted(queued) == ["T-010", "T-011", "T-018"]
+
+
+def test_read_only_actions_do_not_create_queue(tmp_path, write_progress):
+    write_progress(_progress({"T-001": {"status": "pending"}, "T-002": {"status": "in_progress"}}))
+    controller = WorkflowController(str(tmp_path))
+
+    summary = controller.get_workflow_summary()
+
+    assert summary["current_phase"] == "development"
+    assert [params["task_id"] for _, params in summary["next_actions"]] == ["T-001"]
+    assert not (tmp_path / ".claude" / "task_queue.db").exists()
+
+
+def test_queued_tasks_are_not_assigned_twice(tmp_path, write_progress):
+    write_progress(_progress({
+        "T-001": {"status": "in_progress"}, "T-002": {"status": "pending"}, "T-003": {"status": "pending"},
+        "T-004": {"status": "pending"},
+    }))
+    controller = WorkflowController(str(tmp_path))
+    controller.task_queue.enqueue("T-002")
+    controller.task_queue.enqueue("T-003")
+    assert controller.task_queue.claim("dev-agent-1").task_id == "T-002"
+
+    reader = WorkflowController(str(tmp_path))
+    reader.max_concurrent_devs = 5
+    actions = reader.get_next_actions(reader.load_snapshot())
+
+    # リース中の T-002・取得待ちの T-003 は進行中として数え、候補から外す
+    assert [params["task_id"] for _, params in actions] == ["T-004"]
+    reader.max_concurrent_devs = 3
+    assert reader.get_next_actions(reader.load_snapshot()) == []
@@ -0,0 +1,70 @@
+"""WorkflowSimulator の離散事象シミュレーションのテスト"""
+
+import pytest
+
+from ProgressSnapshot import load_progress_snapshot
+from WorkflowSimulator import (SimulationConfig, SimulationTasks, StageDistribution, WorkflowDistributions,
+                               simulate, sweep, synthetic_tasks)
+
+
+def _fixed(hours):
+    """ばらつきのない所要時間"""
+    return StageDistribution.from_median(hours, 1e-9)
+
+
+FIXED = WorkflowDistributions(dev=_fixed(4.0), review=_fixed(1.0), user_test=_fixed(0.5),
+                              dev_fail_prob=0.0, review_fail_prob=0.0)
+
+
+def test_fixed_durations_give_exact_makespan():
+    independent = SimulationTasks(["T-1", "T-2", "T-3", "T-4"], [[], [], [], []])
+    chain = SimulationTasks(["T-1", "T-2", "T-3"], [[], [0], [1]])
+
+    one_dev = simulate(independent, FIXED, SimulationConfig(max_concurrent_devs=1), scenarios=5, seed=1)
+    two_devs = simulate(independent, FIXED, SimulationConfig(max_concurrent_devs=2), scenarios=5, seed=1)
+    chained = simulate(chain, FIXED, SimulationConfig(max_concurrent_devs=2), scenarios=5, seed=1)
+
+    # 開発は直列 16h、最後のタスクのレビュー 1h・ユーザーテスト 0.5h
+    assert one_dev.makespan_hours["p95"] == pytest.approx(17.5, rel=1e-3)
+    assert two_devs.makespan_hours["p95"] == pytest.approx(10.5, rel=1e-3)
+    # 依存先の完了（ユーザーテストまで）を待ってから着手する
+    assert chained.makespan_hours["p50"] == pytest.approx(3 * 5.5, rel=1e-3)
+    assert one_dev.utilization["dev"] == pytest.approx(16 / 17.5, rel=1e-3)
+    assert one_dev.mean_reworks == 0
+
+
+def test_same_seed_is_reproducible_and_failures_cause_rework():
+    tasks = synthetic_tasks(12, dependency_prob=0.2, seed=7)
+    flaky = WorkflowDistributions(dev_fail_prob=0.0, review_fail_prob=0.5)
+    configs = [SimulationConfig(max_concurrent_devs=n) for n in (1, 3)]
+
+    first = sweep(tasks, flaky, configs, scenarios=200, seed=3)
+    second = sweep(tasks, flaky, configs, scenarios=200, seed=3)
+
+    assert [r.to_dict() for r in first] == [r.to_dict() for r in second]
+    assert first[0].mean_reworks > 0
+    assert first[1].makespan_hours["p50"] < first[0].makespan_hours["p50"]
+
+
+def test_distributions_are_fitted_from_status_history(write_progress):
+    def history(day, dev_hours):
+        return [
+            {"from_status": "pending", "to_status": "in_progress", "timestamp": f"2026-04-{day:02d}T09:00:00"},
+            {"from_status": "in_progress", "to_status": "review_pending",
+             "timestamp": f"2026-04-{day:02d}T{9 + dev_hours:02d}:00:00"},
+            {"from_status": "review_pending", "to_status": "completed",
+             "timestamp": f"2026-04-{day:02d}T{10 + dev_hours:02d}:00:00"},
+        ]
+
+    snapshot = load_progress_snapshot(write_progress({"active_tasks": {
+        f"T-{i}": {"status": "completed", "status_history": history(i, hours)}
+        for i, hours in enumerate((2, 2, 2, 2), start=1)
+    }}))[1]
+
+    dists = WorkflowDistributions.from_history(snapshot.active_tasks.values())
+
+    assert dists.dev.samples == 4 and dists.dev.median_hours == pytest.approx(2.0)
+    assert dists.review.median_hours == pytest.approx(1.0)
+    assert dists.review_fail_prob == 0.0
+    # サンプルのないフェーズは既定値
+    assert dists.user_test == WorkflowDistributions().user_test
@@ -0,0 +1,60 @@
+"""WorktreeProvisioner の事前配置・回収のテスト（一時 git リポジトリを使用）"""
+
+import subprocess
+
+import pytest
+
+from WorktreeProvisioner import WorktreeProvisioner, _integrated_task_ids
+
+
+def _git(cwd, *args):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+                   cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    root = tmp_path / "repo"
+    (root / "src" / "App").mkdir(parents=True)
+    (root / "src" / "App" / "App.csproj").write_text("<Project />\n", encoding="utf-8")
+    (root / ".gitignore").write_text("bin/\nobj/\nworktrees/\n.claude/\n", encoding="utf-8")
+    _git(root, "init", "--quiet", "--initial-branch=main")
+    _git(root, "add", ".")
+    _git(root, "commit", "--quiet", "-m", "initial")
+    return root
+
+
+def test_prewarm_copies_bin_but_not_obj(repo):
+    provisioner = WorktreeProvisioner(str(repo))
+    assert provisioner.provision(["T-001"])[0].ok
+    project = provisioner.worktree_path("T-001") / "src" / "App"
+    (project / "bin" / "Debug" / "net8.0").mkdir(parents=True)
+    (project / "bin" / "Debug" / "net8.0" / "App.dll").write_text("assembly", encoding="utf-8")
+    (project / "obj").mkdir()
+    (project / "obj" / "App.csproj.FileListAbsolute.txt").write_text(str(project), encoding="utf-8")
+
+    result = provisioner.provision(["T-002"])[0]
+
+    assert result.ok, result.error
+    assert result.prewarmed_files == 1
+    target = provisioner.worktree_path("T-002") / "src" / "App"
+    assert (target / "bin" / "Debug" / "net8.0" / "App.dll").exists()
+    assert not (target / "obj").exists()
+
+
+def test_gc_uses_integration_completed(repo, write_progress):
+    provisioner = WorktreeProvisioner(str(repo))
+    provisioner.provision(["T-001", "T-002"])
+    # completed は開発完了・レビュー待ちで、統合はまだ
+    write_progress({
+        "active_tasks": {"T-001": {"status": "completed"}, "T-002": {"status": "completed"}},
+        "workflow_state": {"integration_completed": ["T-002"]},
+    }, path=repo / ".claude" / "progress.json")
+
+    integrated = _integrated_task_ids(provisioner.project_root)
+    outcome = provisioner.collect_garbage(integrated)
+
+    assert integrated == ["T-002"]
+    assert outcome == {"T-002": "removed"}
+    assert provisioner.worktree_path("T-001").is_dir()
+    assert not provisioner.worktree_path("T-002").exists()